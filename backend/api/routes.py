@@ -1,11 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from backend.services.loan_origination import LoanOriginationService
 from backend.services.document_processor import DocumentProcessor
 from backend.services.trading_engine import TradingEngine
 from backend.services.covenant_monitor import CovenantMonitor
 from backend.services.rate_engine import RateEngine
+from backend.services.bulk_ingest import BulkIngestService
 from backend.database.ledger import LedgerService
 from werkzeug.utils import secure_filename
+from datetime import datetime
 import os
 import logging
 
@@ -18,6 +20,7 @@ doc_processor = DocumentProcessor()
 trading_engine = TradingEngine()
 covenant_monitor = CovenantMonitor()
 rate_engine = RateEngine()
+bulk_ingest = BulkIngestService()
 ledger_service = LedgerService()
 
 # Loan Origination Endpoints
@@ -33,6 +36,95 @@ def apply_for_loan():
         logger.error(f"Error in loan application: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/loans/score', methods=['POST'])
+def score_loans():
+    """Score a batch of loan applications"""
+    try:
+        data = request.json or {}
+        applications = data.get('applications')
+        if not isinstance(applications, list):
+            return jsonify({'error': 'applications must be a list'}), 400
+        
+        result = loan_service.score_applications(applications, data.get('model_name', 'xgboost'))
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error scoring loans: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/loans/bulk', methods=['POST'])
+def bulk_ingest_loans():
+    """Ingest a CSV or NDJSON file of loan applications, or resume a job"""
+    try:
+        if 'file' in request.files:
+            file = request.files['file']
+            stream = file.stream
+            default_format = 'ndjson' if file.filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+        else:
+            stream = request.stream
+            default_format = 'ndjson' if 'ndjson' in (request.content_type or '') else 'csv'
+        
+        data_format = request.args.get('format', default_format)
+        result = bulk_ingest.ingest(stream, data_format, request.args.get('job_id'))
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in bulk loan ingest: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/loans/bulk/<job_id>', methods=['GET'])
+def get_bulk_ingest_job(job_id):
+    """Get progress and row errors of a bulk ingest job"""
+    try:
+        result = bulk_ingest.job_status(
+            job_id, request.args.get('offset', 0, type=int), request.args.get('limit', type=int)
+        )
+        if result:
+            return jsonify(result), 200
+        return jsonify({'error': 'Ingest job not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting bulk ingest job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/loans/explain', methods=['POST'])
+def explain_loans():
+    """Top-k reason codes for a batch of loan applications"""
+    try:
+        data = request.json or {}
+        applications = data.get('applications')
+        if not isinstance(applications, list):
+            return jsonify({'error': 'applications must be a list'}), 400
+        
+        result = loan_service.explain_applications(
+            applications, data.get('model_name', 'xgboost'), data.get('top_k', 3)
+        )
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error explaining loans: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/loans/<loan_id>/reasons', methods=['GET'])
+def get_loan_reasons(loan_id):
+    """Reason codes behind a stored application's credit score"""
+    try:
+        result = loan_service.get_application_reasons(
+            loan_id, request.args.get('model_name', 'xgboost'), request.args.get('top_k', 3, type=int)
+        )
+        if result:
+            return jsonify(result), 200
+        return jsonify({'error': 'Loan not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting loan reasons: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/loans/<loan_id>', methods=['GET'])
 def get_loan(loan_id):
     """Get loan application details"""
@@ -275,53 +367,159 @@ def get_borrower_savings(loan_id):
         logger.error(f"Error calculating borrower savings: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Model Endpoints
+
+@api_bp.route('/models/status', methods=['GET'])
+def get_model_status():
+    """Get loaded credit models and prediction cache counters"""
+    try:
+        result = loan_service.get_model_status()
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error getting model status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/drift', methods=['GET'])
+def get_model_drift():
+    """Get feature drift of recent applications against the training data"""
+    try:
+        result = loan_service.get_drift_report()
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error getting model drift: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/activate', methods=['POST'])
+def activate_model_version():
+    """Make a registered model version live in every worker"""
+    try:
+        data = request.json or {}
+        result = loan_service.activate_model_version(data.get('version'))
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error activating model version: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/shadow', methods=['POST', 'DELETE'])
+def set_shadow_model():
+    """Start or stop shadow scoring with a candidate model version"""
+    try:
+        if request.method == 'DELETE':
+            result = loan_service.set_shadow_model(None, None)
+        else:
+            data = request.json or {}
+            if not data.get('version'):
+                return jsonify({'error': 'version is required'}), 400
+            result = loan_service.set_shadow_model(data['version'], data.get('sample_rate', 0.1))
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error configuring shadow model: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 # Ledger Endpoints
 
 @api_bp.route('/ledger/validate', methods=['GET'])
 def validate_ledger():
     """Validate blockchain ledger"""
     try:
-        is_valid, message = ledger_service.validate_chain()
+        mode = request.args.get('mode', 'incremental')
+        # Parallel verification runs a process pool, so it is a batch job: scripts/manage_ledger.py verify
+        if mode not in ('incremental', 'full'):
+            return jsonify({'error': 'mode must be incremental or full'}), 400
+        
+        is_valid, message = ledger_service.validate_chain(mode)
         return jsonify({
             'is_valid': is_valid,
-            'message': message
+            'message': message,
+            'mode': mode
         }), 200
     except Exception as e:
         logger.error(f"Error validating ledger: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def parse_ledger_filters(args):
+    """Build ledger query filters from request arguments"""
+    filters = {}
+    for field in ('transaction_type', 'portfolio_id', 'seller_id', 'buyer_id'):
+        if args.get(field):
+            filters[field] = args.get(field)
+    for field in ('min_amount', 'max_amount'):
+        if args.get(field):
+            filters[field] = float(args.get(field))
+    for field in ('start_time', 'end_time'):
+        if args.get(field):
+            filters[field] = datetime.fromisoformat(args.get(field))
+    return filters
+
 @api_bp.route('/ledger/query', methods=['GET'])
 def query_ledger():
-    """Query ledger transactions"""
+    """Query ledger transactions one keyset page at a time"""
     try:
-        filters = {}
-        if request.args.get('transaction_type'):
-            filters['transaction_type'] = request.args.get('transaction_type')
-        if request.args.get('portfolio_id'):
-            filters['portfolio_id'] = request.args.get('portfolio_id')
-        
-        blocks = ledger_service.query_ledger(filters)
-        
-        result = [
-            {
-                'block_number': block.block_number,
-                'timestamp': block.timestamp.isoformat(),
-                'transaction_type': block.transaction_type,
-                'transaction_id': block.transaction_id,
-                'portfolio_id': block.portfolio_id,
-                'seller_id': block.seller_id,
-                'buyer_id': block.buyer_id,
-                'amount': block.amount,
-                'block_hash': block.block_hash
-            }
-            for block in blocks
-        ]
+        filters = parse_ledger_filters(request.args)
+        limit = int(request.args.get('limit', 100))
+        cursor = request.args.get('cursor')
         
-        return jsonify({'blocks': result}), 200
+        result = ledger_service.query_ledger(filters, cursor, limit)
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error querying ledger: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/ledger/export', methods=['GET'])
+def export_ledger():
+    """Stream ledger transactions as NDJSON"""
+    try:
+        filters = parse_ledger_filters(request.args)
+        return Response(
+            stream_with_context(ledger_service.export_ledger(filters)),
+            mimetype='application/x-ndjson'
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error exporting ledger: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/ledger/proof/<transaction_id>', methods=['GET'])
+def get_ledger_proof(transaction_id):
+    """Get Merkle inclusion proof for a ledger transaction"""
+    try:
+        result = ledger_service.get_transaction_proof(transaction_id)
+        if result:
+            return jsonify(result), 200
+        return jsonify({'error': 'Transaction not found in ledger'}), 404
+    except Exception as e:
+        logger.error(f"Error building ledger proof: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/ledger/counterparties/<counterparty_id>', methods=['GET'])
+def get_counterparty_summary(counterparty_id):
+    """Get ledger activity summary for a buyer or seller"""
+    try:
+        result = ledger_service.get_counterparty_summary(counterparty_id)
+        if result:
+            return jsonify(result), 200
+        return jsonify({'error': 'Counterparty not found in ledger'}), 404
+    except Exception as e:
+        logger.error(f"Error getting counterparty summary: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/ledger/metrics', methods=['GET'])
+def get_ledger_metrics():
+    """Get block sealing cost metrics"""
+    try:
+        result = ledger_service.get_sealing_metrics()
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error getting ledger metrics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 # Dashboard Analytics Endpoints
 
 @api_bp.route('/analytics/dashboard', methods=['GET'])
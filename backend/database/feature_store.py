@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import fcntl
+import shutil
+from datetime import datetime, timedelta
+import numpy as np
+from backend.database.models import db, LoanApplication
+from backend.models.training_data import FEATURE_NAMES
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_FORMAT_VERSION = 2
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.lock'
+SNAPSHOT_PATTERN = re.compile(r'^snapshot_(\d{8})$')
+EPOCH = datetime(1970, 1, 1)
+
+# Columns written per snapshot; features is one C-ordered (rows, features) matrix
+SNAPSHOT_ARRAYS = ('loan_ids', 'row_ids', 'updated_at_us', 'application_date_us', 'approved', 'features')
+
+def to_microseconds(value):
+    return (value - EPOCH) // timedelta(microseconds=1) if value is not None else -1
+
+class FeatureSnapshot:
+    """One immutable feature store snapshot, memory-mapped read-only by default"""
+
+    def __init__(self, directory, mmap_mode='r'):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        for name in SNAPSHOT_ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+        self._order = None
+
+    @property
+    def n_rows(self):
+        return len(self.loan_ids)
+
+    @property
+    def feature_names(self):
+        return self.meta['feature_names']
+
+    @property
+    def watermark(self):
+        watermark = self.meta.get('watermark')
+        return datetime.fromisoformat(watermark) if watermark else None
+
+    def positions(self, loan_ids):
+        """Row positions of the given loan ids, -1 where a loan is not in the snapshot"""
+        wanted = np.array([str(loan_id).encode() for loan_id in loan_ids], dtype='S')
+        if self.n_rows == 0 or len(wanted) == 0:
+            return np.full(len(wanted), -1, dtype=np.int64)
+
+        if self._order is None:
+            self._order = np.argsort(self.loan_ids, kind='stable')
+
+        sorted_ids = self.loan_ids[self._order]
+        found = np.minimum(np.searchsorted(sorted_ids, wanted), self.n_rows - 1)
+        return np.where(sorted_ids[found] == wanted, self._order[found], -1)
+
+    def matrix(self, loan_ids=None):
+        """Feature matrix for the given loans, or the whole mapped matrix without copying
+
+        Raises KeyError naming the first loan that is not in the snapshot.
+        """
+        if loan_ids is None:
+            return self.features
+
+        positions = self.positions(loan_ids)
+        if (positions < 0).any():
+            raise KeyError(f"Loan {loan_ids[int(np.argmax(positions < 0))]} not in feature store")
+        return self.features[positions]
+
+class FeatureStore:
+    """Materialize the credit model features of every LoanApplication into NumPy arrays
+
+    Each refresh reads only rows whose updated_at is at or after the last
+    watermark (less a lag for late commits), as plain column tuples rather
+    than ORM objects, and writes a new snapshot directory. Changed loans
+    overwrite their row and new loans are appended; a CURRENT file is
+    swapped atomically to publish the snapshot, so open readers keep a
+    consistent mapping of the one they loaded.
+    """
+
+    def __init__(self, directory=None, batch_size=None, watermark_lag_seconds=None, keep_snapshots=None):
+        self.directory = directory or Config.FEATURE_STORE_PATH
+        self.batch_size = batch_size or Config.FEATURE_STORE_BATCH_SIZE
+        self.watermark_lag = timedelta(seconds=Config.FEATURE_STORE_WATERMARK_LAG_SECONDS
+                                       if watermark_lag_seconds is None else watermark_lag_seconds)
+        self.keep_snapshots = keep_snapshots or Config.FEATURE_STORE_KEEP_SNAPSHOTS
+
+    def snapshot_path(self, number):
+        return os.path.join(self.directory, f'snapshot_{number:08d}')
+
+    def list_snapshots(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(match.group(1)) for match in map(SNAPSHOT_PATTERN.match, os.listdir(self.directory)) if match
+        )
+
+    def current_snapshot(self):
+        path = os.path.join(self.directory, CURRENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip()
+
+    def load(self, mmap_mode='r'):
+        """Open the published snapshot; None before the first refresh or after a format change"""
+        name = self.current_snapshot()
+        if name is None:
+            return None
+
+        directory = os.path.join(self.directory, name)
+        with open(os.path.join(directory, 'meta.json')) as f:
+            format_version = json.load(f).get('format_version')
+        if format_version != FEATURE_STORE_FORMAT_VERSION:
+            logger.warning(f"Feature store snapshot {name} has format {format_version}; the next refresh rebuilds it")
+            return None
+        return FeatureSnapshot(directory, mmap_mode)
+
+    def fetch_changes(self, since=None):
+        """Read loans updated at or after `since` (all loans when None) in id-keyset batches"""
+        columns = [
+            LoanApplication.id, LoanApplication.loan_id, LoanApplication.updated_at,
+            LoanApplication.application_date, LoanApplication.loan_approved
+        ] + [getattr(LoanApplication, name) for name in FEATURE_NAMES]
+
+        batches = []
+        last_id = 0
+        while True:
+            query = db.session.query(*columns).filter(LoanApplication.id > last_id)
+            if since is not None:
+                query = query.filter(LoanApplication.updated_at >= since)
+            rows = query.order_by(LoanApplication.id).limit(self.batch_size).all()
+            if not rows:
+                break
+
+            batches.append({
+                'row_ids': np.array([row[0] for row in rows], dtype=np.int64),
+                'loan_ids': np.array([row[1].encode() for row in rows]),
+                'updated_at_us': np.array([to_microseconds(row[2]) for row in rows], dtype=np.int64),
+                'application_date_us': np.array([to_microseconds(row[3]) for row in rows], dtype=np.int64),
+                'approved': np.array([bool(row[4]) for row in rows], dtype=np.int8),
+                # None becomes NaN
+                'features': np.array([row[5:] for row in rows], dtype=np.float64).reshape(len(rows), len(FEATURE_NAMES))
+            })
+            last_id = int(batches[-1]['row_ids'][-1])
+
+        if not batches:
+            return None
+        return {name: np.concatenate([batch[name] for batch in batches]) for name in SNAPSHOT_ARRAYS}
+
+    def _write_snapshot(self, number, snapshot, changes, positions, watermark):
+        """Write the previous snapshot with changed loans overwritten and new loans appended
+
+        The previous snapshot is copied through memory maps, so a refresh
+        holds only the changed rows in memory.
+        """
+        existing = positions >= 0
+        previous_rows = snapshot.n_rows if snapshot is not None else 0
+        rows = previous_rows + int((~existing).sum())
+
+        path = self.snapshot_path(number)
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name in SNAPSHOT_ARRAYS:
+            values = changes[name]
+            dtype = np.result_type(getattr(snapshot, name), values) if snapshot is not None else values.dtype
+            filepath = os.path.join(tmp_path, f'{name}.npy')
+            if rows == 0:
+                np.save(filepath, np.empty((0,) + values.shape[1:], dtype=dtype))
+                continue
+
+            out = np.lib.format.open_memmap(filepath, mode='w+', dtype=dtype, shape=(rows,) + values.shape[1:])
+            if previous_rows:
+                out[:previous_rows] = getattr(snapshot, name)
+            out[positions[existing]] = values[existing]
+            out[previous_rows:] = values[~existing]
+            out.flush()
+            del out
+
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({
+                'format_version': FEATURE_STORE_FORMAT_VERSION,
+                'feature_names': FEATURE_NAMES,
+                'rows': rows,
+                'watermark': watermark.isoformat() if watermark else None,
+                'created_at': datetime.utcnow().isoformat()
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+
+        current = os.path.join(self.directory, CURRENT_FILE)
+        with open(current + '.tmp', 'w') as f:
+            f.write(os.path.basename(path))
+        os.replace(current + '.tmp', current)
+
+        return rows
+
+    def applications_since(self, snapshot, since=None):
+        """Dates, features and approval labels of loans applied for after `since`, oldest first
+
+        Loans without an application date or with a missing feature are left out.
+        """
+        application_dates = np.asarray(snapshot.application_date_us)
+        selected = application_dates >= 0
+        if since is not None:
+            selected &= application_dates > to_microseconds(since)
+
+        positions = np.flatnonzero(selected)
+        X = np.asarray(snapshot.features[positions], dtype=np.float64)
+        complete = ~np.isnan(X).any(axis=1)
+        if not complete.all():
+            logger.warning(f"Skipping {int((~complete).sum())} applications with missing features")
+
+        positions, X = positions[complete], X[complete]
+        order = np.argsort(application_dates[positions], kind='stable')
+        dates = application_dates[positions][order].astype('datetime64[us]')
+        return dates, X[order], np.asarray(snapshot.approved[positions][order], dtype=np.int8)
+
+    def refresh(self, full=False):
+        """Bring the store up to date with the database and return a summary"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(os.path.join(self.directory, LOCK_FILE), 'w') as lock:
+            # One refresher at a time; readers never take the lock
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                snapshot = None if full else self.load(mmap_mode='r')
+                since = None
+                if snapshot is not None and snapshot.watermark is not None:
+                    since = snapshot.watermark - self.watermark_lag
+
+                changes = self.fetch_changes(since)
+                if changes is None:
+                    changes = {
+                        'loan_ids': np.array([], dtype='S1'),
+                        'row_ids': np.array([], dtype=np.int64),
+                        'updated_at_us': np.array([], dtype=np.int64),
+                        'application_date_us': np.array([], dtype=np.int64),
+                        'approved': np.array([], dtype=np.int8),
+                        'features': np.empty((0, len(FEATURE_NAMES)), dtype=np.float64)
+                    }
+
+                if snapshot is None:
+                    positions = np.full(len(changes['loan_ids']), -1, dtype=np.int64)
+                else:
+                    positions = snapshot.positions([loan_id.decode() for loan_id in changes['loan_ids']])
+
+                    # The lag window re-reads rows the snapshot already has at the same version
+                    changed = positions < 0
+                    changed[~changed] = snapshot.updated_at_us[positions[~changed]] != changes['updated_at_us'][~changed]
+                    if not changed.any():
+                        return {
+                            'snapshot': self.current_snapshot(),
+                            'rows': snapshot.n_rows,
+                            'updated': 0,
+                            'inserted': 0,
+                            'watermark': snapshot.meta['watermark']
+                        }
+                    changes = {name: values[changed] for name, values in changes.items()}
+                    positions = positions[changed]
+
+                updated = int((positions >= 0).sum())
+                inserted = len(positions) - updated
+
+                watermark = snapshot.watermark if snapshot is not None else None
+                if len(changes['updated_at_us']) and changes['updated_at_us'].max() >= 0:
+                    latest = EPOCH + timedelta(microseconds=int(changes['updated_at_us'].max()))
+                    watermark = max(watermark, latest) if watermark else latest
+
+                snapshots = self.list_snapshots()
+                number = snapshots[-1] + 1 if snapshots else 1
+                rows = self._write_snapshot(number, snapshot, changes, positions, watermark)
+
+                # Unlinked files stay readable for processes that still map them
+                for old in self.list_snapshots()[:-self.keep_snapshots]:
+                    shutil.rmtree(self.snapshot_path(old), ignore_errors=True)
+
+                logger.info(
+                    f"Feature store snapshot {number}: {rows} loans, "
+                    f"{updated} updated, {inserted} inserted, watermark {watermark}"
+                )
+                return {
+                    'snapshot': os.path.basename(self.snapshot_path(number)),
+                    'rows': rows,
+                    'updated': updated,
+                    'inserted': inserted,
+                    'watermark': watermark.isoformat() if watermark else None
+                }
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
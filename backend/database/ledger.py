@@ -1,146 +1,835 @@
 import hashlib
+import hmac
 import json
-from datetime import datetime
-from backend.database.models import db, BlockchainLedger
+import struct
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_, false
+from sqlalchemy.exc import IntegrityError
+from backend.database.models import db, BlockchainLedger, LedgerTransaction, LedgerCheckpoint, CounterpartySummary
+from backend.database.ledger_writer import LedgerWriter
+from backend.database.merkle import calculate_leaf_hash, build_merkle_tree, get_merkle_proof, tree_root
+from backend.database.sealing import get_sealing_strategy, SealingMetrics
+from backend.database.sequencer import LedgerSequencer
+from config.settings import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# version, block number, timestamp fields (year to microsecond), previous hash + merkle root
+BLOCK_HEADER_V2 = struct.Struct('<BqHBBBBBI64s')
+LEDGER_QUERY_MAX_LIMIT = 1000
+
 class LedgerService:
     
     @staticmethod
-    def calculate_merkle_root(transactions):
-        if not transactions:
-            return hashlib.sha256(b'').hexdigest()
-        
-        hashes = [
-            hashlib.sha256(json.dumps(t, sort_keys=True).encode()).hexdigest()
-            for t in transactions
-        ]
+    def calculate_leaf_hash(transaction):
+        return calculate_leaf_hash(transaction)
+    
+    @staticmethod
+    def calculate_merkle_root_from_leaves(leaf_hashes, hash_version=1):
+        return tree_root(build_merkle_tree(leaf_hashes, hash_version))
+    
+    @staticmethod
+    def calculate_merkle_root(transactions, hash_version=1):
+        return LedgerService.calculate_merkle_root_from_leaves([
+            LedgerService.calculate_leaf_hash(t) for t in transactions
+        ], hash_version)
+    
+    @staticmethod
+    def block_hash_prefix(block_number, timestamp, transaction_type, transaction_id,
+                          previous_hash, merkle_root, hash_version=1):
+        """Serialize every header field except the nonce
         
-        while len(hashes) > 1:
-            if len(hashes) % 2 != 0:
-                hashes.append(hashes[-1])
-            
-            hashes = [
-                hashlib.sha256((hashes[i] + hashes[i+1]).encode()).hexdigest()
-                for i in range(0, len(hashes), 2)
-            ]
+        Version 1 is the original string concatenation with an ISO timestamp.
+        Version 2 packs fixed-width integers and the two raw digests, followed
+        by the NUL-separated transaction type and id.
+        """
+        if hash_version == 1:
+            return f"{block_number}{timestamp.isoformat()}{transaction_type}{transaction_id}{previous_hash}{merkle_root}".encode()
         
-        return hashes[0]
+        return BLOCK_HEADER_V2.pack(
+            2, block_number,
+            timestamp.year, timestamp.month, timestamp.day,
+            timestamp.hour, timestamp.minute, timestamp.second, timestamp.microsecond,
+            bytes.fromhex(previous_hash + merkle_root)
+        ) + f"{transaction_type}\0{transaction_id}".encode()
+    
+    @staticmethod
+    def encode_nonce(nonce, hash_version=1):
+        return str(nonce).encode() if hash_version == 1 else nonce.to_bytes(8, 'little')
+    
+    @staticmethod
+    def calculate_block_hash(block_number, timestamp, transaction_type, transaction_id,
+                             previous_hash, merkle_root, nonce, hash_version=1):
+        block_prefix = LedgerService.block_hash_prefix(
+            block_number, timestamp, transaction_type, transaction_id, previous_hash,
+            merkle_root, hash_version
+        )
+        return hashlib.sha256(block_prefix + LedgerService.encode_nonce(nonce, hash_version)).hexdigest()
     
     @staticmethod
     def add_transaction(transaction_type, transaction_id, **kwargs):
+        """Submit a transaction to the group-commit writer
+
+        With a synchronous sealing strategy this waits for the block. The
+        background strategy records the transaction as pending and returns
+        at once while the writer mines and links it.
+        """
+        transaction_data = {
+            'type': transaction_type,
+            'id': transaction_id,
+            **kwargs
+        }
+        
+        if not sealing_strategy.is_async:
+            return ledger_writer.submit(transaction_data)
+        
+        leaf_hash = LedgerService.prepare_transaction(transaction_data)
+        
         try:
-            # Get previous block
-            previous_block = BlockchainLedger.query.order_by(
-                BlockchainLedger.block_number.desc()
-            ).first()
-            
-            previous_hash = previous_block.block_hash if previous_block else '0' * 64
-            block_number = (previous_block.block_number + 1) if previous_block else 1
-            
-            # Create transaction data
-            transaction_data = {
-                'type': transaction_type,
-                'id': transaction_id,
-                **kwargs
-            }
-            
-            # Calculate merkle root
-            merkle_root = LedgerService.calculate_merkle_root([transaction_data])
-            
-            # Mine block
-            nonce = 0
-            timestamp = datetime.utcnow()
-            
-            while True:
-                block_content = f"{block_number}{timestamp.isoformat()}{transaction_type}{transaction_id}{previous_hash}{merkle_root}{nonce}"
-                block_hash = hashlib.sha256(block_content.encode()).hexdigest()
-                
-                if block_hash.startswith('0'):
-                    break
-                nonce += 1
-                
-                if nonce > 1000000:
-                    logger.warning("Mining difficulty too high, accepting current hash")
-                    break
-            
-            # Create ledger entry
-            ledger_entry = BlockchainLedger(
-                block_number=block_number,
-                timestamp=timestamp,
+            pending = LedgerTransaction(
                 transaction_type=transaction_type,
                 transaction_id=transaction_id,
                 portfolio_id=kwargs.get('portfolio_id'),
                 seller_id=kwargs.get('seller_id'),
                 buyer_id=kwargs.get('buyer_id'),
                 amount=kwargs.get('amount'),
-                previous_hash=previous_hash,
-                block_hash=block_hash,
-                merkle_root=merkle_root,
-                nonce=nonce
+                transaction_data=transaction_data,
+                leaf_hash=leaf_hash,
+                status='pending',
+                submitted_at=datetime.utcnow()
             )
-            
-            db.session.add(ledger_entry)
+            db.session.add(pending)
             db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error recording pending transaction: {str(e)}")
+            raise
+        
+        ledger_writer.submit(transaction_data, wait=False, pending_id=pending.id)
+        
+        return {
+            'transaction_id': transaction_id,
+            'status': 'pending',
+            'timestamp': pending.submitted_at.isoformat()
+        }
+    
+    @staticmethod
+    def seal_pending_transactions(limit=None, min_age_seconds=None, wait=True):
+        """Hand pending transactions left by a stopped writer back to the writer
+        
+        Only transactions pending for at least min_age_seconds are taken, so
+        ones a live writer in another process is about to seal are left to
+        it. Runs when the writer thread starts; with wait, returns how many
+        were resubmitted, sealed and failed.
+        """
+        min_age_seconds = Config.LEDGER_PENDING_MIN_AGE_SECONDS if min_age_seconds is None else min_age_seconds
+        query = LedgerTransaction.query.filter(
+            LedgerTransaction.status == 'pending',
+            LedgerTransaction.submitted_at <= datetime.utcnow() - timedelta(seconds=min_age_seconds)
+        ).order_by(LedgerTransaction.id)
+        if limit:
+            query = query.limit(limit)
+        pending = query.all()
+        
+        futures = [
+            ledger_writer.submit(transaction.transaction_data, wait=False, pending_id=transaction.id)
+            for transaction in pending
+        ]
+        if pending:
+            logger.info(f"Resubmitted {len(pending)} pending ledger transactions")
+        if not wait:
+            return futures
+        
+        failed = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+        return {'resubmitted': len(futures), 'sealed': len(futures) - failed, 'failed': failed}
+    
+    @staticmethod
+    def get_sealing_metrics():
+        pending_count = LedgerTransaction.query.filter_by(status='pending').count()
+        return {
+            'strategy': sealing_strategy.name,
+            'difficulty': sealing_strategy.difficulty,
+            'pending_transactions': pending_count,
+            'writer': ledger_writer.stats(),
+            **sealing_metrics.snapshot()
+        }
+    
+    @staticmethod
+    def prepare_transaction(transaction_data):
+        """Check a submitted transaction can be sealed and return its leaf hash"""
+        if not isinstance(transaction_data, dict) or 'type' not in transaction_data or 'id' not in transaction_data:
+            raise ValueError("Ledger transactions need a type and an id")
+        try:
+            return LedgerService.calculate_leaf_hash(transaction_data)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Ledger transaction {transaction_data['id']} is not serialisable: {str(e)}")
+    
+    @staticmethod
+    def seal_block(transactions, pending_ids=None, leaf_hashes=None):
+        """Seal a batch of transactions into one block with a single commit"""
+        pending_ids = pending_ids or [None] * len(transactions)
+        if leaf_hashes is None or None in leaf_hashes:
+            leaf_hashes = [LedgerService.calculate_leaf_hash(t) for t in transactions]
+        
+        for attempt in range(1, Config.LEDGER_APPEND_RETRIES + 1):
+            try:
+                return LedgerService._append_block(transactions, pending_ids, leaf_hashes)
+            except IntegrityError:
+                # Another writer took this block number; refresh the tip and retry
+                db.session.rollback()
+                ledger_sequencer.reset()
+                logger.warning(f"Ledger append conflict, retrying (attempt {attempt})")
+            except Exception as e:
+                db.session.rollback()
+                ledger_sequencer.reset()
+                logger.error(f"Error adding transactions to ledger: {str(e)}")
+                raise
+        
+        raise RuntimeError(f"Ledger append failed after {Config.LEDGER_APPEND_RETRIES} attempts")
+    
+    @staticmethod
+    def _append_block(transactions, pending_ids, leaf_hashes):
+        block_number, previous_hash = ledger_sequencer.reserve()
+        
+        # Under the append lock, so a transaction resubmitted by a recovery sweep is never sealed twice
+        linked_ids = [pending_id for pending_id in pending_ids if pending_id is not None]
+        if linked_ids:
+            still_pending = db.session.query(func.count(LedgerTransaction.id)).filter(
+                LedgerTransaction.id.in_(linked_ids),
+                LedgerTransaction.status == 'pending'
+            ).scalar()
+            if still_pending != len(linked_ids):
+                raise ValueError("Pending ledger transaction was already sealed")
+        
+        # Single-transaction blocks keep the transaction in the header as before
+        if len(transactions) == 1:
+            header = transactions[0]
+            transaction_type = header['type']
+            transaction_id = header['id']
+        else:
+            header = {}
+            transaction_type = 'BATCH'
+            transaction_id = f"BATCH{block_number}"
+        
+        hash_version = Config.LEDGER_HASH_VERSION
+        
+        # Build merkle tree, keeping every level for inclusion proofs
+        merkle_tree = build_merkle_tree(leaf_hashes, hash_version)
+        merkle_root = tree_root(merkle_tree)
+        
+        # Seal block
+        timestamp = datetime.utcnow()
+        seal_start = time.perf_counter()
+        
+        nonce, block_hash, hash_attempts = sealing_strategy.mine(
+            LedgerService.block_hash_prefix(
+                block_number, timestamp, transaction_type, transaction_id,
+                previous_hash, merkle_root, hash_version
+            ),
+            lambda nonce: LedgerService.encode_nonce(nonce, hash_version)
+        )
+        
+        sealing_metrics.record(len(transactions), hash_attempts, time.perf_counter() - seal_start)
+        
+        # Create ledger entry
+        ledger_entry = BlockchainLedger(
+            block_number=block_number,
+            timestamp=timestamp,
+            transaction_type=transaction_type,
+            transaction_id=transaction_id,
+            portfolio_id=header.get('portfolio_id'),
+            seller_id=header.get('seller_id'),
+            buyer_id=header.get('buyer_id'),
+            amount=header.get('amount'),
+            previous_hash=previous_hash,
+            block_hash=block_hash,
+            merkle_root=merkle_root,
+            merkle_tree=merkle_tree,
+            nonce=nonce,
+            hash_version=hash_version,
+            transaction_count=len(transactions)
+        )
+        db.session.add(ledger_entry)
+        
+        db.session.flush()
+        
+        for leaf_index, (transaction, leaf_hash, pending_id) in enumerate(
+            zip(transactions, leaf_hashes, pending_ids)
+        ):
+            if pending_id is not None:
+                # Link a transaction recorded earlier by the background sealer
+                db.session.query(LedgerTransaction).filter_by(id=pending_id).update({
+                    'block_number': block_number,
+                    'leaf_index': leaf_index,
+                    'status': 'sealed'
+                })
+                continue
             
-            logger.info(f"Block {block_number} added to ledger: {transaction_type}")
-            
-            return {
+            db.session.add(LedgerTransaction(
+                block_number=block_number,
+                leaf_index=leaf_index,
+                transaction_type=transaction['type'],
+                transaction_id=transaction['id'],
+                portfolio_id=transaction.get('portfolio_id'),
+                seller_id=transaction.get('seller_id'),
+                buyer_id=transaction.get('buyer_id'),
+                amount=transaction.get('amount'),
+                transaction_data=transaction,
+                leaf_hash=leaf_hash,
+                status='sealed',
+                submitted_at=timestamp
+            ))
+        
+        LedgerService.update_counterparty_summaries(
+            LedgerService.counterparty_activity(block_number, transactions)
+        )
+        
+        db.session.commit()
+        ledger_sequencer.advance(block_number, block_hash)
+        
+        logger.info(f"Block {block_number} added to ledger: {transaction_type} ({len(transactions)} transactions)")
+        
+        return [
+            {
                 'block_number': block_number,
                 'block_hash': block_hash,
-                'transaction_id': transaction_id,
+                'leaf_index': leaf_index,
+                'transaction_id': transaction['id'],
                 'timestamp': timestamp.isoformat()
             }
+            for leaf_index, transaction in enumerate(transactions)
+        ]
+    
+    @staticmethod
+    def backfill_legacy_transactions(batch_size=None):
+        """Give blocks sealed before ledger_transactions existed their transaction row
+        
+        Those blocks carry a single transaction in the header, and the Merkle
+        root of one leaf is the leaf hash itself. Their payload was the type,
+        id and header fields, so it is rebuilt from the header; a rebuilt
+        payload that does not hash to the root is still linked and counted
+        as unmatched.
+        """
+        batch_size = batch_size or Config.LEDGER_VALIDATION_BATCH_SIZE
+        has_transactions = db.session.query(LedgerTransaction.id).filter(
+            LedgerTransaction.block_number == BlockchainLedger.block_number
+        ).exists()
+        
+        backfilled = 0
+        unmatched = 0
+        last_block = 0
+        
+        try:
+            while True:
+                blocks = db.session.query(
+                    BlockchainLedger.block_number,
+                    BlockchainLedger.timestamp,
+                    BlockchainLedger.transaction_type,
+                    BlockchainLedger.transaction_id,
+                    BlockchainLedger.portfolio_id,
+                    BlockchainLedger.seller_id,
+                    BlockchainLedger.buyer_id,
+                    BlockchainLedger.amount,
+                    BlockchainLedger.merkle_root
+                ).filter(
+                    BlockchainLedger.block_number > last_block,
+                    ~has_transactions
+                ).order_by(BlockchainLedger.block_number).limit(batch_size).all()
+                
+                if not blocks:
+                    break
+                
+                rows = []
+                for block in blocks:
+                    transaction_data = {'type': block.transaction_type, 'id': block.transaction_id}
+                    for field in ('portfolio_id', 'seller_id', 'buyer_id', 'amount'):
+                        if getattr(block, field) is not None:
+                            transaction_data[field] = getattr(block, field)
+                    
+                    if LedgerService.calculate_leaf_hash(transaction_data) != block.merkle_root:
+                        unmatched += 1
+                    
+                    rows.append({
+                        'block_number': block.block_number,
+                        'leaf_index': 0,
+                        'transaction_type': block.transaction_type,
+                        'transaction_id': block.transaction_id,
+                        'portfolio_id': block.portfolio_id,
+                        'seller_id': block.seller_id,
+                        'buyer_id': block.buyer_id,
+                        'amount': block.amount,
+                        'transaction_data': transaction_data,
+                        'leaf_hash': block.merkle_root,
+                        'status': 'sealed',
+                        'submitted_at': block.timestamp
+                    })
+                
+                db.session.execute(LedgerTransaction.__table__.insert(), rows)
+                db.session.commit()
+                backfilled += len(rows)
+                last_block = blocks[-1].block_number
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error adding transaction to ledger: {str(e)}")
+            logger.error(f"Error backfilling legacy ledger transactions: {str(e)}")
             raise
+        
+        if unmatched:
+            logger.warning(f"{unmatched} legacy blocks had payloads that could not be rebuilt exactly")
+        logger.info(f"Backfilled transactions for {backfilled} legacy blocks")
+        return {'backfilled': backfilled, 'unmatched': unmatched}
     
     @staticmethod
-    def validate_chain():
+    def get_transaction_proof(transaction_id):
+        """Build a Merkle inclusion proof for a sealed transaction"""
         try:
-            blocks = BlockchainLedger.query.order_by(BlockchainLedger.block_number).all()
+            transaction = LedgerTransaction.query.filter_by(
+                transaction_id=transaction_id,
+                status='sealed'
+            ).order_by(LedgerTransaction.block_number).first()
+            
+            if not transaction:
+                return None
+            
+            block = db.session.get(BlockchainLedger, transaction.block_number)
+            merkle_tree = block.merkle_tree
             
-            if not blocks:
-                return True, "Chain is empty"
+            if merkle_tree is None:
+                # Blocks sealed before trees were stored: rebuild from the leaves
+                leaf_hashes = [
+                    leaf_hash for (leaf_hash,) in db.session.query(LedgerTransaction.leaf_hash).filter(
+                        LedgerTransaction.block_number == block.block_number
+                    ).order_by(LedgerTransaction.leaf_index)
+                ]
+                merkle_tree = build_merkle_tree(leaf_hashes, block.hash_version or 1)
             
-            for i in range(1, len(blocks)):
-                current_block = blocks[i]
-                previous_block = blocks[i-1]
+            return {
+                'transaction_id': transaction.transaction_id,
+                'transaction_data': transaction.transaction_data,
+                'block_number': block.block_number,
+                'block_hash': block.block_hash,
+                'leaf_index': transaction.leaf_index,
+                'leaf_hash': transaction.leaf_hash,
+                'merkle_root': block.merkle_root,
+                'hash_version': block.hash_version or 1,
+                'proof': get_merkle_proof(merkle_tree, transaction.leaf_index)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error building inclusion proof: {str(e)}")
+            raise
+    
+    @staticmethod
+    def counterparty_activity(block_number, transactions, activity=None):
+        """Aggregate transactions per seller and buyer for one block"""
+        activity = {} if activity is None else activity
+        
+        for transaction in transactions:
+            amount = transaction.get('amount') or 0.0
+            seller_id = transaction.get('seller_id')
+            buyer_id = transaction.get('buyer_id')
+            
+            for counterparty_id in {seller_id, buyer_id} - {None}:
+                entry = activity.get(counterparty_id)
+                if entry is None:
+                    entry = activity[counterparty_id] = {
+                        'transaction_count': 0,
+                        'sell_count': 0,
+                        'buy_count': 0,
+                        'total_sold': 0.0,
+                        'total_bought': 0.0,
+                        'first_block': block_number,
+                        'last_block': block_number
+                    }
+                entry['transaction_count'] += 1
+                entry['last_block'] = block_number
                 
+                if counterparty_id == seller_id:
+                    entry['sell_count'] += 1
+                    entry['total_sold'] += amount
+                if counterparty_id == buyer_id:
+                    entry['buy_count'] += 1
+                    entry['total_bought'] += amount
+        
+        return activity
+    
+    @staticmethod
+    def update_counterparty_summaries(activity):
+        """Fold a block's activity into the summary rows
+        
+        Runs inside the append transaction, which the sequencer serializes,
+        so the read-modify-write cannot interleave with another append.
+        """
+        if not activity:
+            return
+        
+        summaries = {
+            summary.counterparty_id: summary
+            for summary in CounterpartySummary.query.filter(
+                CounterpartySummary.counterparty_id.in_(list(activity))
+            )
+        }
+        
+        for counterparty_id, entry in activity.items():
+            summary = summaries.get(counterparty_id)
+            if summary is None:
+                db.session.add(CounterpartySummary(counterparty_id=counterparty_id, **entry))
+                continue
+            
+            summary.transaction_count += entry['transaction_count']
+            summary.sell_count += entry['sell_count']
+            summary.buy_count += entry['buy_count']
+            summary.total_sold += entry['total_sold']
+            summary.total_bought += entry['total_bought']
+            summary.last_block = entry['last_block']
+    
+    @staticmethod
+    def rebuild_counterparty_summaries(batch_size=None):
+        """Recompute every summary from the sealed transactions
+        
+        Legacy blocks are backfilled first so their counterparties count too.
+        The append lock is held throughout, so no block sealed meanwhile is
+        lost from the rebuilt totals.
+        """
+        LedgerService.backfill_legacy_transactions(batch_size)
+        
+        try:
+            batch_size = batch_size or Config.LEDGER_VALIDATION_BATCH_SIZE
+            ledger_sequencer.lock()
+            query = db.session.query(
+                LedgerTransaction.block_number,
+                LedgerTransaction.seller_id,
+                LedgerTransaction.buyer_id,
+                LedgerTransaction.amount
+            ).filter(
+                LedgerTransaction.status == 'sealed'
+            ).order_by(LedgerTransaction.block_number, LedgerTransaction.leaf_index)
+            
+            activity = {}
+            for row in query.yield_per(batch_size):
+                LedgerService.counterparty_activity(row.block_number, [row._asdict()], activity)
+            
+            db.session.query(CounterpartySummary).delete()
+            db.session.add_all(
+                CounterpartySummary(counterparty_id=counterparty_id, **entry)
+                for counterparty_id, entry in activity.items()
+            )
+            db.session.commit()
+            
+            logger.info(f"Rebuilt summaries for {len(activity)} counterparties")
+            return len(activity)
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding counterparty summaries: {str(e)}")
+            raise
+    
+    @staticmethod
+    def get_counterparty_summary(counterparty_id):
+        """Return the precomputed ledger activity of a buyer or seller"""
+        summary = db.session.get(CounterpartySummary, counterparty_id)
+        if not summary:
+            return None
+        
+        return {
+            'counterparty_id': summary.counterparty_id,
+            'transaction_count': summary.transaction_count,
+            'sell_count': summary.sell_count,
+            'buy_count': summary.buy_count,
+            'total_sold': summary.total_sold,
+            'total_bought': summary.total_bought,
+            'first_block': summary.first_block,
+            'last_block': summary.last_block,
+            'updated_at': summary.updated_at.isoformat() if summary.updated_at else None
+        }
+    
+    @staticmethod
+    def sign_checkpoint(block_number, block_hash, created_at):
+        message = f"{block_number}{block_hash}{created_at.isoformat()}".encode()
+        return hmac.new(Config.LEDGER_CHECKPOINT_KEY.encode(), message, hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def get_latest_checkpoint():
+        """Return the newest checkpoint carrying a valid signature"""
+        checkpoints = LedgerCheckpoint.query.order_by(
+            LedgerCheckpoint.block_number.desc(),
+            LedgerCheckpoint.id.desc()
+        ).limit(10).all()
+        
+        for checkpoint in checkpoints:
+            expected = LedgerService.sign_checkpoint(
+                checkpoint.block_number, checkpoint.block_hash, checkpoint.created_at
+            )
+            if hmac.compare_digest(expected, checkpoint.signature):
+                return checkpoint
+            logger.warning(f"Ignoring checkpoint {checkpoint.id} with invalid signature")
+        
+        return None
+    
+    @staticmethod
+    def create_checkpoint(block_number, block_hash, blocks_verified, validation_mode):
+        created_at = datetime.utcnow()
+        checkpoint = LedgerCheckpoint(
+            block_number=block_number,
+            block_hash=block_hash,
+            blocks_verified=blocks_verified,
+            validation_mode=validation_mode,
+            signature=LedgerService.sign_checkpoint(block_number, block_hash, created_at),
+            created_at=created_at
+        )
+        db.session.add(checkpoint)
+        db.session.commit()
+        
+        logger.info(f"Ledger checkpoint recorded at block {block_number}")
+        return checkpoint
+    
+    @staticmethod
+    def iter_blocks(after_block_number=0, batch_size=None):
+        """Stream blocks in block order using keyset batches"""
+        batch_size = batch_size or Config.LEDGER_VALIDATION_BATCH_SIZE
+        columns = (
+            BlockchainLedger.block_number,
+            BlockchainLedger.timestamp,
+            BlockchainLedger.transaction_type,
+            BlockchainLedger.transaction_id,
+            BlockchainLedger.previous_hash,
+            BlockchainLedger.block_hash,
+            BlockchainLedger.merkle_root,
+            BlockchainLedger.nonce,
+            BlockchainLedger.hash_version
+        )
+        
+        while True:
+            batch = db.session.query(*columns).filter(
+                BlockchainLedger.block_number > after_block_number
+            ).order_by(BlockchainLedger.block_number).limit(batch_size).all()
+            
+            if not batch:
+                return
+            
+            yield from batch
+            after_block_number = batch[-1].block_number
+    
+    @staticmethod
+    def validate_chain(mode='incremental', batch_size=None):
+        """Validate the chain from the newest checkpoint, or from genesis in full mode"""
+        try:
+            previous_hash = None
+            start_block = 0
+            
+            if mode == 'incremental':
+                checkpoint = LedgerService.get_latest_checkpoint()
+                if checkpoint:
+                    anchor = db.session.get(BlockchainLedger, checkpoint.block_number)
+                    if anchor is None or anchor.block_hash != checkpoint.block_hash:
+                        return False, f"Block {checkpoint.block_number} no longer matches its checkpoint"
+                    previous_hash = checkpoint.block_hash
+                    start_block = checkpoint.block_number
+            elif mode != 'full':
+                raise ValueError(f"Unknown validation mode {mode}")
+            
+            last_block = None
+            blocks_verified = 0
+            
+            for block in LedgerService.iter_blocks(start_block, batch_size):
                 # Verify previous hash linkage
-                if current_block.previous_hash != previous_block.block_hash:
-                    return False, f"Block {current_block.block_number} has invalid previous_hash"
+                if previous_hash is not None and block.previous_hash != previous_hash:
+                    return False, f"Block {block.block_number} has invalid previous_hash"
                 
                 # Verify block hash
-                block_content = f"{current_block.block_number}{current_block.timestamp.isoformat()}{current_block.transaction_type}{current_block.transaction_id}{current_block.previous_hash}{current_block.merkle_root}{current_block.nonce}"
-                calculated_hash = hashlib.sha256(block_content.encode()).hexdigest()
+                calculated_hash = LedgerService.calculate_block_hash(
+                    block.block_number, block.timestamp,
+                    block.transaction_type, block.transaction_id,
+                    block.previous_hash, block.merkle_root, block.nonce,
+                    block.hash_version or 1
+                )
+                
+                if calculated_hash != block.block_hash:
+                    return False, f"Block {block.block_number} has invalid hash"
                 
-                if calculated_hash != current_block.block_hash:
-                    return False, f"Block {current_block.block_number} has invalid hash"
+                previous_hash = block.block_hash
+                last_block = block
+                blocks_verified += 1
             
-            return True, "Chain is valid"
+            if last_block is None:
+                if start_block == 0:
+                    return True, "Chain is empty"
+                return True, f"Chain is valid (no new blocks since checkpoint {start_block})"
+            
+            LedgerService.create_checkpoint(
+                last_block.block_number, last_block.block_hash, blocks_verified, mode
+            )
+            
+            return True, f"Chain is valid ({blocks_verified} blocks verified after block {start_block})"
             
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error validating chain: {str(e)}")
             return False, f"Validation error: {str(e)}"
     
     @staticmethod
-    def query_ledger(filters=None):
+    def verify_chain_parallel(workers=None, chunk_size=None):
+        """Verify the full chain across CPU cores and report every invalid block"""
+        from backend.database.chain_verifier import verify_chain_parallel
+        
+        try:
+            first_block, last_block = db.session.query(
+                func.min(BlockchainLedger.block_number),
+                func.max(BlockchainLedger.block_number)
+            ).one()
+            
+            report = verify_chain_parallel(
+                db.engine.url.render_as_string(hide_password=False),
+                first_block,
+                last_block,
+                workers=workers or Config.LEDGER_VERIFY_WORKERS,
+                chunk_size=chunk_size or Config.LEDGER_VERIFY_CHUNK_SIZE
+            )
+            
+            if report['is_valid'] and report['last_block'] is not None:
+                LedgerService.create_checkpoint(
+                    report['last_block'], report['last_hash'], report['blocks_verified'], 'parallel'
+                )
+            
+            return report
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error verifying chain in parallel: {str(e)}")
+            raise
+    
+    @staticmethod
+    def parse_cursor(cursor):
         try:
-            query = BlockchainLedger.query
+            block_number, leaf_index = cursor.split(':')
+            return int(block_number), int(leaf_index)
+        except (AttributeError, ValueError):
+            raise ValueError(f"Invalid ledger cursor {cursor}")
+    
+    @staticmethod
+    def build_ledger_query(filters=None):
+        """Sealed transactions joined to their blocks, narrowed by filters"""
+        query = db.session.query(
+            LedgerTransaction.block_number,
+            LedgerTransaction.leaf_index,
+            BlockchainLedger.timestamp,
+            LedgerTransaction.transaction_type,
+            LedgerTransaction.transaction_id,
+            LedgerTransaction.portfolio_id,
+            LedgerTransaction.seller_id,
+            LedgerTransaction.buyer_id,
+            LedgerTransaction.amount,
+            BlockchainLedger.block_hash
+        ).join(
+            BlockchainLedger, LedgerTransaction.block_number == BlockchainLedger.block_number
+        ).filter(LedgerTransaction.status == 'sealed')
+        
+        filters = filters or {}
+        
+        for field in ('transaction_type', 'portfolio_id', 'seller_id', 'buyer_id'):
+            if field in filters:
+                query = query.filter(getattr(LedgerTransaction, field) == filters[field])
+        
+        if 'min_amount' in filters:
+            query = query.filter(LedgerTransaction.amount >= filters['min_amount'])
+        if 'max_amount' in filters:
+            query = query.filter(LedgerTransaction.amount <= filters['max_amount'])
+        
+        # Block timestamps grow with block numbers, so a time range becomes a
+        # block range on the keyset column
+        if 'start_time' in filters:
+            first_block = db.session.query(BlockchainLedger.block_number).filter(
+                BlockchainLedger.timestamp >= filters['start_time']
+            ).order_by(BlockchainLedger.timestamp).limit(1).scalar()
+            query = query.filter(LedgerTransaction.block_number >= first_block) if first_block else query.filter(false())
+        if 'end_time' in filters:
+            last_block = db.session.query(BlockchainLedger.block_number).filter(
+                BlockchainLedger.timestamp <= filters['end_time']
+            ).order_by(BlockchainLedger.timestamp.desc()).limit(1).scalar()
+            query = query.filter(LedgerTransaction.block_number <= last_block) if last_block else query.filter(false())
+        
+        return query
+    
+    @staticmethod
+    def serialize_entry(entry):
+        return {
+            'block_number': entry.block_number,
+            'leaf_index': entry.leaf_index,
+            'timestamp': entry.timestamp.isoformat(),
+            'transaction_type': entry.transaction_type,
+            'transaction_id': entry.transaction_id,
+            'portfolio_id': entry.portfolio_id,
+            'seller_id': entry.seller_id,
+            'buyer_id': entry.buyer_id,
+            'amount': entry.amount,
+            'block_hash': entry.block_hash
+        }
+    
+    @staticmethod
+    def query_ledger(filters=None, cursor=None, limit=100):
+        """Return one page of ledger transactions, newest first, with a keyset cursor"""
+        if not 1 <= limit <= LEDGER_QUERY_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {LEDGER_QUERY_MAX_LIMIT}")
+        keyset = LedgerService.parse_cursor(cursor) if cursor else None
+        
+        try:
+            query = LedgerService.build_ledger_query(filters)
+            
+            if keyset:
+                query = query.filter(
+                    tuple_(LedgerTransaction.block_number, LedgerTransaction.leaf_index) < keyset
+                )
             
-            if filters:
-                if 'transaction_type' in filters:
-                    query = query.filter(BlockchainLedger.transaction_type == filters['transaction_type'])
-                if 'portfolio_id' in filters:
-                    query = query.filter(BlockchainLedger.portfolio_id == filters['portfolio_id'])
+            entries = query.order_by(
+                LedgerTransaction.block_number.desc(),
+                LedgerTransaction.leaf_index.desc()
+            ).limit(limit + 1).all()
             
-            return query.order_by(BlockchainLedger.block_number.desc()).all()
+            next_cursor = None
+            if entries and len(entries) > limit:
+                entries = entries[:limit]
+                next_cursor = f"{entries[-1].block_number}:{entries[-1].leaf_index}"
+            
+            return {
+                'blocks': [LedgerService.serialize_entry(entry) for entry in entries],
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
             
         except Exception as e:
             logger.error(f"Error querying ledger: {str(e)}")
-            return []
+            return {'blocks': [], 'next_cursor': None, 'limit': limit}
+    
+    @staticmethod
+    def export_ledger(filters=None, batch_size=1000):
+        """Stream matching transactions in chain order as NDJSON lines"""
+        query = LedgerService.build_ledger_query(filters).order_by(
+            LedgerTransaction.block_number,
+            LedgerTransaction.leaf_index
+        ).execution_options(stream_results=True, yield_per=batch_size)
+        
+        for entry in query:
+            yield json.dumps(LedgerService.serialize_entry(entry)) + '\n'
+
+sealing_strategy = get_sealing_strategy(
+    Config.LEDGER_SEALING_STRATEGY,
+    difficulty=Config.LEDGER_POW_DIFFICULTY,
+    max_nonce=Config.LEDGER_POW_MAX_NONCE
+)
+sealing_metrics = SealingMetrics()
+ledger_sequencer = LedgerSequencer(Config.LEDGER_ADVISORY_LOCK_KEY)
+
+ledger_writer = LedgerWriter(
+    LedgerService.seal_block,
+    prepare_fn=LedgerService.prepare_transaction,
+    recover_fn=lambda: LedgerService.seal_pending_transactions(wait=False),
+    batch_window_ms=Config.LEDGER_BATCH_WINDOW_MS,
+    max_batch_size=Config.LEDGER_BATCH_MAX_SIZE
+)
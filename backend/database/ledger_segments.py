@@ -0,0 +1,368 @@
+import os
+import re
+import struct
+from datetime import datetime, timedelta
+import numpy as np
+from backend.database.models import db, BlockchainLedger, LedgerTransaction
+from backend.database.ledger import LedgerService
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b'ECLSEG01'
+SEGMENT_FORMAT_VERSION = 3
+# magic, format version, block count, transaction count, string count, first block, last block
+SEGMENT_HEADER = struct.Struct('<8sIIIIqq')
+SEGMENT_PATTERN = re.compile(r'^ledger_(\d{12})_(\d{12})\.seg$')
+
+NO_STRING = 0xFFFFFFFF
+EPOCH = datetime(1970, 1, 1)
+
+RECORD_DTYPE = np.dtype([
+    ('block_number', '<i8'),
+    ('timestamp_us', '<i8'),
+    ('nonce', '<i8'),
+    ('amount', '<f8'),
+    ('transaction_count', '<i4'),
+    ('first_transaction', '<u4'),
+    ('hash_version', '<u1'),
+    ('transaction_type', '<u4'),
+    ('transaction_id', '<u4'),
+    ('portfolio_id', '<u4'),
+    ('seller_id', '<u4'),
+    ('buyer_id', '<u4'),
+    ('previous_hash', 'V32'),
+    ('block_hash', 'V32'),
+    ('merkle_root', 'V32'),
+])
+
+# One record per sealed transaction (Merkle leaf), in block and leaf order
+TRANSACTION_DTYPE = np.dtype([
+    ('block_number', '<i8'),
+    ('leaf_index', '<i4'),
+    ('amount', '<f8'),
+    ('transaction_type', '<u4'),
+    ('transaction_id', '<u4'),
+    ('portfolio_id', '<u4'),
+    ('seller_id', '<u4'),
+    ('buyer_id', '<u4'),
+    ('leaf_hash', 'V32'),
+])
+
+STRING_FIELDS = ('transaction_type', 'transaction_id', 'portfolio_id', 'seller_id', 'buyer_id')
+DIGEST_FIELDS = ('previous_hash', 'block_hash', 'merkle_root')
+
+def segment_filename(first_block, last_block):
+    return f"ledger_{first_block:012d}_{last_block:012d}.seg"
+
+def list_segments(directory):
+    """Return (first_block, last_block, path) for every segment, in block order"""
+    if not os.path.isdir(directory):
+        return []
+
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            segments.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+
+    return sorted(segments)
+
+class LedgerSegmentWriter:
+    """Export the chain as fixed-width binary segment files
+
+    A segment holds the block records, then one record per transaction
+    with its Merkle leaf and counterparties, then the string table as an
+    offsets array over a UTF-8 blob, all in a single file.
+    """
+
+    def __init__(self, directory, segment_size=100000):
+        self.directory = directory
+        self.segment_size = segment_size
+
+    def _encode_digest(self, value):
+        return bytes.fromhex(value) if value else bytes(32)
+
+    def _write_segment(self, blocks, transactions):
+        records = np.zeros(len(blocks), dtype=RECORD_DTYPE)
+        leaves = np.zeros(len(transactions), dtype=TRANSACTION_DTYPE)
+        strings = {}
+
+        def intern(value):
+            if value is None:
+                return NO_STRING
+            return strings.setdefault(value, len(strings))
+
+        for index, transaction in enumerate(transactions):
+            leaf = leaves[index]
+            leaf['block_number'] = transaction.block_number
+            leaf['leaf_index'] = transaction.leaf_index
+            leaf['amount'] = transaction.amount if transaction.amount is not None else np.nan
+            for field in STRING_FIELDS:
+                leaf[field] = intern(getattr(transaction, field))
+            leaf['leaf_hash'] = np.void(self._encode_digest(transaction.leaf_hash))
+
+        # Transactions are in block order, so each block's leaves are one contiguous slice
+        first_transactions = np.searchsorted(
+            leaves['block_number'], [block.block_number for block in blocks], side='left'
+        )
+
+        for index, block in enumerate(blocks):
+            record = records[index]
+            record['block_number'] = block.block_number
+            record['timestamp_us'] = (block.timestamp - EPOCH) // timedelta(microseconds=1)
+            record['nonce'] = block.nonce or 0
+            record['amount'] = block.amount if block.amount is not None else np.nan
+            record['transaction_count'] = block.transaction_count or 1
+            record['first_transaction'] = first_transactions[index]
+            record['hash_version'] = block.hash_version or 1
+            for field in STRING_FIELDS:
+                record[field] = intern(getattr(block, field))
+            for field in DIGEST_FIELDS:
+                record[field] = np.void(self._encode_digest(getattr(block, field)))
+
+        encoded = [value.encode('utf-8') for value in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+        first_block, last_block = blocks[0].block_number, blocks[-1].block_number
+        path = os.path.join(self.directory, segment_filename(first_block, last_block))
+
+        with open(path + '.tmp', 'wb') as f:
+            f.write(SEGMENT_HEADER.pack(
+                SEGMENT_MAGIC, SEGMENT_FORMAT_VERSION, len(blocks), len(leaves), len(encoded),
+                first_block, last_block
+            ))
+            f.write(records.tobytes())
+            f.write(leaves.tobytes())
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+        os.replace(path + '.tmp', path)
+
+        return path
+
+    def export(self, start_block=None, end_block=None):
+        """Write segments for a block range, continuing after the last exported block by default"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        if start_block is None:
+            segments = list_segments(self.directory)
+            start_block = segments[-1][1] + 1 if segments else 1
+
+        columns = (
+            BlockchainLedger.block_number,
+            BlockchainLedger.timestamp,
+            BlockchainLedger.transaction_type,
+            BlockchainLedger.transaction_id,
+            BlockchainLedger.portfolio_id,
+            BlockchainLedger.seller_id,
+            BlockchainLedger.buyer_id,
+            BlockchainLedger.amount,
+            BlockchainLedger.previous_hash,
+            BlockchainLedger.block_hash,
+            BlockchainLedger.merkle_root,
+            BlockchainLedger.nonce,
+            BlockchainLedger.transaction_count,
+            BlockchainLedger.hash_version
+        )
+        transaction_columns = (
+            LedgerTransaction.block_number,
+            LedgerTransaction.leaf_index,
+            LedgerTransaction.transaction_type,
+            LedgerTransaction.transaction_id,
+            LedgerTransaction.portfolio_id,
+            LedgerTransaction.seller_id,
+            LedgerTransaction.buyer_id,
+            LedgerTransaction.amount,
+            LedgerTransaction.leaf_hash
+        )
+
+        written = []
+        after_block_number = start_block - 1
+
+        while True:
+            query = db.session.query(*columns).filter(
+                BlockchainLedger.block_number > after_block_number
+            )
+            if end_block is not None:
+                query = query.filter(BlockchainLedger.block_number <= end_block)
+
+            blocks = query.order_by(BlockchainLedger.block_number).limit(self.segment_size).all()
+            if not blocks:
+                break
+
+            transactions = db.session.query(*transaction_columns).filter(
+                LedgerTransaction.block_number.between(blocks[0].block_number, blocks[-1].block_number),
+                LedgerTransaction.status == 'sealed'
+            ).order_by(LedgerTransaction.block_number, LedgerTransaction.leaf_index).all()
+
+            written.append(self._write_segment(blocks, transactions))
+            after_block_number = blocks[-1].block_number
+
+        logger.info(f"Exported {len(written)} ledger segments to {self.directory}")
+        return written
+
+class LedgerSegment:
+    """A memory-mapped segment; record fields are zero-copy NumPy views"""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            magic, version, count, transaction_count, string_count, first_block, last_block = \
+                SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a ledger segment")
+        if version != SEGMENT_FORMAT_VERSION:
+            raise ValueError(f"{path} uses unsupported segment format {version}; re-export it with --start 1")
+
+        self.version = version
+        self.first_block = first_block
+        self.last_block = last_block
+
+        offset = SEGMENT_HEADER.size
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(count,))
+        offset += count * RECORD_DTYPE.itemsize
+        self.transactions = np.memmap(
+            path, dtype=TRANSACTION_DTYPE, mode='r', offset=offset, shape=(transaction_count,)
+        )
+        offset += transaction_count * TRANSACTION_DTYPE.itemsize
+        string_offsets = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(string_count + 1,))
+        offset += string_offsets.nbytes
+
+        blob = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(int(string_offsets[-1]),)).tobytes() \
+            if string_offsets[-1] else b''
+        self.strings = [
+            blob[start:end].decode('utf-8')
+            for start, end in zip(string_offsets[:-1].tolist(), string_offsets[1:].tolist())
+        ]
+        self._string_index = {value: index for index, value in enumerate(self.strings)}
+        self._transaction_ends = np.append(self.records['first_transaction'][1:], transaction_count)
+
+    def __len__(self):
+        return len(self.records)
+
+    def string(self, index):
+        return None if index == NO_STRING else self.strings[index]
+
+    def string_id(self, value):
+        if value is None:
+            return NO_STRING
+        # Unknown values map to an id no record carries
+        return self._string_index.get(value, NO_STRING - 1)
+
+    def block(self, position):
+        """Decode one record back into the ledger's column values"""
+        record = self.records[position]
+        return {
+            'block_number': int(record['block_number']),
+            'timestamp': EPOCH + timedelta(microseconds=int(record['timestamp_us'])),
+            'nonce': int(record['nonce']),
+            'amount': None if np.isnan(record['amount']) else float(record['amount']),
+            'transaction_count': int(record['transaction_count']),
+            'hash_version': int(record['hash_version']),
+            **{field: self.string(int(record[field])) for field in STRING_FIELDS},
+            **{field: record[field].tobytes().hex() for field in DIGEST_FIELDS}
+        }
+
+    def block_transactions(self, position):
+        """Zero-copy view of the transaction records sealed in one block"""
+        return self.transactions[int(self.records['first_transaction'][position]):int(self._transaction_ends[position])]
+
+    def transaction(self, position):
+        """Decode one transaction record"""
+        record = self.transactions[position]
+        return {
+            'block_number': int(record['block_number']),
+            'leaf_index': int(record['leaf_index']),
+            'amount': None if np.isnan(record['amount']) else float(record['amount']),
+            **{field: self.string(int(record[field])) for field in STRING_FIELDS},
+            'leaf_hash': record['leaf_hash'].tobytes().hex()
+        }
+
+class LedgerSegmentReader:
+    """Query and verify exported segments without touching the database"""
+
+    def __init__(self, directory):
+        self.segments = [LedgerSegment(path) for _, _, path in list_segments(directory)]
+
+    def block_range(self, first_block, last_block):
+        """Yield (segment, records) views covering a block range"""
+        for segment in self.segments:
+            if segment.last_block < first_block or segment.first_block > last_block:
+                continue
+            numbers = segment.records['block_number']
+            start = np.searchsorted(numbers, first_block, side='left')
+            end = np.searchsorted(numbers, last_block, side='right')
+            yield segment, segment.records[start:end]
+
+    def find(self, **filters):
+        """Yield (segment, transactions) views matching string-field equality filters
+
+        Filters apply to each transaction, so a counterparty inside a batch
+        block is found too.
+        """
+        for segment in self.segments:
+            mask = np.ones(len(segment.transactions), dtype=bool)
+            for field, value in filters.items():
+                mask &= segment.transactions[field] == segment.string_id(value)
+            if mask.any():
+                yield segment, segment.transactions[mask]
+
+    def verify(self):
+        """Recheck links, hashes and each block's Merkle root over its exported leaves"""
+        invalid_blocks = []
+        previous_hash = None
+        blocks_verified = 0
+
+        for segment in self.segments:
+            records = segment.records
+
+            # Links inside a segment compare digest columns as whole arrays
+            links = records['previous_hash'][1:] != records['block_hash'][:-1]
+            for position in np.nonzero(links)[0] + 1:
+                invalid_blocks.append({
+                    'block_number': int(records['block_number'][position]),
+                    'reason': 'invalid previous_hash'
+                })
+
+            if len(records) and previous_hash is not None and records['previous_hash'][0] != previous_hash:
+                invalid_blocks.append({
+                    'block_number': int(records['block_number'][0]),
+                    'reason': 'invalid previous_hash'
+                })
+
+            for position in range(len(records)):
+                block = segment.block(position)
+                leaves = segment.block_transactions(position)
+                if len(leaves):
+                    merkle_root = LedgerService.calculate_merkle_root_from_leaves(
+                        [leaf.tobytes().hex() for leaf in leaves['leaf_hash']], block['hash_version']
+                    )
+                    if merkle_root != block['merkle_root']:
+                        invalid_blocks.append({
+                            'block_number': block['block_number'],
+                            'reason': 'invalid merkle_root'
+                        })
+                calculated_hash = LedgerService.calculate_block_hash(
+                    block['block_number'], block['timestamp'],
+                    block['transaction_type'], block['transaction_id'],
+                    block['previous_hash'], block['merkle_root'], block['nonce'],
+                    block['hash_version']
+                )
+                if calculated_hash != block['block_hash']:
+                    invalid_blocks.append({
+                        'block_number': block['block_number'],
+                        'reason': 'invalid hash'
+                    })
+
+            if len(records):
+                previous_hash = records['block_hash'][-1]
+            blocks_verified += len(records)
+
+        invalid_blocks.sort(key=lambda item: item['block_number'])
+        return {
+            'is_valid': not invalid_blocks,
+            'blocks_verified': blocks_verified,
+            'invalid_blocks': invalid_blocks
+        }
@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LedgerWriter:
+    """Group-commit writer that seals buffered transactions into shared blocks
+
+    prepare_fn runs on the submitting thread, so a transaction that cannot
+    be serialised is rejected before it is queued. If a whole batch still
+    fails to seal, its transactions are sealed one at a time so only the
+    offending caller sees the error. recover_fn runs once in the writer
+    thread when it starts, to resubmit work a stopped writer left behind.
+    Failures are counted, since nobody waits on background submissions.
+    """
+
+    def __init__(self, seal_fn, prepare_fn=None, recover_fn=None, batch_window_ms=10, max_batch_size=100):
+        self.seal_fn = seal_fn
+        self.prepare_fn = prepare_fn
+        self.recover_fn = recover_fn
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+        self._stats_lock = threading.Lock()
+        self.sealed = 0
+        self.failed = 0
+        self.last_error = None
+
+    def submit(self, transaction_data, wait=True, timeout=None, pending_id=None):
+        """Queue a transaction and return its receipt once the block is committed"""
+        prepared = self.prepare_fn(transaction_data) if self.prepare_fn else None
+        future = Future()
+        self._ensure_started()
+        self._queue.put((transaction_data, pending_id, prepared, future))
+
+        if not wait:
+            return future
+        return future.result(timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            # Capture the application so the writer thread can open its own context
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='ledger-writer',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'sealed': self.sealed,
+                'failed': self.failed,
+                'last_error': self.last_error
+            }
+
+    def _record(self, sealed=0, error=None):
+        with self._stats_lock:
+            self.sealed += sealed
+            if error is not None:
+                self.failed += 1
+                self.last_error = str(error)
+
+    def _run(self):
+        if self.recover_fn is not None:
+            try:
+                with self._app.app_context():
+                    self.recover_fn()
+            except Exception as e:
+                logger.error(f"Error resubmitting pending ledger transactions: {str(e)}")
+
+        while True:
+            batch = self._collect_batch()
+            self._flush(batch)
+
+    def _seal(self, batch):
+        with self._app.app_context():
+            return self.seal_fn(
+                [transaction_data for transaction_data, _, _, _ in batch],
+                [pending_id for _, pending_id, _, _ in batch],
+                [prepared for _, _, prepared, _ in batch]
+            )
+
+    def _flush(self, batch):
+        try:
+            receipts = self._seal(batch)
+        except Exception as e:
+            logger.error(f"Error sealing ledger batch of {len(batch)}: {str(e)}")
+            if len(batch) == 1:
+                self._record(error=e)
+                batch[0][3].set_exception(e)
+                return
+
+            # The failed block was rolled back; seal each transaction alone to isolate the bad one
+            for item in batch:
+                try:
+                    receipt, = self._seal([item])
+                except Exception as item_error:
+                    logger.error(f"Error sealing ledger transaction {item[0].get('id')}: {str(item_error)}")
+                    self._record(error=item_error)
+                    item[3].set_exception(item_error)
+                else:
+                    self._record(sealed=1)
+                    item[3].set_result(receipt)
+            return
+
+        self._record(sealed=len(batch))
+        for (_, _, _, future), receipt in zip(batch, receipts):
+            future.set_result(receipt)
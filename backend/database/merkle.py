@@ -0,0 +1,128 @@
+import hashlib
+import json
+
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+DIGEST_SIZE = 32
+HEX_SIZE = 2 * DIGEST_SIZE
+
+def calculate_leaf_hash(transaction):
+    """Hash a transaction payload into a Merkle leaf
+
+    Leaves are the same SHA-256 digest under both hashing versions; the
+    hex form is what gets stored.
+    """
+    return hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+
+def hash_pair(left, right):
+    """Version 1: hash the concatenated hex strings"""
+    return hashlib.sha256((left + right).encode()).hexdigest()
+
+def hash_pair_digest(left, right):
+    """Version 2: hash the concatenated raw 32-byte digests"""
+    return hashlib.sha256(left + right).digest()
+
+def _build_levels(leaves):
+    levels = [leaves]
+
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            hash_pair(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+            for i in range(0, len(level), 2)
+        ])
+
+    return levels
+
+def build_digest_levels(leaf_digests):
+    """Build version 2 levels as contiguous buffers of 32-byte digests
+
+    Each parent hashes a 64-byte slice of its child level in place, so no
+    per-node strings or concatenations are allocated.
+    """
+    level = leaf_digests
+    levels = [level]
+    sha256 = hashlib.sha256
+
+    while len(level) > DIGEST_SIZE:
+        if len(level) % (2 * DIGEST_SIZE):
+            level += level[-DIGEST_SIZE:]
+        view = memoryview(level)
+        level = b''.join([
+            sha256(view[i:i + 2 * DIGEST_SIZE]).digest()
+            for i in range(0, len(level), 2 * DIGEST_SIZE)
+        ])
+        levels.append(level)
+
+    return levels
+
+def build_merkle_tree(leaf_hashes, version=1):
+    """Build every tree level, as hex, from the leaves up to the root
+
+    Odd-length levels pair their last hash with itself, matching
+    calculate_merkle_root. The padding is not stored. Version 1 levels are
+    lists of hex hashes; version 2 levels are single hex strings holding
+    the level's digests back to back.
+    """
+    if version == 1:
+        return _build_levels(list(leaf_hashes)) if leaf_hashes else [[EMPTY_ROOT]]
+
+    if not leaf_hashes:
+        return [EMPTY_ROOT]
+
+    leaf_level = ''.join(leaf_hashes)
+    levels = build_digest_levels(bytes.fromhex(leaf_level))
+    return [leaf_level] + [level.hex() for level in levels[1:]]
+
+def level_size(level):
+    return len(level) // HEX_SIZE if isinstance(level, str) else len(level)
+
+def level_hash(level, index):
+    """Return one hex hash from a level in either storage layout"""
+    if isinstance(level, str):
+        return level[index * HEX_SIZE:(index + 1) * HEX_SIZE]
+    return level[index]
+
+def tree_root(levels):
+    return level_hash(levels[-1], 0)
+
+def get_merkle_proof(levels, leaf_index):
+    """Return the sibling path for a leaf as a list of {hash, position} steps"""
+    if leaf_index < 0 or leaf_index >= level_size(levels[0]):
+        raise IndexError(f"Leaf index {leaf_index} out of range")
+
+    proof = []
+    index = leaf_index
+
+    for level in levels[:-1]:
+        sibling_index = index ^ 1
+        if sibling_index >= level_size(level):
+            sibling_index = index
+
+        proof.append({
+            'hash': level_hash(level, sibling_index),
+            'position': 'left' if sibling_index < index else 'right'
+        })
+        index //= 2
+
+    return proof
+
+def verify_merkle_proof(leaf_hash, proof, merkle_root, version=1):
+    """Check an inclusion proof without access to the ledger"""
+    if version == 1:
+        current = leaf_hash
+        pair_fn = hash_pair
+    else:
+        current = bytes.fromhex(leaf_hash)
+        pair_fn = hash_pair_digest
+
+    for step in proof:
+        sibling = step['hash'] if version == 1 else bytes.fromhex(step['hash'])
+        if step['position'] == 'left':
+            current = pair_fn(sibling, current)
+        else:
+            current = pair_fn(current, sibling)
+
+    if version != 1:
+        current = current.hex()
+
+    return current == merkle_root
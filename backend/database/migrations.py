@@ -1,14 +1,73 @@
-from backend.database.models import db
+from sqlalchemy import text
+from backend.database.models import db, BlockchainLedger
+from backend.database.ledger import LedgerService
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns added to tables that predate them, with their SQL type and the value existing rows get
+ADDED_COLUMNS = [
+    ('blockchain_ledger', 'merkle_tree', 'JSON', None),
+    ('blockchain_ledger', 'hash_version', 'SMALLINT', 1),
+    ('blockchain_ledger', 'transaction_count', 'INTEGER', 1),
+]
+# Indexes create_all skips because their table already exists
+ADDED_INDEX_TABLES = [BlockchainLedger.__table__]
+# Indexes no longer in the models; counterparty lookups use ledger_transactions and its summaries
+DROPPED_INDEXES = ['idx_ledger_seller', 'idx_ledger_buyer']
+
+def add_missing_columns():
+    """ALTER existing tables to add the columns in ADDED_COLUMNS they lack"""
+    inspector = db.inspect(db.engine)
+    added = []
+
+    for table, column, sql_type, default in ADDED_COLUMNS:
+        if column in {existing['name'] for existing in inspector.get_columns(table)}:
+            continue
+
+        statement = f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"
+        if default is not None:
+            statement += f" DEFAULT {default}"
+        db.session.execute(text(statement))
+        added.append(f"{table}.{column}")
+
+    db.session.commit()
+    return added
+
+def create_missing_indexes():
+    for table in ADDED_INDEX_TABLES:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def drop_obsolete_indexes():
+    for name in DROPPED_INDEXES:
+        db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    db.session.commit()
+
 def run_migrations(app):
-    """Execute database migrations"""
+    """Execute database migrations
+
+    Creates missing tables, adds new columns and indexes to existing ones,
+    drops indexes the models no longer define, backfills
+    ledger_transactions for blocks sealed before it existed and rebuilds
+    the counterparty summaries to include them.
+    """
     with app.app_context():
         try:
             logger.info("Running database migrations...")
+            had_summaries = db.inspect(db.engine).has_table('counterparty_summaries')
             db.create_all()
+
+            added = add_missing_columns()
+            if added:
+                logger.info(f"Added columns: {', '.join(added)}")
+            create_missing_indexes()
+            drop_obsolete_indexes()
+
+            # Summaries only count blocks sealed since their table existed, so fill them from the whole chain
+            backfilled = LedgerService.backfill_legacy_transactions()['backfilled']
+            if backfilled or not had_summaries:
+                LedgerService.rebuild_counterparty_summaries()
             logger.info("Migrations completed successfully")
         except Exception as e:
             logger.error(f"Migration failed: {str(e)}")
@@ -199,7 +199,10 @@ class BlockchainLedger(db.Model):
     previous_hash = db.Column(db.String(64), nullable=False)
     block_hash = db.Column(db.String(64), nullable=False, unique=True)
     merkle_root = db.Column(db.String(64))
+    merkle_tree = db.Column(db.JSON)
     nonce = db.Column(db.Integer)
+    hash_version = db.Column(db.SmallInteger, default=1)
+    transaction_count = db.Column(db.Integer, default=1)
     
     validated = db.Column(db.Boolean, default=True)
     validator_id = db.Column(db.String(50))
@@ -207,4 +210,66 @@ class BlockchainLedger(db.Model):
     __table_args__ = (
         Index('idx_block_hash', 'block_hash'),
         Index('idx_transaction_id_ledger', 'transaction_id'),
+        Index('idx_ledger_timestamp', 'timestamp'),
+    )
+
+class LedgerTransaction(db.Model):
+    __tablename__ = 'ledger_transactions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    block_number = db.Column(db.Integer, db.ForeignKey('blockchain_ledger.block_number'))
+    leaf_index = db.Column(db.Integer)
+    
+    transaction_type = db.Column(db.String(50), nullable=False)
+    transaction_id = db.Column(db.String(50), nullable=False)
+    portfolio_id = db.Column(db.String(50))
+    seller_id = db.Column(db.String(50))
+    buyer_id = db.Column(db.String(50))
+    amount = db.Column(db.Float)
+    
+    transaction_data = db.Column(db.JSON, nullable=False)
+    leaf_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), default='sealed')
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_block_leaf', 'block_number', 'leaf_index', unique=True),
+        Index('idx_transaction_id_ledger_tx', 'transaction_id'),
+        Index('idx_ledger_tx_status', 'status'),
+        Index('idx_ledger_tx_type', 'transaction_type', 'block_number', 'leaf_index'),
+        Index('idx_ledger_tx_portfolio', 'portfolio_id', 'block_number', 'leaf_index'),
+        Index('idx_ledger_tx_seller', 'seller_id', 'block_number', 'leaf_index'),
+        Index('idx_ledger_tx_buyer', 'buyer_id', 'block_number', 'leaf_index'),
+    )
+
+class CounterpartySummary(db.Model):
+    __tablename__ = 'counterparty_summaries'
+    
+    counterparty_id = db.Column(db.String(50), primary_key=True)
+    
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    sell_count = db.Column(db.Integer, nullable=False, default=0)
+    buy_count = db.Column(db.Integer, nullable=False, default=0)
+    total_sold = db.Column(db.Float, nullable=False, default=0.0)
+    total_bought = db.Column(db.Float, nullable=False, default=0.0)
+    
+    first_block = db.Column(db.Integer)
+    last_block = db.Column(db.Integer)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LedgerCheckpoint(db.Model):
+    __tablename__ = 'ledger_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    block_number = db.Column(db.Integer, nullable=False)
+    block_hash = db.Column(db.String(64), nullable=False)
+    blocks_verified = db.Column(db.Integer)
+    validation_mode = db.Column(db.String(20))
+    signature = db.Column(db.String(64), nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_checkpoint_block', 'block_number'),
     )
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NoProofOfWork:
+    """Seal blocks with a single hash and no mining"""
+
+    name = 'none'
+    is_async = False
+    difficulty = 0
+
+    def mine(self, block_prefix, encode_nonce=lambda nonce: str(nonce).encode()):
+        return 0, hashlib.sha256(block_prefix + encode_nonce(0)).hexdigest(), 1
+
+class FixedDifficultyProofOfWork:
+    """Search for a nonce whose block hash starts with `difficulty` zeros"""
+
+    name = 'fixed'
+    is_async = False
+
+    def __init__(self, difficulty=1, max_nonce=1000000):
+        self.difficulty = difficulty
+        self.max_nonce = max_nonce
+
+    def mine(self, block_prefix, encode_nonce=lambda nonce: str(nonce).encode()):
+        target = '0' * self.difficulty
+        # Hash the constant header prefix once and only feed the nonce per attempt
+        prefix_hasher = hashlib.sha256(block_prefix)
+        nonce = 0
+
+        while True:
+            hasher = prefix_hasher.copy()
+            hasher.update(encode_nonce(nonce))
+            block_hash = hasher.hexdigest()
+
+            if block_hash.startswith(target):
+                break
+
+            if nonce >= self.max_nonce:
+                logger.warning("Mining difficulty too high, accepting current hash")
+                break
+            nonce += 1
+
+        return nonce, block_hash, nonce + 1
+
+class BackgroundSealer(FixedDifficultyProofOfWork):
+    """Record transactions as pending and mine them on the ledger writer thread"""
+
+    name = 'background'
+    is_async = True
+
+def get_sealing_strategy(name, difficulty=1, max_nonce=1000000):
+    if name == 'none':
+        return NoProofOfWork()
+    if name == 'fixed':
+        return FixedDifficultyProofOfWork(difficulty, max_nonce)
+    if name == 'background':
+        return BackgroundSealer(difficulty, max_nonce)
+    raise ValueError(f"Unknown sealing strategy {name}")
+
+class SealingMetrics:
+    """Thread-safe counters for the cost of sealing blocks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.blocks_sealed = 0
+        self.transactions_sealed = 0
+        self.hash_attempts = 0
+        self.total_seal_seconds = 0.0
+        self.last_seal_seconds = 0.0
+        self.max_seal_seconds = 0.0
+
+    def record(self, transaction_count, hash_attempts, seal_seconds):
+        with self._lock:
+            self.blocks_sealed += 1
+            self.transactions_sealed += transaction_count
+            self.hash_attempts += hash_attempts
+            self.total_seal_seconds += seal_seconds
+            self.last_seal_seconds = seal_seconds
+            self.max_seal_seconds = max(self.max_seal_seconds, seal_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            blocks = self.blocks_sealed
+            return {
+                'blocks_sealed': blocks,
+                'transactions_sealed': self.transactions_sealed,
+                'hash_attempts': self.hash_attempts,
+                'avg_hash_attempts': self.hash_attempts / blocks if blocks else 0,
+                'total_seal_seconds': self.total_seal_seconds,
+                'avg_seal_ms': self.total_seal_seconds / blocks * 1000 if blocks else 0,
+                'last_seal_ms': self.last_seal_seconds * 1000,
+                'max_seal_ms': self.max_seal_seconds * 1000
+            }
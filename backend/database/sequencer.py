@@ -0,0 +1,73 @@
+import threading
+from sqlalchemy import text
+from backend.database.models import db, BlockchainLedger
+import logging
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = '0' * 64
+
+class LedgerSequencer:
+    """Hands out block numbers and previous hashes from a cached chain tip
+
+    Appends are serialized by a PostgreSQL advisory lock held for the
+    sealing transaction. The cached tip is checked with a primary key
+    probe for the next block number, which only misses when another
+    process has appended since, instead of an ORDER BY ... LIMIT 1 tip
+    query per append. On databases without advisory locks the unique
+    block_number still rejects a racing insert, and the caller retries
+    after reset().
+    """
+
+    def __init__(self, lock_key):
+        self.lock_key = lock_key
+        self._tip = None
+        self._lock = threading.Lock()
+
+    def _acquire_database_lock(self):
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(
+                text('SELECT pg_advisory_xact_lock(:key)'),
+                {'key': self.lock_key}
+            )
+
+    def _load_tip(self):
+        tip = db.session.query(
+            BlockchainLedger.block_number,
+            BlockchainLedger.block_hash
+        ).order_by(BlockchainLedger.block_number.desc()).first()
+
+        return (tip.block_number, tip.block_hash) if tip else (0, GENESIS_HASH)
+
+    def reserve(self):
+        """Lock the chain tip for this transaction and return (block_number, previous_hash)"""
+        self._acquire_database_lock()
+
+        with self._lock:
+            if self._tip is not None:
+                tip_number, _ = self._tip
+                appended_elsewhere = db.session.query(BlockchainLedger.block_number).filter(
+                    BlockchainLedger.block_number == tip_number + 1
+                ).first()
+                if appended_elsewhere:
+                    self._tip = None
+
+            if self._tip is None:
+                self._tip = self._load_tip()
+
+            tip_number, tip_hash = self._tip
+
+        return tip_number + 1, tip_hash
+
+    def lock(self):
+        """Hold the append lock until the current transaction ends, without reserving a block"""
+        self._acquire_database_lock()
+
+    def advance(self, block_number, block_hash):
+        """Move the cached tip after a block commits"""
+        with self._lock:
+            self._tip = (block_number, block_hash)
+
+    def reset(self):
+        with self._lock:
+            self._tip = None
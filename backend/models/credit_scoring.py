@@ -1,80 +1,125 @@
 import os
 import pickle
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 import xgboost as xgb
 import lightgbm as lgb
 import logging
+from backend.models.tree_compiler import CompiledEnsemble, compile_model
+from backend.models.training_data import FEATURE_NAMES
+from backend.models.prediction_cache import PredictionCache
 from config.settings import Config
 
 logger = logging.getLogger(__name__)
 
+_ensemble_executor = None
+_ensemble_executor_lock = threading.Lock()
+
+def get_ensemble_executor():
+    """Shared thread pool for ensemble scoring, created on first use
+
+    Created lazily so a preloading gunicorn master never starts threads
+    before it forks.
+    """
+    global _ensemble_executor
+    with _ensemble_executor_lock:
+        if _ensemble_executor is None:
+            _ensemble_executor = ThreadPoolExecutor(
+                max_workers=Config.ENSEMBLE_WORKERS,
+                thread_name_prefix='ensemble'
+            )
+        return _ensemble_executor
+
 class CreditScoringModel:
     
+    MODEL_NAMES = ['random_forest', 'xgboost', 'lightgbm', 'gradient_boosting']
+    
     def __init__(self):
         self.model_path = Config.MODEL_PATH
         self.models = {}
+        self.compiled = {}
         self.scaler = StandardScaler()
-        self.feature_names = [
-            'loan_amount', 'loan_term_months', 'debt_to_income_ratio', 
-            'credit_score', 'annual_revenue', 'years_in_business', 
-            'existing_debt', 'carbon_reduction_target_pct', 
-            'renewable_energy_pct', 'environmental_certifications',
-            'social_impact_score', 'governance_score'
-        ]
+        self.prediction_cache = PredictionCache()
+        self.attribution_cache = PredictionCache(
+            Config.ATTRIBUTION_CACHE_MAX_ENTRIES, Config.ATTRIBUTION_CACHE_TTL_SECONDS
+        )
+        self.version = uuid.uuid4().hex
+        self.feature_names = list(FEATURE_NAMES)
     
-    def train_models(self, X_train, y_train):
-        """Train multiple ML models"""
-        try:
-            logger.info("Training credit scoring models")
-            
-            # Random Forest
-            rf_model = RandomForestClassifier(
+    def invalidate_predictions(self):
+        """Start a new model version after the artifacts change and drop cached results"""
+        self.version = uuid.uuid4().hex
+        self.prediction_cache.invalidate()
+        self.attribution_cache.invalidate()
+    
+    def build_estimator(self, name, n_jobs=None, early_stopping_rounds=None):
+        """Create an untrained classifier with the production hyperparameters
+        
+        n_jobs caps the threads a model may use; early_stopping_rounds only
+        applies to the boosted models.
+        """
+        if name == 'random_forest':
+            return RandomForestClassifier(
                 n_estimators=100, 
                 random_state=42, 
-                n_jobs=-1,
+                n_jobs=n_jobs or -1,
                 max_depth=10,
                 min_samples_split=10
             )
-            rf_model.fit(X_train, y_train)
-            self.models['random_forest'] = rf_model
-            
-            # XGBoost
-            xgb_model = xgb.XGBClassifier(
+        
+        if name == 'xgboost':
+            return xgb.XGBClassifier(
                 n_estimators=100,
                 random_state=42,
                 eval_metric='logloss',
                 max_depth=6,
-                learning_rate=0.1
+                learning_rate=0.1,
+                n_jobs=n_jobs,
+                early_stopping_rounds=early_stopping_rounds
             )
-            xgb_model.fit(X_train, y_train)
-            self.models['xgboost'] = xgb_model
-            
-            # LightGBM
-            lgb_model = lgb.LGBMClassifier(
+        
+        if name == 'lightgbm':
+            return lgb.LGBMClassifier(
                 n_estimators=100,
                 random_state=42,
                 verbose=-1,
                 max_depth=6,
-                learning_rate=0.1
+                learning_rate=0.1,
+                n_jobs=n_jobs
             )
-            lgb_model.fit(X_train, y_train)
-            self.models['lightgbm'] = lgb_model
-            
-            # Gradient Boosting
-            gb_model = GradientBoostingClassifier(
+        
+        if name == 'gradient_boosting':
+            # sklearn holds out its own validation_fraction when n_iter_no_change is set
+            return GradientBoostingClassifier(
                 n_estimators=100,
                 random_state=42,
                 max_depth=6,
-                learning_rate=0.1
+                learning_rate=0.1,
+                n_iter_no_change=early_stopping_rounds
             )
-            gb_model.fit(X_train, y_train)
-            self.models['gradient_boosting'] = gb_model
+        
+        raise ValueError(f"Unknown model {name}")
+    
+    def train_models(self, X_train, y_train):
+        """Train multiple ML models"""
+        try:
+            logger.info("Training credit scoring models")
+            
+            for name in self.MODEL_NAMES:
+                model = self.build_estimator(name)
+                model.fit(X_train, y_train)
+                self.models[name] = model
             
             # Fit scaler
             self.scaler.fit(X_train)
             
+            self.compile_models()
+            
             logger.info("All models trained successfully")
             
         except Exception as e:
@@ -82,26 +127,261 @@ class CreditScoringModel:
             raise
     
     def predict(self, features, model_name='xgboost'):
-        """Make prediction using specified model"""
+        """Make prediction using specified model
+        
+        Single rows go through the compiled node arrays when available,
+        which skips the per-call overhead of the native predict_proba.
+        Repeated feature rows are answered from the prediction cache.
+        """
         try:
-            if model_name not in self.models:
-                raise ValueError(f"Model {model_name} not found")
+            cache_key = None
+            if self.prediction_cache.enabled:
+                cache_key = self.prediction_cache.key(self.version, model_name, features)
+                cached = self.prediction_cache.get(cache_key)
+                if cached is not None:
+                    return dict(cached)
             
-            model = self.models[model_name]
-            prediction = model.predict([features])[0]
-            probability = model.predict_proba([features])[0]
+            if model_name in self.compiled:
+                probability = self.compiled[model_name].predict_proba(features)[0]
+                prediction = self.models[model_name].classes_[int(probability[1] > probability[0])]
+            else:
+                result = self.predict_batch([features], model_name)
+                prediction = result['predictions'][0]
+                probability = (result['probability_rejected'][0], result['probability_approved'][0])
             
-            return {
+            result = {
                 'prediction': int(prediction),
                 'probability_approved': float(probability[1]),
                 'probability_rejected': float(probability[0]),
                 'model_used': model_name
             }
             
+            if cache_key is not None:
+                self.prediction_cache.put(cache_key, result)
+            
+            return dict(result)
+            
         except Exception as e:
             logger.error(f"Error making prediction: {str(e)}")
             raise
     
+    def to_feature_matrix(self, features):
+        """Coerce a DataFrame or array-like into a 2-D float matrix"""
+        if isinstance(features, pd.DataFrame):
+            features = features[self.feature_names].to_numpy(dtype=float)
+        else:
+            features = np.asarray(features, dtype=float)
+        
+        if features.ndim != 2 or features.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected rows of {len(self.feature_names)} features, got shape {features.shape}"
+            )
+        
+        return features
+    
+    def predict_batch(self, features, model_name='xgboost', cached=False):
+        """Score a 2-D array or DataFrame with a single predict_proba call
+        
+        Labels are the most probable class, which is what the classifiers'
+        own predict returns, so inference only runs once per batch. With
+        cached=True each row is looked up in the prediction cache shared
+        with predict, and only the misses are scored.
+        """
+        try:
+            if model_name not in self.models:
+                raise ValueError(f"Model {model_name} not found")
+            
+            features = self.to_feature_matrix(features)
+            model = self.models[model_name]
+            if cached and self.prediction_cache.enabled:
+                probabilities = self.predict_proba_cached(features, model_name)
+            else:
+                probabilities = model.predict_proba(features)
+            predictions = model.classes_[probabilities.argmax(axis=1)]
+            
+            return {
+                'predictions': predictions.astype(int),
+                'probability_approved': probabilities[:, 1],
+                'probability_rejected': probabilities[:, 0],
+                'model_used': model_name
+            }
+            
+        except Exception as e:
+            logger.error(f"Error making batch prediction: {str(e)}")
+            raise
+    
+    def predict_proba_cached(self, features, model_name):
+        """Class probabilities per row, scoring only rows missing from the prediction cache"""
+        keys = [(self.version, model_name, row_hash) for row_hash in self.prediction_cache.feature_hashes(features)]
+        probabilities = np.empty((len(features), 2))
+        pending = []
+        for row, key in enumerate(keys):
+            cached = self.prediction_cache.get(key)
+            if cached is None:
+                pending.append(row)
+            else:
+                probabilities[row] = (cached['probability_rejected'], cached['probability_approved'])
+        
+        if pending:
+            model = self.models[model_name]
+            probabilities[pending] = model.predict_proba(features[pending])
+            for row in pending:
+                self.prediction_cache.put(keys[row], {
+                    'prediction': int(model.classes_[probabilities[row].argmax()]),
+                    'probability_approved': float(probabilities[row, 1]),
+                    'probability_rejected': float(probabilities[row, 0]),
+                    'model_used': model_name
+                })
+        
+        return probabilities
+    
+    def predict_ensemble(self, features, weights=None):
+        """Score a batch with every model concurrently and blend the results
+        
+        The libraries release the GIL inside predict_proba, so the models
+        run side by side and the ensemble costs about one model's wall time.
+        """
+        try:
+            weights = weights or Config.ENSEMBLE_WEIGHTS
+            model_names = [
+                name for name, weight in weights.items()
+                if weight > 0 and name in self.models
+            ]
+            if not model_names:
+                raise ValueError("No ensemble models loaded")
+            
+            features = self.to_feature_matrix(features)
+            executor = get_ensemble_executor()
+            futures = {
+                name: executor.submit(self.models[name].predict_proba, features)
+                for name in model_names
+            }
+            probabilities = {name: future.result()[:, 1] for name, future in futures.items()}
+            
+            total_weight = sum(weights[name] for name in model_names)
+            normalized_weights = {name: weights[name] / total_weight for name in model_names}
+            consensus = sum(
+                normalized_weights[name] * probabilities[name] for name in model_names
+            )
+            
+            return {
+                'predictions': (consensus > 0.5).astype(int),
+                'probability_approved': consensus,
+                'probability_rejected': 1.0 - consensus,
+                'model_probabilities': probabilities,
+                'weights': normalized_weights,
+                'model_used': 'ensemble'
+            }
+            
+        except Exception as e:
+            logger.error(f"Error making ensemble prediction: {str(e)}")
+            raise
+    
+    def compile_models(self, model_names=None):
+        """Flatten trained models, all by default, into NumPy node arrays"""
+        for name in model_names or list(self.models):
+            try:
+                self.compiled[name] = compile_model(self.models[name])
+            except Exception as e:
+                self.compiled.pop(name, None)
+                logger.warning(f"Model {name} not compiled, using native scoring: {str(e)}")
+        
+        # Every training path compiles what it fit, so this covers retrains too
+        self.invalidate_predictions()
+    
+    def check_compiled_parity(self, model_name, X, tolerance=None):
+        """Raise ValueError if the compiled model's probabilities differ from the native model's on X"""
+        if model_name not in self.compiled:
+            return None
+        
+        tolerance = Config.COMPILED_PARITY_TOLERANCE if tolerance is None else tolerance
+        X = np.asarray(X, dtype=np.float64)
+        native = self.models[model_name].predict_proba(X)[:, 1]
+        compiled = self.compiled[model_name].predict_proba(X)[:, 1]
+        max_difference = float(np.abs(native - compiled).max()) if len(X) else 0.0
+        
+        if max_difference > tolerance:
+            raise ValueError(
+                f"Compiled {model_name} disagrees with the native model by up to {max_difference:.2e}"
+            )
+        return max_difference
+    
+    def explainer(self, model_name):
+        """Compiled ensemble with node values, recompiling arrays saved before attributions existed"""
+        compiled = self.compiled.get(model_name)
+        if compiled is None or compiled.node_value is None:
+            compiled = compile_model(self.models[model_name])
+            self.compiled[model_name] = compiled
+        return compiled
+    
+    def explain_batch(self, features, model_name='xgboost', loan_ids=None, top_k=3):
+        """Per-row reason codes from path-based tree attributions
+        
+        Fresh rows are attributed together in one vectorized pass. Rows with
+        a loan_id are cached by model version, loan and feature hash, so a
+        loan is recomputed only when its features or the model change.
+        Contributions are in log-odds for the boosted models and in
+        probability for the random forest.
+        """
+        try:
+            if model_name not in self.models:
+                raise ValueError(f"Model {model_name} not found")
+            if len(features) == 0:
+                return []
+            
+            features = self.to_feature_matrix(features)
+            loan_ids = list(loan_ids) if loan_ids is not None else [None] * len(features)
+            compiled = self.explainer(model_name)
+            
+            contributions = np.empty(features.shape)
+            bias = None
+            keys = [None] * len(features)
+            pending = []
+            for row, loan_id in enumerate(loan_ids):
+                if loan_id is not None and self.attribution_cache.enabled:
+                    keys[row] = (self.version, model_name, loan_id, self.attribution_cache.feature_hash(features[row]))
+                    cached = self.attribution_cache.get(keys[row])
+                    if cached is not None:
+                        contributions[row], bias = cached
+                        continue
+                pending.append(row)
+            
+            if pending:
+                contributions[pending], bias = compiled.contributions(features[pending])
+                for row in pending:
+                    if keys[row] is not None:
+                        self.attribution_cache.put(keys[row], (contributions[row].copy(), bias))
+            
+            totals = bias + contributions.sum(axis=1)
+            if compiled.link == 'mean':
+                probabilities = totals
+            else:
+                probabilities = np.exp(-np.logaddexp(0.0, -totals))
+            
+            top = np.argsort(-np.abs(contributions), axis=1)[:, :top_k]
+            return [
+                {
+                    'loan_id': loan_ids[row],
+                    'probability_approved': float(probabilities[row]),
+                    'base_value': bias,
+                    'units': 'probability' if compiled.link == 'mean' else 'log_odds',
+                    'reasons': [
+                        {
+                            'feature': self.feature_names[column],
+                            'value': float(features[row, column]),
+                            'contribution': float(contributions[row, column]),
+                            'effect': 'raises approval' if contributions[row, column] > 0 else 'lowers approval'
+                        }
+                        for column in top[row]
+                    ]
+                }
+                for row in range(len(features))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error explaining predictions: {str(e)}")
+            raise
+    
     def get_feature_importance(self, model_name='xgboost'):
         """Get feature importance from model"""
         try:
@@ -130,14 +410,10 @@ class CreditScoringModel:
         try:
             os.makedirs(self.model_path, exist_ok=True)
             
-            for name, model in self.models.items():
-                filepath = os.path.join(self.model_path, f'{name}_model.pkl')
-                with open(filepath, 'wb') as f:
-                    pickle.dump(model, f)
+            for name in self.models:
+                self.save_model(name)
             
-            scaler_path = os.path.join(self.model_path, 'scaler.pkl')
-            with open(scaler_path, 'wb') as f:
-                pickle.dump(self.scaler, f)
+            self.save_scaler()
             
             logger.info(f"Models saved to {self.model_path}")
             
@@ -145,21 +421,58 @@ class CreditScoringModel:
             logger.error(f"Error saving models: {str(e)}")
             raise
     
+    def save_model(self, name):
+        """Write one model and its node arrays, replacing any previous file atomically"""
+        os.makedirs(self.model_path, exist_ok=True)
+        
+        filepath = os.path.join(self.model_path, f'{name}_model.pkl')
+        with open(filepath + '.tmp', 'wb') as f:
+            pickle.dump(self.models[name], f)
+        os.replace(filepath + '.tmp', filepath)
+        
+        if name in self.compiled:
+            self.compiled[name].save(os.path.join(self.model_path, 'compiled', name))
+    
+    def save_scaler(self):
+        os.makedirs(self.model_path, exist_ok=True)
+        
+        scaler_path = os.path.join(self.model_path, 'scaler.pkl')
+        with open(scaler_path + '.tmp', 'wb') as f:
+            pickle.dump(self.scaler, f)
+        os.replace(scaler_path + '.tmp', scaler_path)
+    
+    def load_compiled(self, name, model_file):
+        """Memory-map saved node arrays, recompiling if they predate the model or the compiler"""
+        directory = os.path.join(self.model_path, 'compiled', name)
+        marker = os.path.join(directory, 'ensemble.json')
+        
+        try:
+            if (os.path.exists(marker) and os.path.getmtime(marker) >= os.path.getmtime(model_file)
+                    and CompiledEnsemble.saved_version(directory) >= CompiledEnsemble.FORMAT_VERSION):
+                self.compiled[name] = CompiledEnsemble.load(directory)
+            else:
+                self.compiled[name] = compile_model(self.models[name])
+        except Exception as e:
+            self.compiled.pop(name, None)
+            logger.warning(f"Model {name} not compiled, using native scoring: {str(e)}")
+    
+    def load_model(self, name):
+        """Load one saved model; returns False when it has not been saved"""
+        filepath = os.path.join(self.model_path, f'{name}_model.pkl')
+        if not os.path.exists(filepath):
+            return False
+        
+        with open(filepath, 'rb') as f:
+            self.models[name] = pickle.load(f)
+        self.load_compiled(name, filepath)
+        self.invalidate_predictions()
+        return True
+    
     def load_models(self):
         """Load trained models from disk"""
         try:
-            model_files = {
-                'random_forest': 'random_forest_model.pkl',
-                'xgboost': 'xgboost_model.pkl',
-                'lightgbm': 'lightgbm_model.pkl',
-                'gradient_boosting': 'gradient_boosting_model.pkl'
-            }
-            
-            for name, filename in model_files.items():
-                filepath = os.path.join(self.model_path, filename)
-                if os.path.exists(filepath):
-                    with open(filepath, 'rb') as f:
-                        self.models[name] = pickle.load(f)
+            for name in self.MODEL_NAMES:
+                self.load_model(name)
             
             scaler_path = os.path.join(self.model_path, 'scaler.pkl')
             if os.path.exists(scaler_path):
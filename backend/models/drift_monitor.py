@@ -0,0 +1,406 @@
+import os
+import glob
+import time
+import socket
+import threading
+from datetime import datetime
+import numpy as np
+from backend.models.training_data import FEATURE_NAMES
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FILE = 'drift_baseline.npz'
+PSI_SMOOTHING = 1e-4
+
+def baseline_path(model_path=None):
+    return os.path.join(model_path or Config.MODEL_PATH, BASELINE_FILE)
+
+def find_baseline_path(model_path=None):
+    """The baseline saved with a model version, else the one next to the unversioned models"""
+    path = baseline_path(model_path)
+    return path if os.path.exists(path) else baseline_path()
+
+def bin_indices(edges, X):
+    """Bin of each value against per-feature interior edges; edges is (features, bins - 1)
+
+    Bins are closed on the left, and the first and last bins are open-ended,
+    so out-of-range values land in the end bins instead of being lost.
+    """
+    return (X[..., None] >= edges).sum(axis=-1)
+
+def build_baseline(X, bins=None, feature_names=None):
+    """Per-feature histograms of the training matrix over its own quantile edges"""
+    bins = bins or Config.DRIFT_SKETCH_BINS
+    X = np.asarray(X, dtype=np.float64)
+    edges = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T.copy()
+
+    counts = np.zeros((X.shape[1], bins), dtype=np.int64)
+    for column in range(X.shape[1]):
+        values = X[:, column]
+        values = values[~np.isnan(values)]
+        counts[column] = np.bincount(bin_indices(edges[column], values), minlength=bins)
+
+    return {
+        'feature_names': np.array(feature_names or FEATURE_NAMES),
+        'edges': edges,
+        'counts': counts,
+        'sums': np.nansum(X, axis=0),
+        'rows': np.int64(len(X)),
+        'created_at': np.array(datetime.utcnow().isoformat())
+    }
+
+def load_baseline(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def extend_baseline(baseline, X):
+    """Add training rows to a baseline over its existing edges, for models extended with new data"""
+    X = np.asarray(X, dtype=np.float64)
+    counts = baseline['counts'].copy()
+    for column in range(X.shape[1]):
+        values = X[:, column]
+        values = values[~np.isnan(values)]
+        counts[column] += np.bincount(bin_indices(baseline['edges'][column], values), minlength=counts.shape[1])
+
+    return {
+        **baseline,
+        'counts': counts,
+        'sums': baseline['sums'] + np.nansum(X, axis=0),
+        'rows': np.int64(int(baseline['rows']) + len(X)),
+        'created_at': np.array(datetime.utcnow().isoformat())
+    }
+
+def write_baseline(baseline, model_path=None):
+    path = baseline_path(model_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, **baseline)
+    os.replace(path + '.tmp', path)
+    logger.info(f"Saved drift baseline of {int(baseline['rows'])} training rows to {path}")
+    return path
+
+def save_baseline(X, model_path=None, bins=None):
+    """Write the drift baseline for a training matrix next to the models"""
+    return write_baseline(build_baseline(X, bins), model_path)
+
+class DriftMonitor:
+    """Compare incoming applications with the training data in constant memory
+
+    Every application adds one count per feature to a histogram over the
+    baseline's quantile edges; no raw values are kept. The histograms cover
+    a rotating window: once the current window holds window_size
+    applications it replaces the previous one and a fresh window starts, so
+    each worker counts its last window_size to 2 * window_size applications.
+
+    Every flush_seconds a background thread writes the worker's windows to
+    a file under state_path, and a report sums the files of every worker
+    written within DRIFT_STATE_TTL_SECONDS against the same baseline. The
+    same thread loads the baseline of the model version being served and
+    reloads it when its file changes, so update() never touches the disk.
+    PSI (over deciles merged from the sketch bins) and binned KS are
+    computed only when a report is requested.
+    """
+
+    def __init__(self, model_path=None, window_size=None, psi_bins=None, state_path=None, flush_seconds=None):
+        self.model_path = model_path
+        self.path = None
+        self.window_size = window_size or Config.DRIFT_WINDOW_SIZE
+        self.psi_bins = psi_bins or Config.DRIFT_PSI_BINS
+        self.state_path = state_path or Config.DRIFT_STATE_PATH
+        self.flush_seconds = Config.DRIFT_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self.baseline = None
+        self._baseline_mtime = None
+        self.observed = 0
+        self.unmonitored = 0
+        self.failed = 0
+
+    def use_model_path(self, model_path):
+        """Follow the baseline of another model version; windows restart when it differs"""
+        with self._lock:
+            self.model_path = model_path
+            if self.baseline is not None and find_baseline_path(model_path) != self.path:
+                self.baseline = None
+        self._wake.set()
+
+    def load(self):
+        """Load the baseline if it exists; returns whether one is loaded"""
+        with self._lock:
+            if self.baseline is not None:
+                return True
+
+            path = find_baseline_path(self.model_path)
+            if not os.path.exists(path):
+                return False
+
+            baseline = load_baseline(path)
+            if list(baseline['feature_names']) != FEATURE_NAMES:
+                logger.error(f"Drift baseline {path} was built for other features; ignoring it")
+                return False
+
+            self.path = path
+            self._baseline_mtime = os.path.getmtime(path)
+            # Windows first: update() reads them without the lock once baseline is set
+            self._offsets = np.arange(len(FEATURE_NAMES)) * baseline['counts'].shape[1]
+            self._current = self._empty_window(baseline)
+            self._previous = self._empty_window(baseline)
+            self.baseline = baseline
+            logger.info(f"Loaded drift baseline of {int(baseline['rows'])} rows from {path}")
+            return True
+
+    def _empty_window(self, baseline=None):
+        n_features, bins = (self.baseline if baseline is None else baseline)['counts'].shape
+        return {
+            'counts': np.zeros(n_features * bins, dtype=np.int64),
+            'missing': np.zeros(n_features, dtype=np.int64),
+            'sums': np.zeros(n_features),
+            'rows': 0
+        }
+
+    def update(self, loan_data):
+        """Count one application's features in memory; never raises into the caller
+
+        Until the background thread has loaded a baseline the application
+        is only counted as unmonitored.
+        """
+        self._ensure_started()
+        try:
+            baseline = self.baseline
+            if baseline is None:
+                self.unmonitored += 1
+                return
+
+            row = np.array([loan_data.get(name) for name in FEATURE_NAMES], dtype=np.float64)
+            missing = np.isnan(row)
+            flat = self._offsets + bin_indices(baseline['edges'], row)
+
+            with self._lock:
+                window = self._current
+                if missing.any():
+                    window['counts'][flat[~missing]] += 1
+                    window['missing'][missing] += 1
+                    window['sums'][~missing] += row[~missing]
+                else:
+                    window['counts'][flat] += 1
+                    window['sums'] += row
+                window['rows'] += 1
+                self.observed += 1
+                self._rotate()
+
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error updating drift monitor: {str(e)}")
+
+    def update_batch(self, X):
+        """Count a matrix of applications in FEATURE_NAMES column order
+
+        A batch may load a missing baseline itself; one file read is small
+        next to binning the rows.
+        """
+        self._ensure_started()
+        try:
+            if self.baseline is None and not self.load():
+                self.unmonitored += len(X)
+                return
+
+            X = np.asarray(X, dtype=np.float64)
+            for start in range(0, len(X), self.window_size):
+                chunk = X[start:start + self.window_size]
+                present = ~np.isnan(chunk)
+                flat = np.broadcast_to(self._offsets, chunk.shape)[present] + \
+                    bin_indices(self.baseline['edges'], np.nan_to_num(chunk))[present]
+                counts = np.bincount(flat, minlength=self.baseline['counts'].size)
+
+                with self._lock:
+                    window = self._current
+                    window['counts'] += counts
+                    window['missing'] += (~present).sum(axis=0)
+                    window['sums'] += np.where(present, chunk, 0.0).sum(axis=0)
+                    window['rows'] += len(chunk)
+                    self.observed += len(chunk)
+                    self._rotate()
+
+        except Exception as e:
+            self.failed += len(X)
+            logger.error(f"Error updating drift monitor: {str(e)}")
+
+    def _rotate(self):
+        if self._current['rows'] >= self.window_size:
+            self._previous = self._current
+            self._current = self._empty_window()
+
+    def reset(self):
+        with self._lock:
+            if self.baseline is not None:
+                self._current = self._empty_window()
+                self._previous = self._empty_window()
+
+    def _ensure_started(self):
+        """Start this process's publishing thread on first use, and again after a fork"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.publish()
+            self._wake.wait(max(self.flush_seconds, 1))
+            self._wake.clear()
+
+    def publish(self):
+        """Load or reload the baseline if it is missing or its file changed, then flush this worker's windows"""
+        with self._publish_lock:
+            self._publish()
+
+    def _publish(self):
+        try:
+            if self.path is not None and self.baseline is not None and os.path.exists(self.path) and \
+                    os.path.getmtime(self.path) != self._baseline_mtime:
+                with self._lock:
+                    self.baseline = None
+                logger.info(f"Drift baseline {self.path} changed, reloading")
+            if self.baseline is None:
+                self.load()
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error publishing drift monitor state: {str(e)}")
+
+    def worker_state_path(self):
+        return os.path.join(self.state_path, f"{socket.gethostname()}-{os.getpid()}.npz")
+
+    def flush(self):
+        """Write this worker's windows and counters where every worker's report can read them"""
+        with self._lock:
+            state = {
+                'observed': np.int64(self.observed),
+                'unmonitored': np.int64(self.unmonitored),
+                'failed': np.int64(self.failed),
+                'baseline_created_at': np.array(str(self.baseline['created_at']) if self.baseline is not None else '')
+            }
+            if self.baseline is not None:
+                state.update({
+                    'counts': self._current['counts'] + self._previous['counts'],
+                    'missing': self._current['missing'] + self._previous['missing'],
+                    'sums': self._current['sums'] + self._previous['sums'],
+                    'rows': np.int64(self._current['rows'] + self._previous['rows'])
+                })
+
+        path = self.worker_state_path()
+        os.makedirs(self.state_path, exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **state)
+        os.replace(path + '.tmp', path)
+
+    def load_worker_states(self):
+        """States every worker flushed within DRIFT_STATE_TTL_SECONDS"""
+        cutoff = time.time() - Config.DRIFT_STATE_TTL_SECONDS
+        states = []
+        for path in glob.glob(os.path.join(self.state_path, '*.npz')):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    continue
+                with np.load(path) as data:
+                    states.append({name: data[name] for name in data.files})
+            except (OSError, ValueError) as e:
+                # A worker may replace its file between the listing and the read
+                logger.warning(f"Skipping drift state {path}: {str(e)}")
+        return states
+
+    def report(self):
+        """PSI, KS and mean shift of each feature in every worker's recent windows against the baseline"""
+        if self.baseline is None and not self.load():
+            return {
+                'baseline': None,
+                'observed': self.observed,
+                'unmonitored': self.unmonitored,
+                'failed': self.failed
+            }
+
+        self.publish()
+
+        baseline_id = str(self.baseline['created_at'])
+        n_features, bins = self.baseline['counts'].shape
+        counts = np.zeros(n_features * bins, dtype=np.int64)
+        missing = np.zeros(n_features, dtype=np.int64)
+        sums = np.zeros(n_features)
+        rows = 0
+        totals = {'observed': 0, 'unmonitored': 0, 'failed': 0}
+        workers = 0
+        workers_other_baseline = 0
+
+        for state in self.load_worker_states():
+            for name in totals:
+                totals[name] += int(state[name])
+            if str(state['baseline_created_at']) != baseline_id or 'counts' not in state:
+                workers_other_baseline += 1
+                continue
+            workers += 1
+            counts += state['counts']
+            missing += state['missing']
+            sums += state['sums']
+            rows += int(state['rows'])
+
+        baseline_counts = self.baseline['counts']
+        counts = counts.reshape(n_features, bins)
+        baseline_rows = int(self.baseline['rows'])
+        # Two-sample KS critical value coefficient; one test per feature, so alpha is kept small
+        ks_coefficient = np.sqrt(-np.log(Config.DRIFT_KS_ALPHA / 2) / 2)
+        groups = np.array_split(np.arange(bins), min(self.psi_bins, bins))
+
+        features = {}
+        for column, name in enumerate(FEATURE_NAMES):
+            n_expected = baseline_counts[column].sum()
+            n_actual = counts[column].sum()
+            entry = {
+                'observed': int(n_actual),
+                'missing': int(missing[column]),
+                'baseline_mean': float(self.baseline['sums'][column] / n_expected) if n_expected else None,
+                'mean': float(sums[column] / n_actual) if n_actual else None
+            }
+            if rows and n_expected:
+                # Merge the fine sketch bins into psi_bins groups of near-equal baseline mass,
+                # with missing values as one more group so a feature that stops arriving drifts too
+                expected = np.append([baseline_counts[column][group].sum() for group in groups],
+                                     baseline_rows - n_expected) / baseline_rows
+                actual = np.append([counts[column][group].sum() for group in groups],
+                                   missing[column]) / (n_actual + missing[column])
+                expected, actual = expected + PSI_SMOOTHING, actual + PSI_SMOOTHING
+                psi = float(((actual - expected) * np.log(actual / expected)).sum())
+                entry.update({
+                    'psi': psi,
+                    'psi_level': 'significant' if psi >= Config.DRIFT_PSI_ALERT else
+                                 'moderate' if psi >= Config.DRIFT_PSI_WARN else 'stable'
+                })
+
+            if n_actual and n_expected:
+                # KS over the sketch bin boundaries, a lower bound on the exact statistic
+                ks = float(np.abs(
+                    np.cumsum(counts[column]) / n_actual - np.cumsum(baseline_counts[column]) / n_expected
+                ).max())
+                critical = float(ks_coefficient * np.sqrt((n_actual + n_expected) / (n_actual * n_expected)))
+                entry.update({'ks': ks, 'ks_critical': critical, 'ks_drift': ks > critical})
+            features[name] = entry
+
+        drifted = [name for name, entry in features.items() if entry.get('psi_level') == 'significant' or entry.get('ks_drift')]
+        return {
+            'baseline': {'rows': int(self.baseline['rows']), 'created_at': baseline_id, 'path': self.path},
+            'window_size': self.window_size,
+            'workers': workers,
+            'workers_other_baseline': workers_other_baseline,
+            'rows': rows,
+            **totals,
+            'drifted_features': drifted,
+            'features': features
+        }
+
+drift_monitor = DriftMonitor()
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+import platform
+import numpy as np
+import sklearn
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.metrics import roc_auc_score, log_loss, brier_score_loss
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPORT_DIRECTORY = 'evaluation'
+REPORT_PREFIX = 'evaluation_v'
+
+# Metrics where a higher value is better; the rest are errors or latencies
+HIGHER_IS_BETTER = {'auc', 'accuracy', 'rows_per_sec'}
+# Relative change tolerated before a metric counts as regressed; timings are noisy
+REGRESSION_TOLERANCE = {'rows_per_sec': 0.25, 'p99_us': 0.25}
+DEFAULT_REGRESSION_TOLERANCE = 0.001
+
+class ModelEvaluator:
+    """Score the whole test split per model and keep a versioned report
+
+    Quality metrics and throughput come from one predict_batch call per
+    model. Latency percentiles time single-row predict calls on a sample,
+    which is the path an individual loan application takes.
+    """
+
+    def __init__(self, model, latency_rows=None, calibration_bins=None):
+        self.model = model
+        self.latency_rows = latency_rows or Config.EVALUATION_LATENCY_ROWS
+        self.calibration_bins = calibration_bins or Config.EVALUATION_CALIBRATION_BINS
+
+    @property
+    def report_directory(self):
+        return os.path.join(self.model.model_path, REPORT_DIRECTORY)
+
+    def calibration(self, y_true, probabilities):
+        """Reliability table over equal-width probability bins plus the expected calibration error"""
+        edges = np.linspace(0.0, 1.0, self.calibration_bins + 1)
+        bins = np.clip(np.digitize(probabilities, edges[1:-1]), 0, self.calibration_bins - 1)
+
+        counts = np.bincount(bins, minlength=self.calibration_bins)
+        predicted = np.bincount(bins, weights=probabilities, minlength=self.calibration_bins)
+        observed = np.bincount(bins, weights=y_true, minlength=self.calibration_bins)
+
+        filled = counts > 0
+        mean_predicted = np.divide(predicted, counts, out=np.zeros_like(predicted), where=filled)
+        observed_rate = np.divide(observed, counts, out=np.zeros_like(observed), where=filled)
+        expected_error = float(np.sum(counts * np.abs(mean_predicted - observed_rate)) / len(y_true))
+
+        return {
+            'expected_calibration_error': expected_error,
+            'bins': [
+                {
+                    'lower': float(edges[index]),
+                    'upper': float(edges[index + 1]),
+                    'count': int(counts[index]),
+                    'mean_predicted': float(mean_predicted[index]),
+                    'observed_rate': float(observed_rate[index])
+                }
+                for index in range(self.calibration_bins) if filled[index]
+            ]
+        }
+
+    def latency_percentiles(self, name, X):
+        """Per-row latency of the single-application path, in microseconds"""
+        rows = X[:self.latency_rows]
+        latencies = np.empty(len(rows))
+
+        for index, row in enumerate(rows):
+            start = time.perf_counter()
+            self.model.predict(row, name)
+            latencies[index] = time.perf_counter() - start
+
+        p50, p95, p99 = np.percentile(latencies * 1e6, [50, 95, 99])
+        return {
+            'rows': len(rows),
+            'p50_us': float(p50),
+            'p95_us': float(p95),
+            'p99_us': float(p99),
+            'max_us': float(latencies.max() * 1e6)
+        }
+
+    def evaluate_model(self, name, X, y):
+        start = time.perf_counter()
+        result = self.model.predict_batch(X, name)
+        seconds = time.perf_counter() - start
+
+        probabilities = np.asarray(result['probability_approved'], dtype=np.float64)
+        single_class = len(np.unique(y)) < 2
+
+        return {
+            'rows': len(X),
+            'auc': None if single_class else float(roc_auc_score(y, probabilities)),
+            'log_loss': float(log_loss(y, np.clip(probabilities, 1e-15, 1 - 1e-15), labels=[0, 1])),
+            'brier_score': float(brier_score_loss(y, probabilities)),
+            'accuracy': float(np.mean(result['predictions'] == y)),
+            'approval_rate': float(np.mean(result['predictions'])),
+            'batch_seconds': seconds,
+            'rows_per_sec': len(X) / seconds if seconds > 0 else None,
+            'calibration': self.calibration(y, probabilities),
+            'latency': self.latency_percentiles(name, X)
+        }
+
+    def model_digest(self, name):
+        """Short hash of the saved artifact, so a report names the exact model it measured"""
+        filepath = os.path.join(self.model.model_path, f'{name}_model.pkl')
+        if not os.path.exists(filepath):
+            return None
+
+        hasher = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()[:16]
+
+    def evaluate(self, X_test, y_test, model_names=None):
+        """Evaluate every loaded model on the full test split"""
+        X_test = self.model.to_feature_matrix(X_test)
+        y_test = np.asarray(y_test).astype(int)
+
+        report = {
+            'created_at': datetime.utcnow().isoformat(),
+            'test_rows': len(X_test),
+            'positive_rate': float(y_test.mean()) if len(y_test) else None,
+            # Timings only compare meaningfully on the same machine and libraries
+            'environment': {
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count(),
+                'numpy': np.__version__,
+                'sklearn': sklearn.__version__,
+                'xgboost': xgb.__version__,
+                'lightgbm': lgb.__version__
+            },
+            'models': {}
+        }
+
+        for name in model_names or self.model.MODEL_NAMES:
+            if name not in self.model.models:
+                logger.warning(f"Model {name} not loaded, skipping evaluation")
+                continue
+
+            try:
+                report['models'][name] = {
+                    'artifact': self.model_digest(name),
+                    'compiled': name in self.model.compiled,
+                    **self.evaluate_model(name, X_test, y_test)
+                }
+            except Exception as e:
+                logger.error(f"Error evaluating {name}: {str(e)}")
+                report['models'][name] = {'error': str(e)}
+
+        return report
+
+    def report_versions(self):
+        if not os.path.isdir(self.report_directory):
+            return []
+
+        versions = []
+        for filename in os.listdir(self.report_directory):
+            if filename.startswith(REPORT_PREFIX) and filename.endswith('.json'):
+                try:
+                    versions.append(int(filename[len(REPORT_PREFIX):-len('.json')]))
+                except ValueError:
+                    continue
+        return sorted(versions)
+
+    def report_path(self, version):
+        return os.path.join(self.report_directory, f'{REPORT_PREFIX}{version:04d}.json')
+
+    def load_report(self, version=None):
+        """Load a saved report, the latest by default; None when there is none"""
+        versions = self.report_versions()
+        if version is None:
+            if not versions:
+                return None
+            version = versions[-1]
+
+        with open(self.report_path(version)) as f:
+            return json.load(f)
+
+    def metric_delta(self, key, previous, current):
+        delta = current - previous
+        worsening = -delta if key in HIGHER_IS_BETTER else delta
+        tolerance = REGRESSION_TOLERANCE.get(key, DEFAULT_REGRESSION_TOLERANCE) * abs(previous)
+
+        return {
+            'previous': previous,
+            'current': current,
+            'delta': delta,
+            'regressed': worsening > tolerance
+        }
+
+    def compare(self, previous, current):
+        """Per-model metric deltas against an earlier report, flagging regressions"""
+        comparison = {}
+
+        for name, metrics in current['models'].items():
+            before = previous['models'].get(name)
+            if not before or 'error' in metrics or 'error' in before:
+                continue
+
+            deltas = {}
+            for key in ('auc', 'log_loss', 'brier_score', 'accuracy', 'rows_per_sec'):
+                if metrics.get(key) is None or before.get(key) is None:
+                    continue
+                deltas[key] = self.metric_delta(key, before[key], metrics[key])
+
+            deltas['p99_us'] = self.metric_delta('p99_us', before['latency']['p99_us'], metrics['latency']['p99_us'])
+            comparison[name] = deltas
+
+        return comparison
+
+    def write_report(self, report):
+        """Save the report as the next version and attach a comparison with the previous one"""
+        os.makedirs(self.report_directory, exist_ok=True)
+
+        versions = self.report_versions()
+        version = versions[-1] + 1 if versions else 1
+
+        if versions:
+            previous = self.load_report(versions[-1])
+            report['previous_version'] = versions[-1]
+            report['comparison'] = self.compare(previous, report)
+        report['version'] = version
+
+        path = self.report_path(version)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+        logger.info(f"Evaluation report v{version} written to {path}")
+        return path
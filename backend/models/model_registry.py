@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import shutil
+from datetime import datetime
+from backend.models.credit_scoring import CreditScoringModel
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIRECTORY = 'versions'
+VERSION_FILE = 'version.json'
+VERSION_PATTERN = re.compile(r'^v(\d{4,})$')
+# Pointer files, replaced atomically, that every worker polls
+ACTIVE_FILE = 'ACTIVE'
+SHADOW_FILE = 'SHADOW'
+
+class ModelRegistry:
+    """Numbered, immutable model versions under MODEL_PATH/versions
+
+    Each version directory holds a full set of artifacts (models, compiled
+    node arrays and scaler) plus a version.json describing how it was made.
+    The ACTIVE file names the version that serves traffic and the SHADOW
+    file names a candidate scored on sampled traffic; switching either is
+    one atomic file replace that running workers pick up on their next poll.
+    """
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or Config.MODEL_PATH
+
+    @property
+    def versions_directory(self):
+        return os.path.join(self.model_path, VERSIONS_DIRECTORY)
+
+    def version_name(self, number):
+        return f'v{number:04d}'
+
+    def version_path(self, version):
+        return os.path.join(self.versions_directory, version)
+
+    def list_versions(self):
+        """Version names in creation order"""
+        if not os.path.isdir(self.versions_directory):
+            return []
+
+        numbered = []
+        for name in os.listdir(self.versions_directory):
+            match = VERSION_PATTERN.match(name)
+            if match:
+                numbered.append((int(match.group(1)), name))
+        return [name for _, name in sorted(numbered)]
+
+    def latest_version(self):
+        versions = self.list_versions()
+        return versions[-1] if versions else None
+
+    def load_metadata(self, version):
+        with open(os.path.join(self.version_path(version), VERSION_FILE)) as f:
+            return json.load(f)
+
+    def load_version(self, version):
+        model = CreditScoringModel()
+        model.model_path = self.version_path(version)
+        model.load_models()
+        return model
+
+    def create_version(self, model, metadata):
+        """Save the model's artifacts as the next version and return its name
+
+        The version is assembled in a temporary directory and renamed into
+        place, so a version directory is always complete. Afterwards the
+        model's model_path points at the new version.
+        """
+        os.makedirs(self.versions_directory, exist_ok=True)
+        versions = self.list_versions()
+        number = int(VERSION_PATTERN.match(versions[-1]).group(1)) + 1 if versions else 1
+        version = self.version_name(number)
+
+        tmp_path = self.version_path(version) + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+        original_path = model.model_path
+        model.model_path = tmp_path
+        try:
+            model.save_models()
+        except Exception:
+            model.model_path = original_path
+            raise
+
+        with open(os.path.join(tmp_path, VERSION_FILE), 'w') as f:
+            json.dump({
+                **metadata,
+                'version': version,
+                'models': sorted(model.models),
+                'created_at': datetime.utcnow().isoformat()
+            }, f, indent=2)
+
+        # rename refuses to replace a non-empty directory, so racing writers cannot clobber a version
+        os.rename(tmp_path, self.version_path(version))
+        model.model_path = self.version_path(version)
+
+        logger.info(f"Created model version {version}")
+        return version
+
+    def update_metadata(self, version, **fields):
+        """Add fields to a version's metadata, such as an evaluation run after it was saved"""
+        metadata = {**self.load_metadata(version), **fields}
+        path = os.path.join(self.version_path(version), VERSION_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(path + '.tmp', path)
+        return metadata
+
+    def _write_pointer(self, filename, content):
+        os.makedirs(self.versions_directory, exist_ok=True)
+        path = os.path.join(self.versions_directory, filename)
+        with open(path + '.tmp', 'w') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+
+    def _read_pointer(self, filename):
+        try:
+            with open(os.path.join(self.versions_directory, filename)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _check_version(self, version):
+        if not VERSION_PATTERN.match(version or '') or not os.path.isdir(self.version_path(version)):
+            raise ValueError(f"Model version {version} not found")
+
+    def active_version(self):
+        """The serving version; None means the unversioned artifacts in MODEL_PATH"""
+        return self._read_pointer(ACTIVE_FILE)
+
+    def activate(self, version):
+        self._check_version(version)
+        self._write_pointer(ACTIVE_FILE, version)
+        logger.info(f"Activated model version {version}")
+
+    def shadow(self):
+        """The candidate configuration, {'version', 'sample_rate'}, or None"""
+        content = self._read_pointer(SHADOW_FILE)
+        return json.loads(content) if content else None
+
+    def set_shadow(self, version, sample_rate):
+        self._check_version(version)
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self._write_pointer(SHADOW_FILE, json.dumps({'version': version, 'sample_rate': sample_rate}))
+        logger.info(f"Shadow scoring {sample_rate:.1%} of traffic with model version {version}")
+
+    def clear_shadow(self):
+        try:
+            os.remove(os.path.join(self.versions_directory, SHADOW_FILE))
+        except FileNotFoundError:
+            pass
+
+    def state(self):
+        """(active version, shadow configuration), read fresh from disk"""
+        return self.active_version(), self.shadow()
+
+    def describe(self):
+        active, shadow = self.state()
+        versions = []
+        for version in self.list_versions():
+            metadata = self.load_metadata(version)
+            versions.append({
+                'version': version,
+                'parent': metadata.get('parent'),
+                'mode': metadata.get('mode'),
+                'created_at': metadata.get('created_at'),
+                'watermark': metadata.get('watermark'),
+                'active': version == active,
+                'shadow': shadow is not None and version == shadow['version']
+            })
+        return {'active': active, 'shadow': shadow, 'versions': versions}
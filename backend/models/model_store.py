@@ -0,0 +1,167 @@
+import gc
+import os
+import threading
+import time
+from backend.models.credit_scoring import CreditScoringModel
+from backend.models.model_registry import ModelRegistry
+from backend.models.shadow_scoring import ShadowScorer
+from backend.models.drift_monitor import drift_monitor
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ModelStore:
+    """Process-wide credit models, loaded once and shared by forked workers
+
+    Loading in the gunicorn master (preload_app) before fork lets every
+    worker read the same pages copy-on-write instead of unpickling its own
+    copy of each ensemble.
+
+    Each worker polls the registry's ACTIVE and SHADOW pointers at most
+    every MODEL_REGISTRY_POLL_SECONDS. A change is loaded on a background
+    thread and swapped in with one reference assignment, so requests keep
+    the model they started with and never wait for a load.
+    """
+
+    def __init__(self, model_path=None, poll_seconds=None):
+        self.model_path = model_path or Config.MODEL_PATH
+        self.registry = ModelRegistry(self.model_path)
+        self.poll_seconds = Config.MODEL_REGISTRY_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._lock = threading.Lock()
+        self._model = None
+        self._shadow = None
+        self._state = (None, None)
+        self._next_poll = 0.0
+        self._swap_thread = None
+        self.active_version = None
+        self.load_seconds = None
+        self.loaded_pid = None
+        self.swaps = 0
+
+    def load_version(self, version):
+        """Load a registered version, or the unversioned artifacts when version is None"""
+        if version is not None:
+            return self.registry.load_version(version)
+
+        model = CreditScoringModel()
+        model.model_path = self.model_path
+        model.load_models()
+        return model
+
+    def build_shadow(self, shadow):
+        if shadow is None:
+            return None
+        if self._shadow is not None and self._shadow.version == shadow['version']:
+            self._shadow.sample_rate = shadow['sample_rate']
+            return self._shadow
+        return ShadowScorer(self.registry.load_version(shadow['version']), shadow['version'], shadow['sample_rate'])
+
+    def load(self, force=False):
+        """Load the active version unless this process already has it"""
+        with self._lock:
+            if self._model is not None and not force:
+                return self._model
+
+            start = time.perf_counter()
+            state = self.registry.state()
+            model = self.load_version(state[0])
+
+            self._install(model, state, self.build_shadow(state[1]))
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_pid = os.getpid()
+
+            logger.info(f"Model store loaded {sorted(model.models)} ({state[0] or 'unversioned'}) in {self.load_seconds:.2f}s")
+            return model
+
+    def _install(self, model, state, shadow):
+        if self._shadow is not None and self._shadow is not shadow:
+            self._shadow.stop()
+        self._model = model
+        self._shadow = shadow
+        self._state = state
+        self.active_version = state[0]
+        # Compare applications with the training data of the version now serving
+        drift_monitor.use_model_path(self.registry.version_path(state[0]) if state[0] else self.model_path)
+        self._next_poll = time.monotonic() + self.poll_seconds
+
+    def get(self):
+        model = self._model if self._model is not None else self.load()
+        self.poll()
+        return model
+
+    def poll(self):
+        """Start a background swap if the registry pointers moved since the last load"""
+        now = time.monotonic()
+        if now < self._next_poll or self.poll_seconds <= 0:
+            return
+        self._next_poll = now + self.poll_seconds
+
+        try:
+            state = self.registry.state()
+        except Exception as e:
+            logger.error(f"Error reading model registry: {str(e)}")
+            return
+
+        if state != self._state and (self._swap_thread is None or not self._swap_thread.is_alive()):
+            self._swap_thread = threading.Thread(target=self._swap, args=(state,), name='model-swap', daemon=True)
+            self._swap_thread.start()
+
+    def _swap(self, state):
+        try:
+            start = time.perf_counter()
+            model = self._model if state[0] == self._state[0] else self.load_version(state[0])
+            shadow = self.build_shadow(state[1])
+
+            with self._lock:
+                loaded_new_model = model is not self._model
+                self._install(model, state, shadow)
+                self.swaps += 1
+                if loaded_new_model:
+                    self.load_seconds = time.perf_counter() - start
+                    self.loaded_pid = os.getpid()
+
+            logger.info(
+                f"Swapped to model version {state[0] or 'unversioned'} "
+                f"(shadow {state[1]['version'] if state[1] else 'off'}) in {time.perf_counter() - start:.2f}s"
+            )
+        except Exception as e:
+            # Keep serving the loaded version; the next poll retries
+            logger.error(f"Error swapping model version: {str(e)}")
+
+    def shadow(self, features, model_name, live_probabilities):
+        """Hand a sampled share of scored rows to the shadow candidate, if one is configured"""
+        scorer = self._shadow
+        if scorer is None:
+            return
+
+        mask = scorer.sample(len(features))
+        if mask.any():
+            scorer.submit(features[mask], model_name, live_probabilities[mask])
+
+    def freeze(self):
+        """Move loaded objects out of the collector's reach before fork
+
+        A collection in a worker would otherwise write to the GC headers of
+        every shared object and copy their pages.
+        """
+        gc.collect()
+        gc.freeze()
+
+    def stats(self):
+        return {
+            'loaded': self._model is not None,
+            'models': sorted(self._model.models) if self._model is not None else [],
+            'active_version': self.active_version,
+            'swaps': self.swaps,
+            'load_seconds': self.load_seconds,
+            'loaded_in_pid': self.loaded_pid,
+            'pid': os.getpid(),
+            'shared': self.loaded_pid is not None and self.loaded_pid != os.getpid(),
+            'version': self._model.version if self._model is not None else None,
+            'prediction_cache': self._model.prediction_cache.stats() if self._model is not None else None,
+            'attribution_cache': self._model.attribution_cache.stats() if self._model is not None else None,
+            'shadow': self._shadow.stats() if self._shadow is not None else None
+        }
+
+model_store = ModelStore()
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from config.settings import Config
+
+class PredictionCache:
+    """Bounded LRU cache of single-row predictions with a time-to-live
+
+    Keys combine the model version, the model name and a hash of the
+    canonical feature vector, so a new model version never sees results
+    cached for the one it replaced.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = Config.PREDICTION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = Config.PREDICTION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def feature_hash(features):
+        """Hash a feature row by value: float64, -0.0 folded into 0.0 and one NaN bit pattern"""
+        row = np.asarray(features, dtype=np.float64).reshape(-1) + 0.0
+        row[np.isnan(row)] = np.nan
+        return hashlib.blake2b(row.tobytes(), digest_size=16).digest()
+
+    @staticmethod
+    def feature_hashes(features):
+        """feature_hash of every row of a 2-D matrix, canonicalized in one pass"""
+        rows = np.array(features, dtype=np.float64) + 0.0
+        rows[np.isnan(rows)] = np.nan
+        return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in rows]
+
+    def key(self, version, model_name, features):
+        return (version, model_name, self.feature_hash(features))
+
+    def get(self, key):
+        """Return the cached value or None, counting the lookup as a hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import numpy as np
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ShadowScorer:
+    """Score sampled live traffic with a candidate model on a background thread
+
+    Requests only sample rows and enqueue them; the candidate runs on this
+    scorer's own thread. When the queue is full the rows are dropped and
+    counted rather than making the request wait.
+    """
+
+    def __init__(self, model, version, sample_rate, queue_size=None):
+        self.model = model
+        self.version = version
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size or Config.SHADOW_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+        self.submitted_rows = 0
+        self.scored_rows = 0
+        self.dropped_rows = 0
+        self.errors = 0
+        self.agreements = 0
+        self.live_approvals = 0
+        self.shadow_approvals = 0
+        self.total_abs_difference = 0.0
+        self.max_abs_difference = 0.0
+        self.scoring_seconds = 0.0
+
+    def sample(self, n_rows):
+        """Boolean mask choosing which of n_rows to shadow"""
+        return np.random.random(n_rows) < self.sample_rate
+
+    def submit(self, features, model_name, live_probabilities):
+        """Queue sampled rows and the live approval probabilities they got"""
+        if self._stopped.is_set() or len(features) == 0:
+            return
+
+        self._start()
+        try:
+            self._queue.put_nowait((features, model_name, live_probabilities))
+            with self._lock:
+                self.submitted_rows += len(features)
+        except queue.Full:
+            with self._lock:
+                self.dropped_rows += len(features)
+
+    def _start(self):
+        # Started on first use, inside the worker, never in a preloading master
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f'shadow-{self.version}', daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                features, model_name, live_probabilities = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                start = time.perf_counter()
+                if model_name == 'ensemble':
+                    result = self.model.predict_ensemble(features)
+                else:
+                    result = self.model.predict_batch(features, model_name)
+                seconds = time.perf_counter() - start
+                self._record(np.asarray(live_probabilities), np.asarray(result['probability_approved']), seconds)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.error(f"Error shadow scoring with {self.version}: {str(e)}")
+
+    def _record(self, live, shadow, seconds):
+        differences = np.abs(live - shadow)
+        live_approved = live > 0.5
+        shadow_approved = shadow > 0.5
+
+        with self._lock:
+            self.scored_rows += len(live)
+            self.agreements += int((live_approved == shadow_approved).sum())
+            self.live_approvals += int(live_approved.sum())
+            self.shadow_approvals += int(shadow_approved.sum())
+            self.total_abs_difference += float(differences.sum())
+            self.max_abs_difference = max(self.max_abs_difference, float(differences.max()))
+            self.scoring_seconds += seconds
+
+    def stop(self):
+        self._stopped.set()
+
+    def stats(self):
+        with self._lock:
+            scored = self.scored_rows
+            return {
+                'version': self.version,
+                'sample_rate': self.sample_rate,
+                'submitted_rows': self.submitted_rows,
+                'scored_rows': scored,
+                'dropped_rows': self.dropped_rows,
+                'queued': self._queue.qsize(),
+                'errors': self.errors,
+                'agreement_rate': self.agreements / scored if scored else None,
+                'live_approval_rate': self.live_approvals / scored if scored else None,
+                'shadow_approval_rate': self.shadow_approvals / scored if scored else None,
+                'mean_abs_difference': self.total_abs_difference / scored if scored else None,
+                'max_abs_difference': self.max_abs_difference if scored else None,
+                'scoring_seconds': self.scoring_seconds
+            }
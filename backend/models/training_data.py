@@ -0,0 +1,198 @@
+import os
+import json
+import shutil
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = [
+    'loan_amount', 'loan_term_months', 'debt_to_income_ratio',
+    'credit_score', 'annual_revenue', 'years_in_business',
+    'existing_debt', 'carbon_reduction_target_pct',
+    'renewable_energy_pct', 'environmental_certifications',
+    'social_impact_score', 'governance_score'
+]
+LABEL_NAME = 'approved'
+MANIFEST_FILE = 'manifest.json'
+SHARD_FILE = 'shard.json'
+# Seed stream for holdout rows, far above any shard index
+HOLDOUT_STREAM = 2 ** 31
+
+def approval_labels(columns):
+    """Approval rule behind the synthetic training data"""
+    financial_score = np.clip(
+        ((850 - columns['credit_score']) / 300) * -25 +
+        (columns['debt_to_income_ratio'] * -30) +
+        np.clip(columns['annual_revenue'] / columns['loan_amount'] * 10, 0, 25) +
+        50,
+        0, 100
+    )
+
+    esg_score = np.clip(
+        (columns['carbon_reduction_target_pct'] / 60 * 25) +
+        (columns['renewable_energy_pct'] / 100 * 25) +
+        (columns['environmental_certifications'] / 5 * 10) +
+        (columns['social_impact_score'] / 100 * 20) +
+        (columns['governance_score'] / 100 * 20),
+        0, 100
+    )
+
+    combined_score = financial_score * 0.6 + esg_score * 0.4
+
+    return (
+        (combined_score > 60) &
+        (columns['credit_score'] > 620) &
+        (columns['debt_to_income_ratio'] < 0.65) &
+        (esg_score > 40)
+    ).astype(np.int8)
+
+def generate_columns(n_rows, rng):
+    """Sample one chunk of synthetic applications as float64 columns"""
+    columns = {
+        'loan_amount': rng.uniform(50000, 5000000, n_rows),
+        'loan_term_months': rng.choice([12, 24, 36, 48, 60, 84, 120], n_rows).astype(np.float64),
+        'debt_to_income_ratio': rng.uniform(0.2, 0.8, n_rows),
+        'credit_score': rng.integers(550, 850, n_rows).astype(np.float64),
+        'annual_revenue': rng.uniform(100000, 10000000, n_rows),
+        'years_in_business': rng.integers(1, 30, n_rows).astype(np.float64),
+        'existing_debt': rng.uniform(10000, 2000000, n_rows),
+        'carbon_reduction_target_pct': rng.uniform(10, 60, n_rows),
+        'renewable_energy_pct': rng.uniform(10, 90, n_rows),
+        'environmental_certifications': rng.integers(0, 5, n_rows).astype(np.float64),
+        'social_impact_score': rng.uniform(40, 100, n_rows),
+        'governance_score': rng.uniform(50, 100, n_rows)
+    }
+    columns[LABEL_NAME] = approval_labels(columns)
+    return columns
+
+def holdout_columns(n_rows, seed=42):
+    """Evaluation rows from a seed stream no training shard uses"""
+    return generate_columns(n_rows, np.random.default_rng([seed, HOLDOUT_STREAM]))
+
+def shard_directory(directory, index):
+    return os.path.join(directory, f'shard_{index:05d}')
+
+def read_shard_info(path):
+    """The (seed, index, rows) a shard was written with; None if it has no record"""
+    try:
+        with open(os.path.join(path, SHARD_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_shard(directory, index, n_rows, seed):
+    """Generate and write one shard; its content depends only on (seed, index, n_rows)
+
+    Each column is its own .npy file, next to a shard.json recording the
+    arguments. The shard is assembled in a temporary directory and renamed
+    into place, so a shard either exists completely or not at all. An
+    existing shard is kept only if it was written with the same arguments.
+    """
+    path = shard_directory(directory, index)
+    info = {'seed': seed, 'index': index, 'rows': n_rows}
+    if os.path.isdir(path):
+        existing = read_shard_info(path)
+        if existing == info:
+            return path
+        logger.info(f"Regenerating {path}: it was written with {existing}, not {info}")
+        shutil.rmtree(path)
+
+    columns = generate_columns(n_rows, np.random.default_rng([seed, index]))
+
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+    with open(os.path.join(tmp_path, SHARD_FILE), 'w') as f:
+        json.dump(info, f)
+    os.replace(tmp_path, path)
+
+    return path
+
+def generate_training_shards(directory, n_rows, rows_per_shard=500000, seed=42, workers=1):
+    """Write n_rows of synthetic training data as columnar shards
+
+    Shards already on disk with the same seed and row count are kept, so
+    an interrupted run resumes where it stopped and reruns with the same
+    arguments produce identical files. Shards written with other arguments
+    are regenerated, and shards past the new count are removed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shard_rows = [
+        min(rows_per_shard, n_rows - start)
+        for start in range(0, n_rows, rows_per_shard)
+    ]
+
+    # Readers must not see the old manifest over shards being replaced
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        if (previous['seed'], previous['rows'], previous['rows_per_shard']) != (seed, n_rows, rows_per_shard):
+            os.remove(manifest_path)
+            for index in range(len(shard_rows), len(previous['shards'])):
+                shutil.rmtree(shard_directory(directory, index), ignore_errors=True)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(
+                write_shard,
+                [directory] * len(shard_rows),
+                range(len(shard_rows)),
+                shard_rows,
+                [seed] * len(shard_rows)
+            ))
+    else:
+        for index, rows in enumerate(shard_rows):
+            write_shard(directory, index, rows, seed)
+
+    manifest = {
+        'seed': seed,
+        'rows': n_rows,
+        'rows_per_shard': rows_per_shard,
+        'shards': [{'index': index, 'rows': rows} for index, rows in enumerate(shard_rows)],
+        'features': FEATURE_NAMES,
+        'label': LABEL_NAME
+    }
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    logger.info(f"Wrote {len(shard_rows)} training shards ({n_rows} rows) to {directory}")
+    return manifest
+
+class TrainingShardReader:
+    """Read columnar training shards one at a time"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+
+    @property
+    def n_shards(self):
+        return len(self.manifest['shards'])
+
+    @property
+    def n_rows(self):
+        return self.manifest['rows']
+
+    def column(self, index, name):
+        """Memory-map one column of one shard"""
+        return np.load(os.path.join(shard_directory(self.directory, index), f'{name}.npy'), mmap_mode='r')
+
+    def read_shard(self, index, feature_names=None):
+        """Assemble (X, y) for one shard; only this shard is held in memory"""
+        feature_names = feature_names or self.manifest['features']
+        X = np.empty((self.manifest['shards'][index]['rows'], len(feature_names)), dtype=np.float64)
+        for position, name in enumerate(feature_names):
+            X[:, position] = self.column(index, name)
+
+        return X, np.asarray(self.column(index, self.manifest['label']))
+
+    def iter_shards(self, feature_names=None):
+        for index in range(self.n_shards):
+            yield self.read_shard(index, feature_names)
@@ -0,0 +1,372 @@
+import os
+import copy
+import json
+import time
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.model_selection import train_test_split
+from backend.models.credit_scoring import CreditScoringModel
+from config.settings import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'training_manifest.json'
+PARITY_ROWS = 2000
+
+def wrap_xgboost_booster(estimator, booster):
+    """Load a raw booster into an XGBClassifier so it saves and predicts as a classifier"""
+    # The metadata the sklearn wrapper saves, so load_model restores a classifier
+    booster.set_attr(scikit_learn=json.dumps({
+        '_estimator_type': 'classifier',
+        'classes_': [0, 1],
+        'n_classes_': 2
+    }))
+    estimator.load_model(bytearray(booster.save_raw('json')))
+    return estimator
+
+def trim_xgboost(estimator):
+    """Cut an early-stopped XGBoost model down to its best iteration
+
+    The native model already predicts with only those rounds; dropping the
+    rest, and the best_iteration attribute with them, means the compiled
+    arrays and any boosting continued from this model see the same trees.
+    """
+    try:
+        best_iteration = estimator.best_iteration
+    except AttributeError:
+        return estimator
+
+    booster = estimator.get_booster()[:best_iteration + 1]
+    booster.set_attr(best_iteration=None, best_ntree_limit=None, best_score=None)
+    return wrap_xgboost_booster(estimator, booster)
+
+class TrainingPipeline:
+    """Fit the credit models concurrently and checkpoint each one as it finishes
+
+    Every model gets a share of the core budget. A finished model is
+    written to MODEL_PATH straight away and recorded in a manifest keyed by
+    a fingerprint of the training data, so a restarted run on the same data
+    only fits what is missing.
+    """
+
+    def __init__(self, model=None, cores=None, max_parallel=None,
+                 validation_fraction=None, early_stopping_rounds=None):
+        self.model = model or CreditScoringModel()
+        self.cores = cores or Config.TRAINING_CORES
+        self.max_parallel = max_parallel or Config.TRAINING_MAX_PARALLEL
+        self.validation_fraction = validation_fraction or Config.TRAINING_VALIDATION_FRACTION
+        self.early_stopping_rounds = early_stopping_rounds or Config.TRAINING_EARLY_STOPPING_ROUNDS
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.model.model_path, MANIFEST_FILE)
+
+    def fingerprint(self, X_train, y_train):
+        """Identify a training run by its data and the models' hyperparameters"""
+        hasher = hashlib.sha256()
+        hasher.update(np.ascontiguousarray(X_train, dtype=np.float64).tobytes())
+        hasher.update(np.ascontiguousarray(y_train).tobytes())
+        hasher.update(str(self.early_stopping_rounds).encode())
+        hasher.update(str(self.validation_fraction).encode())
+        return hasher.hexdigest()
+
+    def load_manifest(self, fingerprint):
+        if not os.path.exists(self.manifest_path):
+            return {'fingerprint': fingerprint, 'models': {}}
+
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+
+        if manifest.get('fingerprint') != fingerprint:
+            logger.info("Training data changed since the last run, retraining every model")
+            return {'fingerprint': fingerprint, 'models': {}}
+
+        return manifest
+
+    def save_manifest(self, manifest):
+        os.makedirs(self.model.model_path, exist_ok=True)
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def cores_per_model(self, model_names):
+        """Split the core budget across the models that run side by side"""
+        running = max(1, min(self.max_parallel, len(model_names)))
+        return max(1, self.cores // running)
+
+    def fit_model(self, name, n_jobs, X_train, y_train, X_val, y_val):
+        start = time.perf_counter()
+        estimator = self.model.build_estimator(name, n_jobs, self.early_stopping_rounds)
+
+        if name == 'xgboost':
+            estimator.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+            best_iteration = int(estimator.best_iteration)
+            trim_xgboost(estimator)
+        elif name == 'lightgbm':
+            estimator.fit(
+                X_train, y_train,
+                eval_set=[(X_val, y_val)],
+                callbacks=[lgb.early_stopping(self.early_stopping_rounds, verbose=False)]
+            )
+            best_iteration = int(estimator.best_iteration_)
+        elif name == 'gradient_boosting':
+            estimator.fit(np.vstack((X_train, X_val)), np.concatenate((y_train, y_val)))
+            best_iteration = int(estimator.n_estimators_)
+        else:
+            estimator.fit(np.vstack((X_train, X_val)), np.concatenate((y_train, y_val)))
+            best_iteration = None
+
+        return estimator, best_iteration, time.perf_counter() - start
+
+    def run(self, X_train, y_train):
+        """Train every unfinished model and return a per-model report"""
+        run_start = time.perf_counter()
+        X_train = np.asarray(X_train, dtype=float)
+        y_train = np.asarray(y_train)
+
+        fingerprint = self.fingerprint(X_train, y_train)
+        manifest = self.load_manifest(fingerprint)
+        report = {}
+
+        pending = []
+        for name in self.model.MODEL_NAMES:
+            if name in manifest['models'] and self.model.load_model(name):
+                report[name] = {**manifest['models'][name], 'status': 'skipped'}
+                logger.info(f"Skipping {name}, already trained for this data")
+            else:
+                pending.append(name)
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train,
+            test_size=self.validation_fraction,
+            random_state=42,
+            stratify=y_train
+        )
+        n_jobs = self.cores_per_model(pending)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_parallel, len(pending)))) as executor:
+            futures = {
+                executor.submit(self.fit_model, name, n_jobs, X_fit, y_fit, X_val, y_val): name
+                for name in pending
+            }
+
+            # Checkpoint in completion order so a crash keeps every finished model
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    estimator, best_iteration, seconds = future.result()
+                    self.model.models[name] = estimator
+                    self.model.compile_models([name])
+                    # Never checkpoint a model whose fast path scores differently
+                    self.model.check_compiled_parity(name, X_val[:PARITY_ROWS])
+                except Exception as e:
+                    self.model.models.pop(name, None)
+                    self.model.compiled.pop(name, None)
+                    logger.error(f"Error training {name}: {str(e)}")
+                    report[name] = {'status': 'failed', 'error': str(e)}
+                    continue
+
+                self.model.save_model(name)
+
+                manifest['models'][name] = {
+                    'seconds': seconds,
+                    'best_iteration': best_iteration,
+                    'cores': n_jobs,
+                    'completed_at': datetime.utcnow().isoformat()
+                }
+                self.save_manifest(manifest)
+                report[name] = {**manifest['models'][name], 'status': 'trained'}
+                logger.info(f"Trained {name} in {seconds:.2f}s on {n_jobs} cores (best iteration {best_iteration})")
+
+        self.model.scaler.fit(X_train)
+        self.model.save_scaler()
+
+        failed = [name for name, entry in report.items() if entry['status'] == 'failed']
+        logger.info(f"Training pipeline finished in {time.perf_counter() - run_start:.2f}s")
+        if failed:
+            raise RuntimeError(f"Training failed for {', '.join(failed)}; finished models were checkpointed")
+
+        return report
+
+class StreamingTrainer:
+    """Train the credit models from columnar shards, one shard in memory at a time
+
+    XGBoost reads the shards through an external-memory DMatrix and sees
+    every row in every round. LightGBM and GradientBoosting add boosting
+    rounds shard by shard, and RandomForest grows new trees per shard with
+    warm_start, so the model sizes match the in-memory models.
+    """
+
+    def __init__(self, model=None, cores=None, cache_directory=None):
+        self.model = model or CreditScoringModel()
+        self.cores = cores or Config.TRAINING_CORES
+        self.cache_directory = cache_directory
+
+    def rounds_per_shard(self, estimator, reader):
+        return max(1, -(-estimator.n_estimators // reader.n_shards))
+
+    def train_xgboost(self, reader):
+        estimator = self.model.build_estimator('xgboost', self.cores)
+        cache_directory = self.cache_directory or os.path.join(reader.directory, 'xgb_cache')
+        os.makedirs(cache_directory, exist_ok=True)
+
+        params = {
+            'objective': 'binary:logistic',
+            'eval_metric': 'logloss',
+            'tree_method': 'hist',
+            'max_depth': estimator.max_depth,
+            'eta': estimator.learning_rate,
+            'seed': estimator.random_state,
+            'nthread': self.cores
+        }
+        matrix = xgb.DMatrix(ShardIterator(reader, self.model.feature_names, cache_directory))
+        booster = xgb.train(params, matrix, num_boost_round=estimator.n_estimators)
+        return wrap_xgboost_booster(estimator, booster)
+
+    def train_lightgbm(self, reader):
+        estimator = self.model.build_estimator('lightgbm', self.cores)
+        estimator.set_params(n_estimators=self.rounds_per_shard(estimator, reader))
+
+        booster = None
+        for X, y in reader.iter_shards(self.model.feature_names):
+            estimator.fit(X, y, init_model=booster)
+            booster = estimator.booster_
+
+        # Record the total rounds rather than the last shard's increment
+        estimator.set_params(n_estimators=booster.num_trees())
+        return estimator
+
+    def train_warm_start(self, name, reader):
+        """RandomForest and GradientBoosting: extend the ensemble on each shard"""
+        estimator = self.model.build_estimator(name, self.cores)
+        step = self.rounds_per_shard(estimator, reader)
+        estimator.set_params(warm_start=True, n_estimators=0)
+
+        for X, y in reader.iter_shards(self.model.feature_names):
+            estimator.set_params(n_estimators=estimator.n_estimators + step)
+            estimator.fit(X, y)
+
+        return estimator
+
+    def run(self, reader, model_names=None):
+        """Train each model from the shards and checkpoint it to MODEL_PATH"""
+        report = {}
+        X_parity, _ = reader.read_shard(0, self.model.feature_names)
+        X_parity = X_parity[:PARITY_ROWS]
+
+        for name in model_names or self.model.MODEL_NAMES:
+            start = time.perf_counter()
+            if name == 'xgboost':
+                estimator = self.train_xgboost(reader)
+            elif name == 'lightgbm':
+                estimator = self.train_lightgbm(reader)
+            else:
+                estimator = self.train_warm_start(name, reader)
+
+            self.model.models[name] = estimator
+            self.model.compile_models([name])
+            self.model.check_compiled_parity(name, X_parity)
+            self.model.save_model(name)
+
+            report[name] = {'status': 'trained', 'seconds': time.perf_counter() - start}
+            logger.info(f"Streamed {reader.n_rows} rows in {reader.n_shards} shards into {name} in {report[name]['seconds']:.2f}s")
+
+        for X, _ in reader.iter_shards(self.model.feature_names):
+            self.model.scaler.partial_fit(X)
+        self.model.save_scaler()
+
+        return report
+
+class IncrementalTrainer:
+    """Extend already-trained models with a batch of new rows
+
+    XGBoost and LightGBM continue boosting from the existing boosters,
+    GradientBoosting adds stages with warm_start and RandomForest adds
+    trees with warm_start. The trees already in a model are kept as they
+    are; only the added rounds see the new rows. The previous model is
+    copied, never modified, so it can keep serving meanwhile.
+    """
+
+    def __init__(self, model=None, boost_rounds=None, forest_trees=None, cores=None):
+        self.model = model or CreditScoringModel()
+        self.boost_rounds = boost_rounds or Config.INCREMENTAL_BOOST_ROUNDS
+        self.forest_trees = forest_trees or Config.INCREMENTAL_FOREST_TREES
+        self.cores = cores or Config.TRAINING_CORES
+
+    def extend(self, name, previous, X, y):
+        if name == 'xgboost':
+            estimator = self.model.build_estimator('xgboost', self.cores)
+            estimator.set_params(n_estimators=self.boost_rounds)
+            # Continue from the rounds the previous model predicts with, not ones early stopping discarded
+            base = trim_xgboost(copy.deepcopy(previous)).get_booster()
+            estimator.fit(X, y, xgb_model=base, verbose=False)
+            return estimator
+
+        if name == 'lightgbm':
+            estimator = self.model.build_estimator('lightgbm', self.cores)
+            estimator.set_params(n_estimators=self.boost_rounds)
+            estimator.fit(X, y, init_model=previous.booster_)
+            estimator.set_params(n_estimators=estimator.booster_.num_trees())
+            return estimator
+
+        estimator = copy.deepcopy(previous)
+        step = self.forest_trees if name == 'random_forest' else self.boost_rounds
+        # Early stopping would stop adding stages against a validation split of the new rows only
+        if name == 'gradient_boosting':
+            estimator.set_params(n_iter_no_change=None)
+        estimator.set_params(warm_start=True, n_estimators=len(estimator.estimators_) + step)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+        return estimator
+
+    def run(self, previous_model, X, y, model_names=None):
+        """Fit every model onto a copy of previous_model's and return (model, report)"""
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y).astype(int)
+        if len(np.unique(y)) < 2:
+            raise ValueError("Incremental training needs both approved and rejected applications")
+
+        self.model.scaler = copy.deepcopy(previous_model.scaler)
+        report = {}
+
+        for name in model_names or self.model.MODEL_NAMES:
+            if name not in previous_model.models:
+                logger.warning(f"No previous {name} model to extend, skipping")
+                continue
+
+            start = time.perf_counter()
+            self.model.models[name] = self.extend(name, previous_model.models[name], X, y)
+            report[name] = {'status': 'extended', 'seconds': time.perf_counter() - start}
+            logger.info(f"Extended {name} with {len(X)} rows in {report[name]['seconds']:.2f}s")
+
+        self.model.compile_models(list(report))
+        for name in report:
+            self.model.check_compiled_parity(name, X[:PARITY_ROWS])
+        self.model.scaler.partial_fit(X)
+        return self.model, report
+
+class ShardIterator(xgb.DataIter):
+    """Feed training shards to XGBoost's external-memory DMatrix"""
+
+    def __init__(self, reader, feature_names, cache_directory):
+        self.reader = reader
+        self.feature_names = feature_names
+        self.position = 0
+        super().__init__(cache_prefix=os.path.join(cache_directory, 'cache'))
+
+    def next(self, input_data):
+        if self.position == self.reader.n_shards:
+            return 0
+
+        X, y = self.reader.read_shard(self.position, self.feature_names)
+        input_data(data=X, label=y)
+        self.position += 1
+        return 1
+
+    def reset(self):
+        self.position = 0
@@ -0,0 +1,412 @@
+import os
+import json
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+import xgboost as xgb
+import lightgbm as lgb
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CompiledEnsemble:
+    """A tree ensemble flattened into contiguous NumPy node arrays
+
+    Nodes of every tree share one set of arrays and children are absolute
+    node indexes. A row goes left when its feature value is <= threshold,
+    or when it is missing and default_left is set. Leaves point back at
+    themselves, so walking every tree `depth` steps lands all of them on a
+    leaf without per-tree branching.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots')
+    # Saved when present; arrays compiled before attributions existed lack them
+    OPTIONAL_ARRAYS = ('node_value',)
+    # Bumped when compilation changes what saved arrays contain; 2 trims early-stopped XGBoost
+    FORMAT_VERSION = 2
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 depth, link='sigmoid', base_score=0.0, float32_input=False, node_value=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        # 'mean' averages leaf probabilities, 'sigmoid' sums leaf margins
+        self.link = link
+        self.base_score = base_score
+        # sklearn and XGBoost compare features as float32
+        self.float32_input = float32_input
+        # Cover-weighted expected value of every node, internal nodes included
+        self.node_value = node_value
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _prepare(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.float32_input:
+            X = X.astype(np.float32).astype(np.float64)
+        return X
+
+    def _step(self, X, rows, nodes, has_missing):
+        """Move every (row, tree) one level down; leaves stay put"""
+        values = X[rows, self.feature[nodes]]
+        go_left = values <= self.threshold[nodes]
+        if has_missing:
+            go_left = np.where(np.isnan(values), self.default_left[nodes], go_left)
+        return np.where(go_left, self.left[nodes], self.right[nodes])
+
+    def leaf_values(self, X):
+        """Walk every tree for every row at once; returns (rows, trees) leaf values"""
+        X = self._prepare(X)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        has_missing = np.isnan(X).any()
+
+        for _ in range(self.depth):
+            nodes = self._step(X, rows, nodes, has_missing)
+
+        return self.value[nodes]
+
+    def contributions(self, X):
+        """Path-based per-feature contributions for a batch; returns (contributions, bias)
+
+        Each split on a row's path credits its feature with the change in
+        expected node value from parent to child, accumulated across all
+        trees in one pass per depth level. For every row, bias plus the
+        contributions equals the margin (sigmoid link) or the probability
+        (mean link) that predict_proba starts from.
+        """
+        if self.node_value is None:
+            raise ValueError("Compiled ensemble has no node values; recompile the model")
+
+        X = self._prepare(X)
+        n_rows, n_features = X.shape
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        has_missing = np.isnan(X).any()
+        flat_rows = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        totals = np.zeros(n_rows * n_features)
+
+        for _ in range(self.depth):
+            children = self._step(X, rows, nodes, has_missing)
+            # Leaves point at themselves, so their change is zero
+            change = self.node_value[children] - self.node_value[nodes]
+            totals += np.bincount(
+                flat_rows + self.feature[nodes].ravel(), weights=change.ravel(), minlength=n_rows * n_features
+            )
+            nodes = children
+
+        contributions = totals.reshape(n_rows, n_features)
+        bias = float(self.node_value[self.roots].sum())
+
+        if self.link == 'mean':
+            return contributions / self.n_trees, bias / self.n_trees
+        return contributions, bias + self.base_score
+
+    def predict_proba(self, X):
+        """Class probabilities in the (rows, 2) layout of predict_proba"""
+        leaf_values = self.leaf_values(X)
+
+        if self.link == 'mean':
+            positive = leaf_values.mean(axis=1)
+        else:
+            # sigmoid written with logaddexp so large negative margins do not overflow exp
+            positive = np.exp(-np.logaddexp(0.0, -(leaf_values.sum(axis=1) + self.base_score)))
+
+        return np.column_stack((1.0 - positive, positive))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+
+        # Replace files rather than rewrite them; other processes may have them mapped
+        for name in self.ARRAYS + self.OPTIONAL_ARRAYS:
+            if getattr(self, name) is None:
+                continue
+            path = os.path.join(directory, f'{name}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + '.tmp', path)
+
+        path = os.path.join(directory, 'ensemble.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({
+                'depth': self.depth,
+                'link': self.link,
+                'base_score': self.base_score,
+                'float32_input': self.float32_input,
+                'format_version': self.FORMAT_VERSION
+            }, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def saved_version(cls, directory):
+        """Format version of saved arrays; 1 for arrays saved before versions were recorded"""
+        with open(os.path.join(directory, 'ensemble.json')) as f:
+            return json.load(f).get('format_version', 1)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load saved node arrays, memory-mapped read-only by default"""
+        with open(os.path.join(directory, 'ensemble.json')) as f:
+            meta = json.load(f)
+        meta.pop('format_version', None)
+
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in cls.ARRAYS
+        }
+        for name in cls.OPTIONAL_ARRAYS:
+            path = os.path.join(directory, f'{name}.npy')
+            if os.path.exists(path):
+                arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        return cls(**arrays, **meta)
+
+class _NodeBuilder:
+    """Accumulate trees node by node into flat lists"""
+
+    def __init__(self):
+        self.feature = []
+        self.threshold = []
+        self.left = []
+        self.right = []
+        self.default_left = []
+        self.value = []
+        self.node_value = []
+        self.roots = []
+        self.depth = 0
+
+    def add_tree(self, feature, threshold, left, right, default_left, value, cover):
+        """Append one tree given per-node lists with tree-local child indexes (-1 at leaves)
+
+        cover is the training weight reaching each node, used to average
+        leaf values up into the expected value of every internal node.
+        """
+        offset = len(self.feature)
+        self.roots.append(offset)
+        self.node_value.extend(_expected_values(left, right, value, cover))
+
+        for node in range(len(feature)):
+            if left[node] < 0:
+                # Leaves loop back on themselves
+                self.feature.append(0)
+                self.threshold.append(0.0)
+                self.left.append(offset + node)
+                self.right.append(offset + node)
+                self.default_left.append(True)
+            else:
+                self.feature.append(feature[node])
+                self.threshold.append(threshold[node])
+                self.left.append(offset + left[node])
+                self.right.append(offset + right[node])
+                self.default_left.append(bool(default_left[node]))
+            self.value.append(value[node])
+
+        self.depth = max(self.depth, _tree_depth(left, right))
+
+    def build(self, **kwargs):
+        return CompiledEnsemble(
+            feature=np.array(self.feature, dtype=np.int32),
+            threshold=np.array(self.threshold, dtype=np.float64),
+            left=np.array(self.left, dtype=np.int32),
+            right=np.array(self.right, dtype=np.int32),
+            default_left=np.array(self.default_left, dtype=bool),
+            value=np.array(self.value, dtype=np.float64),
+            roots=np.array(self.roots, dtype=np.int32),
+            depth=self.depth,
+            node_value=np.array(self.node_value, dtype=np.float64),
+            **kwargs
+        )
+
+def _expected_values(left, right, value, cover):
+    """Leaf values, and cover-weighted means of the leaves below every internal node"""
+    expected = [0.0] * len(left)
+    stack = [(0, False)]
+
+    while stack:
+        node, children_done = stack.pop()
+        if left[node] < 0:
+            expected[node] = float(value[node])
+        elif children_done:
+            left_cover, right_cover = float(cover[left[node]]), float(cover[right[node]])
+            total = left_cover + right_cover
+            expected[node] = (
+                (left_cover * expected[left[node]] + right_cover * expected[right[node]]) / total
+                if total > 0 else (expected[left[node]] + expected[right[node]]) / 2
+            )
+        else:
+            stack.append((node, True))
+            stack.append((left[node], False))
+            stack.append((right[node], False))
+
+    return expected
+
+def _tree_depth(left, right):
+    depth = 0
+    stack = [(0, 0)]
+
+    while stack:
+        node, node_depth = stack.pop()
+        if left[node] < 0:
+            depth = max(depth, node_depth)
+        else:
+            stack.append((left[node], node_depth + 1))
+            stack.append((right[node], node_depth + 1))
+
+    return depth
+
+def _compile_random_forest(model):
+    builder = _NodeBuilder()
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        builder.add_tree(
+            tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            np.ones(tree.node_count, dtype=bool),
+            counts[:, 1] / counts.sum(axis=1),
+            tree.weighted_n_node_samples
+        )
+
+    return builder.build(link='mean', float32_input=True)
+
+def _compile_gradient_boosting(model):
+    builder = _NodeBuilder()
+
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        builder.add_tree(
+            tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            np.ones(tree.node_count, dtype=bool),
+            tree.value[:, 0, 0] * model.learning_rate,
+            tree.weighted_n_node_samples
+        )
+
+    if model.init_ == 'zero':
+        base_score = 0.0
+    else:
+        # Same clipped log-odds of the prior that sklearn starts boosting from
+        eps = np.finfo(np.float32).eps
+        prior = model.init_.predict_proba(np.zeros((1, model.n_features_in_)))[0, 1]
+        prior = np.clip(prior, eps, 1 - eps)
+        base_score = float(np.log(prior / (1 - prior)))
+
+    return builder.build(link='sigmoid', base_score=base_score, float32_input=True)
+
+def _compile_xgboost(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"Unsupported XGBoost objective {learner['objective']['name']}")
+
+    trees = learner['gradient_booster']['model']['trees']
+    try:
+        # predict_proba stops at the early-stopping best iteration, so the compiled model must too
+        per_iteration = int(learner['gradient_booster']['model']['gbtree_model_param']['num_parallel_tree'])
+        trees = trees[:(model.best_iteration + 1) * per_iteration]
+    except AttributeError:
+        pass
+
+    builder = _NodeBuilder()
+
+    for tree in trees:
+        thresholds = np.array(tree['split_conditions'], dtype=np.float32)
+        # XGBoost sends x < threshold left; the next float32 down makes that <=
+        below = np.nextafter(thresholds, np.float32(-np.inf))
+        builder.add_tree(
+            tree['split_indices'], below.astype(np.float64),
+            tree['left_children'], tree['right_children'],
+            tree['default_left'],
+            # Leaf values are stored in split_conditions with the learning rate applied
+            thresholds.astype(np.float64),
+            tree['sum_hessian']
+        )
+
+    base_score = float(learner['learner_model_param']['base_score'])
+    return builder.build(
+        link='sigmoid',
+        base_score=float(np.log(base_score / (1 - base_score))),
+        float32_input=True
+    )
+
+def _flatten_lightgbm_tree(structure):
+    feature, threshold, left, right, default_left, value, cover = [], [], [], [], [], [], []
+    stack = [(structure, None, None)]
+
+    while stack:
+        node, parent, side = stack.pop()
+        index = len(feature)
+        if parent is not None:
+            (left if side == 'left' else right)[parent] = index
+
+        if 'leaf_value' in node:
+            feature.append(0)
+            threshold.append(0.0)
+            left.append(-1)
+            right.append(-1)
+            default_left.append(True)
+            value.append(node['leaf_value'])
+            cover.append(node.get('leaf_weight', node.get('leaf_count', 1)))
+            continue
+
+        if node['decision_type'] != '<=':
+            raise ValueError("Categorical LightGBM splits are not supported")
+
+        feature.append(node['split_feature'])
+        threshold.append(node['threshold'])
+        left.append(None)
+        right.append(None)
+        if node['missing_type'] == 'NaN':
+            default_left.append(node['default_left'])
+        else:
+            # Without a NaN branch LightGBM scores a missing value as zero
+            default_left.append(0.0 <= node['threshold'])
+        value.append(0.0)
+        cover.append(node.get('internal_weight', node.get('internal_count', 1)))
+
+        stack.append((node['right_child'], index, 'right'))
+        stack.append((node['left_child'], index, 'left'))
+
+    return feature, threshold, left, right, default_left, value, cover
+
+def _compile_lightgbm(model):
+    dump = model.booster_.dump_model()
+
+    if dump['objective'].split()[0] != 'binary' or dump['num_tree_per_iteration'] != 1:
+        raise ValueError(f"Unsupported LightGBM objective {dump['objective']}")
+
+    # The binary objective maps margins through sigmoid(scale * margin)
+    scale = 1.0
+    for parameter in dump['objective'].split()[1:]:
+        if parameter.startswith('sigmoid:'):
+            scale = float(parameter.split(':')[1])
+
+    builder = _NodeBuilder()
+    for tree in dump['tree_info']:
+        feature, threshold, left, right, default_left, value, cover = _flatten_lightgbm_tree(tree['tree_structure'])
+        builder.add_tree(feature, threshold, left, right, default_left, [leaf * scale for leaf in value], cover)
+
+    return builder.build(link='sigmoid')
+
+def compile_model(model):
+    """Flatten a trained credit model into a CompiledEnsemble"""
+    if isinstance(model, RandomForestClassifier):
+        return _compile_random_forest(model)
+    if isinstance(model, GradientBoostingClassifier):
+        return _compile_gradient_boosting(model)
+    if isinstance(model, xgb.XGBClassifier):
+        return _compile_xgboost(model)
+    if isinstance(model, lgb.LGBMClassifier):
+        return _compile_lightgbm(model)
+    raise ValueError(f"Cannot compile model of type {type(model).__name__}")
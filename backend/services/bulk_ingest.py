@@ -0,0 +1,430 @@
+import io
+import os
+import re
+import csv
+import json
+import math
+import time
+import uuid
+import fcntl
+from datetime import datetime
+import numpy as np
+import logging
+from backend.database.models import db, LoanApplication
+from backend.models.drift_monitor import drift_monitor
+from backend.models.training_data import FEATURE_NAMES
+from backend.services.loan_origination import LoanOriginationService
+from backend.utils.helpers import generate_loan_id
+from backend.utils.validators import (
+    validate_loan_amount, validate_credit_score, validate_percentage, validate_country_code
+)
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FILE = 'progress.json'
+ERRORS_FILE = 'errors.ndjson'
+LOCK_FILE = '.lock'
+JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+FORMATS = ('csv', 'ndjson')
+LOAN_ID_ATTEMPTS = 5
+LOAN_ID_QUERY_SIZE = 500
+
+FLOAT_FIELDS = [
+    'loan_amount', 'debt_to_income_ratio', 'annual_revenue', 'existing_debt',
+    'carbon_reduction_target_pct', 'renewable_energy_pct', 'social_impact_score', 'governance_score'
+]
+INTEGER_FIELDS = ['year', 'loan_term_months', 'credit_score', 'years_in_business', 'environmental_certifications']
+STRING_FIELDS = ['country', 'country_code', 'project_type', 'energy_efficiency_rating']
+REQUIRED_FIELDS = ['loan_amount', 'loan_term_months', 'project_type']
+PERCENTAGE_FIELDS = ['carbon_reduction_target_pct', 'renewable_energy_pct', 'social_impact_score', 'governance_score']
+
+INSERT_COLUMNS = (
+    ['loan_id'] + STRING_FIELDS + FLOAT_FIELDS + INTEGER_FIELDS + [
+        'financial_health_score', 'esg_composite_score', 'combined_credit_score', 'loan_approved',
+        'processing_status', 'application_date', 'created_at', 'updated_at'
+    ]
+)
+
+def parse_number(value, integer=False):
+    """Number from a CSV string or JSON value; None for blanks, ValueError for anything else"""
+    if value is None or value == '':
+        return None
+    if value.__class__ is bool:
+        raise ValueError(value)
+
+    try:
+        number = float(value)
+    except ValueError:
+        if isinstance(value, str) and not value.strip():
+            return None
+        raise
+    if not math.isfinite(number):
+        raise ValueError(value)
+    if integer:
+        if not number.is_integer():
+            raise ValueError(value)
+        return int(number)
+    return number
+
+def parse_string(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+class BulkIngestService:
+    """Load many loan applications from a CSV or NDJSON stream
+
+    Rows are read lazily and handled in chunks. Each chunk is validated
+    with the rules in backend/utils/validators.py, scored with the array
+    forms of the LoanOriginationService scores, and inserted in one
+    statement (COPY on PostgreSQL) and one transaction. Rejected rows go
+    to the job's errors.ndjson with every problem found.
+
+    Progress is journaled in the job directory before and after each
+    commit, so re-running a job with the same stream resumes after the
+    last committed chunk without inserting any row twice.
+    """
+
+    def __init__(self, directory=None, chunk_size=None):
+        self.directory = directory or Config.BULK_INGEST_PATH
+        self.chunk_size = chunk_size or Config.BULK_INGEST_CHUNK_SIZE
+        self.origination = LoanOriginationService()
+
+    def job_directory(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            raise ValueError("job_id may only contain letters, digits, '-' and '_'")
+        return os.path.join(self.directory, job_id)
+
+    def read_rows(self, stream, data_format):
+        """Yield (row number, record dict or None, parse error or None)
+
+        CSV rows are numbered from 1 after the header; NDJSON rows by line.
+        """
+        if data_format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+        if data_format == 'csv':
+            for row_number, row in enumerate(csv.DictReader(stream), 1):
+                yield row_number, row, None
+            return
+
+        for row_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"invalid JSON: {str(e)}"
+                continue
+            if isinstance(row, dict):
+                yield row_number, row, None
+            else:
+                yield row_number, None, "each line must be a JSON object"
+
+    def validate_row(self, row):
+        """Typed record and the list of every problem with one input row"""
+        record, errors = {}, []
+
+        for name in FLOAT_FIELDS + INTEGER_FIELDS:
+            try:
+                record[name] = parse_number(row.get(name), integer=name in INTEGER_FIELDS)
+            except (ValueError, TypeError):
+                record[name] = None
+                errors.append(f"{name} must be {'an integer' if name in INTEGER_FIELDS else 'a number'}")
+        for name in STRING_FIELDS:
+            record[name] = parse_string(row.get(name))
+
+        for name in REQUIRED_FIELDS:
+            if record[name] is None and not any(error.startswith(name) for error in errors):
+                errors.append(f"{name} is required")
+
+        if record['loan_amount'] is not None and not validate_loan_amount(record['loan_amount']):
+            errors.append("loan_amount must be between 1,000 and 100,000,000")
+        if record['loan_term_months'] is not None and record['loan_term_months'] <= 0:
+            errors.append("loan_term_months must be positive")
+        if record['credit_score'] is not None and not validate_credit_score(record['credit_score']):
+            errors.append("credit_score must be between 300 and 850")
+        for name in PERCENTAGE_FIELDS:
+            if record[name] is not None and not validate_percentage(record[name]):
+                errors.append(f"{name} must be between 0 and 100")
+        if record['country_code'] is not None and not validate_country_code(record['country_code']):
+            errors.append("country_code must be three letters")
+
+        record['country'] = record['country'] or 'Unknown'
+        if record['year'] is None:
+            record['year'] = datetime.now().year
+        return record, errors
+
+    def score_records(self, records):
+        """Fill scores, approval and metadata into validated records in place; returns the feature matrix"""
+        columns = {
+            name: np.array([record[name] for record in records], dtype=np.float64)
+            for name in FLOAT_FIELDS + INTEGER_FIELDS
+        }
+        columns['energy_efficiency_rating'] = np.array(
+            [record['energy_efficiency_rating'] for record in records], dtype=object
+        )
+        scores = {name: values.tolist() for name, values in self.origination.score_columns(columns).items()}
+
+        now = datetime.utcnow()
+        for row, record in enumerate(records):
+            approved = scores['loan_approved'][row]
+            record.update({
+                'loan_id': generate_loan_id(),
+                'financial_health_score': scores['financial_health_score'][row],
+                'esg_composite_score': scores['esg_composite_score'][row],
+                'combined_credit_score': scores['combined_credit_score'][row],
+                'loan_approved': approved,
+                'processing_status': 'Approved' if approved else 'Rejected',
+                'application_date': now,
+                'created_at': now,
+                'updated_at': now
+            })
+
+        return np.column_stack([columns[name] for name in FEATURE_NAMES])
+
+    def assign_loan_ids(self, records):
+        """Give a fresh loan_id to records whose id repeats in the chunk or is already taken; returns how many"""
+        ids = [record['loan_id'] for record in records]
+        taken = set()
+        for start in range(0, len(ids), LOAN_ID_QUERY_SIZE):
+            taken.update(
+                loan_id for (loan_id,) in db.session.query(LoanApplication.loan_id).filter(
+                    LoanApplication.loan_id.in_(ids[start:start + LOAN_ID_QUERY_SIZE])
+                )
+            )
+
+        reassigned = 0
+        seen = set()
+        for record in records:
+            while record['loan_id'] in taken or record['loan_id'] in seen:
+                record['loan_id'] = generate_loan_id()
+                reassigned += 1
+            seen.add(record['loan_id'])
+        return reassigned
+
+    def insert_records(self, records):
+        """Insert records in the current transaction, retrying with fresh ids if a loan_id collides
+
+        Each attempt runs in a savepoint so a duplicate key only undoes that
+        attempt. A failure with no colliding id is not an id problem and is
+        raised as it is.
+        """
+        for attempt in range(1, LOAN_ID_ATTEMPTS + 1):
+            try:
+                with db.session.begin_nested():
+                    self._insert(records)
+                return
+            except Exception:
+                if attempt == LOAN_ID_ATTEMPTS or not self.assign_loan_ids(records):
+                    raise
+                logger.warning(f"loan_id collision inserting {len(records)} applications; retrying with fresh ids")
+
+    def _insert(self, records):
+        """COPY on PostgreSQL, one executemany elsewhere"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for record in records:
+                writer.writerow(['' if record[name] is None else record[name] for name in INSERT_COLUMNS])
+            buffer.seek(0)
+
+            cursor = db.session.connection().connection.cursor()
+            cursor.copy_expert(
+                f"COPY {LoanApplication.__tablename__} ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        else:
+            db.session.execute(LoanApplication.__table__.insert(), records)
+
+    def load_progress(self, job_id):
+        try:
+            with open(os.path.join(self.job_directory(job_id), PROGRESS_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_progress(self, progress):
+        path = os.path.join(self.job_directory(progress['job_id']), PROGRESS_FILE)
+        progress['updated_at'] = datetime.utcnow().isoformat()
+        with open(path + '.tmp', 'w') as f:
+            json.dump(progress, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def recover(self, progress):
+        """Settle a chunk that was in flight when the previous run stopped"""
+        pending = progress.get('pending')
+        if not pending:
+            return
+
+        committed = pending['first_loan_id'] is not None and db.session.query(
+            LoanApplication.query.filter_by(loan_id=pending['first_loan_id']).exists()
+        ).scalar()
+
+        if committed:
+            self.apply_chunk(progress, pending)
+        else:
+            # Drop error lines written for the chunk that never committed
+            with open(os.path.join(self.job_directory(progress['job_id']), ERRORS_FILE), 'a') as f:
+                f.truncate(pending['errors_offset'])
+        progress['pending'] = None
+        logger.info(f"Ingest job {progress['job_id']}: chunk ending at row {pending['last_row']} "
+                    f"{'was' if committed else 'was not'} committed before the last run stopped")
+
+    def apply_chunk(self, progress, chunk):
+        progress['last_row'] = chunk['last_row']
+        for name in ('inserted', 'rejected', 'approved'):
+            progress[name] += chunk[name]
+
+    def ingest(self, stream, data_format='csv', job_id=None):
+        """Ingest a stream of applications as a new job, or resume job_id where it stopped"""
+        job_id = job_id or uuid.uuid4().hex[:12]
+        directory = self.job_directory(job_id)
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, LOCK_FILE), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise ValueError(f"Ingest job {job_id} is already running")
+
+            try:
+                progress = self.load_progress(job_id) or {
+                    'job_id': job_id,
+                    'format': data_format,
+                    'status': 'running',
+                    'last_row': 0,
+                    'inserted': 0,
+                    'rejected': 0,
+                    'approved': 0,
+                    'pending': None,
+                    'started_at': datetime.utcnow().isoformat()
+                }
+                if progress['format'] != data_format:
+                    raise ValueError(f"Ingest job {job_id} was started as {progress['format']}")
+                if progress['status'] == 'completed':
+                    return {**progress, 'resumed': True, 'run': None}
+
+                resumed = progress['last_row'] > 0 or progress['pending'] is not None
+                self.recover(progress)
+                progress['status'] = 'running'
+                progress.pop('error', None)
+                self.save_progress(progress)
+
+                return self._run(progress, stream, data_format, resumed)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _run(self, progress, stream, data_format, resumed):
+        errors_path = os.path.join(self.job_directory(progress['job_id']), ERRORS_FILE)
+        run = {'rows_read': 0, 'skipped': 0, 'inserted': 0, 'rejected': 0, 'approved': 0}
+        error_preview = []
+        start = time.perf_counter()
+
+        def flush(chunk):
+            records, errors = [], []
+            for row_number, row, parse_error in chunk:
+                if parse_error:
+                    errors.append({'row': row_number, 'errors': [parse_error]})
+                    continue
+                record, row_errors = self.validate_row(row)
+                if row_errors:
+                    errors.append({'row': row_number, 'errors': row_errors})
+                else:
+                    records.append(record)
+
+            features = self.score_records(records) if records else None
+            pending = {
+                'last_row': chunk[-1][0],
+                'first_loan_id': records[0]['loan_id'] if records else None,
+                'errors_offset': os.path.getsize(errors_path) if os.path.exists(errors_path) else 0,
+                'inserted': len(records),
+                'rejected': len(errors),
+                'approved': sum(record['loan_approved'] for record in records)
+            }
+            progress['pending'] = pending
+            self.save_progress(progress)
+
+            if errors:
+                with open(errors_path, 'a') as f:
+                    f.writelines(json.dumps(error) + '\n' for error in errors)
+            if records:
+                self.insert_records(records)
+                if records[0]['loan_id'] != pending['first_loan_id']:
+                    # A retry renamed the row recover() looks for
+                    pending['first_loan_id'] = records[0]['loan_id']
+                    self.save_progress(progress)
+                db.session.commit()
+
+            self.apply_chunk(progress, pending)
+            progress['pending'] = None
+            self.save_progress(progress)
+
+            for name in ('inserted', 'rejected', 'approved'):
+                run[name] += pending[name]
+            error_preview.extend(errors[:max(0, Config.BULK_INGEST_ERROR_PREVIEW - len(error_preview))])
+            if features is not None:
+                drift_monitor.update_batch(features)
+
+        try:
+            chunk = []
+            for row_number, row, parse_error in self.read_rows(stream, data_format):
+                run['rows_read'] += 1
+                if row_number <= progress['last_row']:
+                    run['skipped'] += 1
+                    continue
+                chunk.append((row_number, row, parse_error))
+                if len(chunk) >= self.chunk_size:
+                    flush(chunk)
+                    chunk = []
+            if chunk:
+                flush(chunk)
+
+            progress['status'] = 'completed'
+            progress['completed_at'] = datetime.utcnow().isoformat()
+            self.save_progress(progress)
+
+        except Exception as e:
+            db.session.rollback()
+            progress['status'] = 'failed'
+            progress['error'] = str(e)
+            self.save_progress(progress)
+            logger.error(f"Error ingesting loan applications (job {progress['job_id']}): {str(e)}")
+            raise
+
+        seconds = time.perf_counter() - start
+        processed = run['rows_read'] - run['skipped']
+        logger.info(
+            f"Ingest job {progress['job_id']}: {run['inserted']} inserted, {run['rejected']} rejected, "
+            f"{run['skipped']} already done, {processed / seconds if seconds else 0:,.0f} rows/sec"
+        )
+        return {
+            **progress,
+            'resumed': resumed,
+            'run': {**run, 'seconds': seconds, 'rows_per_sec': processed / seconds if seconds else None},
+            'errors_path': errors_path,
+            'errors': error_preview
+        }
+
+    def job_status(self, job_id, error_offset=0, error_limit=None):
+        """Progress of a job and a page of its row errors; None for an unknown job"""
+        progress = self.load_progress(job_id)
+        if progress is None:
+            return None
+
+        error_limit = Config.BULK_INGEST_ERROR_PREVIEW if error_limit is None else error_limit
+        errors = []
+        errors_path = os.path.join(self.job_directory(job_id), ERRORS_FILE)
+        if os.path.exists(errors_path):
+            with open(errors_path) as f:
+                for line_number, line in enumerate(f):
+                    if line_number >= error_offset + error_limit:
+                        break
+                    if line_number >= error_offset:
+                        errors.append(json.loads(line))
+
+        return {**progress, 'errors': errors}
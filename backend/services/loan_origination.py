@@ -1,16 +1,50 @@
-import uuid
 import numpy as np
 from datetime import datetime
 import logging
 from backend.database.models import db, LoanApplication
-from backend.models.credit_scoring import CreditScoringModel
+from backend.models.model_store import model_store
+from backend.models.drift_monitor import drift_monitor
+from backend.utils.helpers import generate_loan_id
+from config.settings import Config
 
 logger = logging.getLogger(__name__)
 
 class LoanOriginationService:
     
-    def __init__(self):
-        self.credit_model = CreditScoringModel()
+    # Combined score weights and approval thresholds, shared by the per-loan and array scoring
+    FINANCIAL_WEIGHT = 0.6
+    ESG_WEIGHT = 0.4
+    MIN_COMBINED_SCORE = 60
+    MIN_CREDIT_SCORE = 620
+    MAX_DEBT_TO_INCOME = 0.65
+    MIN_ESG_SCORE = 40
+    ENERGY_RATINGS = {'A': 100, 'B': 80, 'C': 60, 'D': 40, 'E': 20}
+    
+    @property
+    def credit_model(self):
+        return model_store.get()
+    
+    def get_model_status(self):
+        """Loaded models, their version, prediction cache and shadow counters for this worker"""
+        model_store.get()
+        return {**model_store.stats(), 'registry': model_store.registry.describe()}
+    
+    def activate_model_version(self, version):
+        """Point every worker at a registered version; each swaps it in on its next poll"""
+        model_store.registry.activate(version)
+        return model_store.registry.describe()
+    
+    def set_shadow_model(self, version, sample_rate):
+        """Score a sampled share of traffic with a candidate version, or stop when version is None"""
+        if version is None:
+            model_store.registry.clear_shadow()
+        else:
+            model_store.registry.set_shadow(version, float(sample_rate))
+        return model_store.registry.describe()
+    
+    def get_drift_report(self):
+        """Drift of recent applications' features from the training data, as seen by this worker"""
+        return drift_monitor.report()
     
     def calculate_financial_health_score(self, loan_data):
         """Calculate financial health score from borrower data"""
@@ -66,8 +100,7 @@ class LoanOriginationService:
             governance_score = loan_data.get('governance_score', 50)
             
             # Energy rating mapping
-            rating_map = {'A': 100, 'B': 80, 'C': 60, 'D': 40, 'E': 20}
-            energy_numeric = rating_map.get(energy_rating, 60)
+            energy_numeric = self.ENERGY_RATINGS.get(energy_rating, 60)
             
             # Calculate composite
             esg_score = (
@@ -85,22 +118,81 @@ class LoanOriginationService:
             logger.error(f"Error calculating ESG score: {str(e)}")
             return 50
     
+    def calculate_financial_health_scores(self, columns):
+        """Array form of calculate_financial_health_score over a dict of columns
+        
+        NaN takes the same default as a missing key in the per-loan version.
+        """
+        credit_score = np.nan_to_num(columns['credit_score'], nan=650)
+        dti_ratio = np.nan_to_num(columns['debt_to_income_ratio'], nan=0.4)
+        annual_revenue = np.nan_to_num(columns['annual_revenue'], nan=0)
+        loan_amount = np.nan_to_num(columns['loan_amount'], nan=0)
+        years_in_business = np.nan_to_num(columns['years_in_business'], nan=5)
+        
+        score = 50 + np.select(
+            [credit_score >= 800, credit_score >= 750, credit_score >= 700, credit_score >= 650],
+            [25, 20, 15, 10], 5
+        )
+        score = score - dti_ratio * 30
+        
+        covered = (loan_amount > 0) & (annual_revenue > 0)
+        coverage = np.divide(annual_revenue, loan_amount, out=np.zeros_like(annual_revenue), where=covered)
+        score = score + np.where(covered, np.minimum(coverage * 10, 25), 0)
+        
+        score = score + np.select([years_in_business >= 10, years_in_business >= 5], [10, 5], 0)
+        return np.clip(score, 0, 100)
+    
+    def calculate_esg_composite_scores(self, columns):
+        """Array form of calculate_esg_composite_score over a dict of columns"""
+        ratings = columns['energy_efficiency_rating']
+        energy_numeric = np.full(len(ratings), 60.0)
+        for rating, value in self.ENERGY_RATINGS.items():
+            energy_numeric[ratings == rating] = value
+        
+        esg_score = (
+            (np.nan_to_num(columns['carbon_reduction_target_pct'], nan=0) / 60 * 25) +
+            (np.nan_to_num(columns['renewable_energy_pct'], nan=0) / 100 * 25) +
+            (energy_numeric / 100 * 20) +
+            (np.nan_to_num(columns['environmental_certifications'], nan=0) / 5 * 10) +
+            (np.nan_to_num(columns['social_impact_score'], nan=50) / 100 * 10) +
+            (np.nan_to_num(columns['governance_score'], nan=50) / 100 * 10)
+        )
+        return np.clip(esg_score, 0, 100)
+    
+    def score_columns(self, columns):
+        """Financial, ESG and combined scores and approvals for columns of many loans"""
+        financial_score = self.calculate_financial_health_scores(columns)
+        esg_score = self.calculate_esg_composite_scores(columns)
+        combined_score = financial_score * self.FINANCIAL_WEIGHT + esg_score * self.ESG_WEIGHT
+        approved = (
+            (combined_score > self.MIN_COMBINED_SCORE) &
+            (np.nan_to_num(columns['credit_score'], nan=0) > self.MIN_CREDIT_SCORE) &
+            (np.nan_to_num(columns['debt_to_income_ratio'], nan=1) < self.MAX_DEBT_TO_INCOME) &
+            (esg_score > self.MIN_ESG_SCORE)
+        )
+        return {
+            'financial_health_score': financial_score,
+            'esg_composite_score': esg_score,
+            'combined_credit_score': combined_score,
+            'loan_approved': approved
+        }
+    
     def create_loan_application(self, loan_data):
         """Create new loan application"""
         try:
-            loan_id = f"GL{str(uuid.uuid4())[:8].upper()}"
+            loan_id = generate_loan_id()
             
             # Calculate scores
             financial_score = self.calculate_financial_health_score(loan_data)
             esg_score = self.calculate_esg_composite_score(loan_data)
-            combined_score = financial_score * 0.6 + esg_score * 0.4
+            combined_score = financial_score * self.FINANCIAL_WEIGHT + esg_score * self.ESG_WEIGHT
             
             # Determine approval
             approved = (
-                combined_score > 60 and
-                loan_data.get('credit_score', 0) > 620 and
-                loan_data.get('debt_to_income_ratio', 1) < 0.65 and
-                esg_score > 40
+                combined_score > self.MIN_COMBINED_SCORE and
+                loan_data.get('credit_score', 0) > self.MIN_CREDIT_SCORE and
+                loan_data.get('debt_to_income_ratio', 1) < self.MAX_DEBT_TO_INCOME and
+                esg_score > self.MIN_ESG_SCORE
             )
             
             # Create application
@@ -136,6 +228,7 @@ class LoanOriginationService:
             
             db.session.add(application)
             db.session.commit()
+            drift_monitor.update(loan_data)
             
             logger.info(f"Loan application {loan_id} created - Status: {application.processing_status}")
             
@@ -153,6 +246,119 @@ class LoanOriginationService:
             logger.error(f"Error creating loan application: {str(e)}")
             raise
     
+    def application_features(self, model, applications):
+        """Feature matrix of application dicts in the model's feature order"""
+        feature_names = model.feature_names
+        features = np.array([
+            [application.get(name) for name in feature_names]
+            for application in applications
+        ], dtype=float).reshape(len(applications), len(feature_names))
+        
+        missing = np.isnan(features).any(axis=1)
+        if missing.any():
+            raise ValueError(
+                f"Applications missing model features at rows {np.flatnonzero(missing)[:10].tolist()}"
+            )
+        return features
+    
+    def score_applications(self, applications, model_name='xgboost'):
+        """Score many applications with one model call, or every model for 'ensemble'"""
+        try:
+            if len(applications) > Config.SCORING_BATCH_MAX_ROWS:
+                raise ValueError(f"At most {Config.SCORING_BATCH_MAX_ROWS} applications per request")
+            if not applications:
+                return {'model_used': model_name, 'count': 0, 'scores': []}
+            
+            # One model for the whole request, even if a new version is swapped in meanwhile
+            model = self.credit_model
+            features = self.application_features(model, applications)
+            
+            if model_name == 'ensemble':
+                result = model.predict_ensemble(features)
+            else:
+                result = model.predict_batch(features, model_name, cached=True)
+            model_store.shadow(features, model_name, result['probability_approved'])
+            
+            scores = [
+                {
+                    'loan_id': application.get('loan_id'),
+                    'prediction': int(prediction),
+                    'probability_approved': float(probability_approved),
+                    'probability_rejected': float(probability_rejected)
+                }
+                for application, prediction, probability_approved, probability_rejected in zip(
+                    applications,
+                    result['predictions'],
+                    result['probability_approved'],
+                    result['probability_rejected']
+                )
+            ]
+            
+            if 'model_probabilities' in result:
+                for row, score in enumerate(scores):
+                    score['model_probabilities'] = {
+                        name: float(probabilities[row])
+                        for name, probabilities in result['model_probabilities'].items()
+                    }
+            
+            response = {
+                'model_used': model_name,
+                'count': len(applications),
+                'scores': scores
+            }
+            if 'weights' in result:
+                response['weights'] = result['weights']
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error scoring applications: {str(e)}")
+            raise
+    
+    def explain_applications(self, applications, model_name='xgboost', top_k=3):
+        """Top-k reason codes for a batch of applications from one model"""
+        try:
+            if len(applications) > Config.SCORING_BATCH_MAX_ROWS:
+                raise ValueError(f"At most {Config.SCORING_BATCH_MAX_ROWS} applications per request")
+            if model_name == 'ensemble':
+                raise ValueError("Reasons come from a single model, not the ensemble")
+            if int(top_k) < 1:
+                raise ValueError("top_k must be at least 1")
+            if not applications:
+                return {'model_used': model_name, 'count': 0, 'explanations': []}
+            
+            model = self.credit_model
+            features = self.application_features(model, applications)
+            explanations = model.explain_batch(
+                features, model_name, [application.get('loan_id') for application in applications], int(top_k)
+            )
+            
+            return {
+                'model_used': model_name,
+                'model_version': model_store.active_version,
+                'count': len(explanations),
+                'explanations': explanations
+            }
+            
+        except Exception as e:
+            logger.error(f"Error explaining applications: {str(e)}")
+            raise
+    
+    def get_application_reasons(self, loan_id, model_name='xgboost', top_k=3):
+        """Reason codes for a stored application, or None if it does not exist"""
+        application = LoanApplication.query.filter_by(loan_id=loan_id).first()
+        if not application:
+            return None
+        
+        loan_data = {name: getattr(application, name) for name in self.credit_model.feature_names}
+        loan_data['loan_id'] = loan_id
+        result = self.explain_applications([loan_data], model_name, top_k)
+        return {
+            'model_used': result['model_used'],
+            'model_version': result['model_version'],
+            **result['explanations'][0]
+        }
+    
     def get_application(self, loan_id):
         """Retrieve loan application"""
         try:
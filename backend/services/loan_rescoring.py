@@ -0,0 +1,264 @@
+import io
+import os
+import csv
+import json
+import time
+from datetime import datetime
+import numpy as np
+import logging
+from sqlalchemy import bindparam, select, text
+from backend.database.models import db, LoanApplication
+from backend.services.loan_origination import LoanOriginationService
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_INPUTS = [
+    'credit_score', 'debt_to_income_ratio', 'annual_revenue', 'loan_amount', 'years_in_business',
+    'carbon_reduction_target_pct', 'renewable_energy_pct', 'environmental_certifications',
+    'social_impact_score', 'governance_score'
+]
+SCORE_COLUMNS = ['financial_health_score', 'esg_composite_score', 'combined_credit_score']
+# Statuses that only record the scoring decision; later lifecycle statuses are left alone
+DECISION_STATUSES = ('Approved', 'Rejected')
+
+class LoanRescoringService:
+    """Recompute the stored scores and approvals of every loan with the current formulas
+
+    The book is read in id-keyset batches of plain column tuples and scored
+    with the array forms of the LoanOriginationService scores. Only loans
+    whose scores or approval changed are written, one bulk UPDATE per batch
+    (through a COPY-loaded temporary table on PostgreSQL). A loan modified
+    after its batch was read is skipped rather than overwritten.
+    """
+
+    def __init__(self, batch_size=None, directory=None, tolerance=None):
+        self.batch_size = batch_size or Config.RESCORING_BATCH_SIZE
+        self.directory = directory or Config.RESCORING_PATH
+        self.tolerance = Config.RESCORING_TOLERANCE if tolerance is None else tolerance
+        self.origination = LoanOriginationService()
+
+    def iter_batches(self):
+        """Yield dicts of column arrays, batch_size loans at a time in id order"""
+        names = (
+            ['id', 'loan_id', 'updated_at', 'energy_efficiency_rating', 'loan_approved', 'processing_status']
+            + NUMERIC_INPUTS + SCORE_COLUMNS
+        )
+        # Core select on the table: tuples straight from the driver, no ORM row processing
+        table = LoanApplication.__table__
+        columns = [table.c[name] for name in names]
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(*columns).where(table.c.id > last_id).order_by(table.c.id).limit(self.batch_size)
+            ).fetchall()
+            if not rows:
+                break
+
+            values = dict(zip(names, zip(*rows)))
+            batch = {name: np.array(values[name], dtype=np.float64) for name in NUMERIC_INPUTS + SCORE_COLUMNS}
+            batch['id'] = np.array(values['id'], dtype=np.int64)
+            batch['loan_approved'] = np.array([bool(value) for value in values['loan_approved']])
+            for name in ('loan_id', 'updated_at', 'energy_efficiency_rating', 'processing_status'):
+                batch[name] = np.array(values[name], dtype=object)
+
+            yield batch
+            last_id = int(batch['id'][-1])
+
+    def diff(self, batch, scores):
+        """Masks of loans whose scores moved beyond the tolerance and whose approval flipped"""
+        moved = np.zeros(len(batch['id']), dtype=bool)
+        for name in SCORE_COLUMNS:
+            old = batch[name]
+            moved |= np.isnan(old) | (np.abs(scores[name] - old) > self.tolerance)
+
+        flipped = scores['loan_approved'] != batch['loan_approved']
+        return moved | flipped, flipped
+
+    def write_changes(self, batch, scores, changed, now):
+        """Bulk update the changed loans in the current transaction; returns the ids actually updated
+
+        Loans modified since the batch was read fail the updated_at check
+        and are left out.
+        """
+        positions = np.flatnonzero(changed)
+        statuses = np.where(
+            np.isin(batch['processing_status'][positions], DECISION_STATUSES),
+            np.where(scores['loan_approved'][positions], 'Approved', 'Rejected'),
+            batch['processing_status'][positions]
+        )
+        updates = [
+            {
+                'row_id': row_id,
+                'read_updated_at': read_updated_at,
+                'financial_health_score': financial,
+                'esg_composite_score': esg,
+                'combined_credit_score': combined,
+                'loan_approved': approved,
+                'processing_status': status
+            }
+            for row_id, read_updated_at, financial, esg, combined, approved, status in zip(
+                batch['id'][positions].tolist(),
+                batch['updated_at'][positions],
+                scores['financial_health_score'][positions].tolist(),
+                scores['esg_composite_score'][positions].tolist(),
+                scores['combined_credit_score'][positions].tolist(),
+                scores['loan_approved'][positions].tolist(),
+                statuses.tolist()
+            )
+        ]
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return self._write_changes_postgresql(updates, now)
+
+        table = LoanApplication.__table__
+        statement = table.update().where(
+            table.c.id == bindparam('row_id'),
+            table.c.updated_at == bindparam('read_updated_at')
+        ).values(
+            financial_health_score=bindparam('financial_health_score'),
+            esg_composite_score=bindparam('esg_composite_score'),
+            combined_credit_score=bindparam('combined_credit_score'),
+            loan_approved=bindparam('loan_approved'),
+            processing_status=bindparam('processing_status'),
+            updated_at=now
+        )
+        db.session.execute(statement, updates)
+
+        # executemany only reports a total, so read back which rows carry this batch's timestamp
+        row_ids = [update['row_id'] for update in updates]
+        written = []
+        for start in range(0, len(row_ids), self.batch_size):
+            written.extend(db.session.execute(
+                select(table.c.id).where(
+                    table.c.id.in_(row_ids[start:start + self.batch_size]),
+                    table.c.updated_at == now
+                )
+            ).scalars())
+        return np.array(written, dtype=np.int64)
+
+    def _write_changes_postgresql(self, updates, now):
+        connection = db.session.connection()
+        connection.execute(text(
+            "CREATE TEMP TABLE rescored_loans ("
+            "row_id integer, read_updated_at timestamp, financial_health_score double precision, "
+            "esg_composite_score double precision, combined_credit_score double precision, "
+            "loan_approved boolean, processing_status varchar(50)) ON COMMIT DROP"
+        ))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for update in updates:
+            writer.writerow(['' if value is None else value for value in update.values()])
+        buffer.seek(0)
+        connection.connection.cursor().copy_expert("COPY rescored_loans FROM STDIN WITH (FORMAT csv)", buffer)
+
+        return np.array(connection.execute(text(
+            f"UPDATE {LoanApplication.__tablename__} AS loans SET "
+            "financial_health_score = r.financial_health_score, esg_composite_score = r.esg_composite_score, "
+            "combined_credit_score = r.combined_credit_score, loan_approved = r.loan_approved, "
+            "processing_status = r.processing_status, updated_at = :now "
+            "FROM rescored_loans AS r WHERE loans.id = r.row_id AND loans.updated_at = r.read_updated_at "
+            "RETURNING loans.id"
+        ), {'now': now}).scalars().all(), dtype=np.int64)
+
+    def rescore(self, dry_run=False):
+        """Rescore the whole book, write the changes unless dry_run, and return a diff summary
+
+        The summary and a CSV of every loan whose approval flipped are kept
+        under RESCORING_PATH/<run id>. Flips and approval counts cover the
+        loans actually written; loans skipped because they were modified
+        meanwhile keep their stored approval and are counted in
+        skipped_flips when their approval would have flipped.
+        """
+        run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S_%f')
+        directory = os.path.join(self.directory, run_id)
+        os.makedirs(directory, exist_ok=True)
+        flips_path = os.path.join(directory, 'flipped_approvals.csv')
+
+        summary = {
+            'run_id': run_id,
+            'dry_run': dry_run,
+            'loans': 0,
+            'changed': 0,
+            'updated': 0,
+            'skipped_modified': 0,
+            'skipped_flips': 0,
+            'approved_before': 0,
+            'approved_after': 0,
+            'flipped_to_approved': 0,
+            'flipped_to_rejected': 0,
+            'max_abs_combined_change': 0.0
+        }
+        total_abs_change = 0.0
+        preview = []
+        start = time.perf_counter()
+
+        try:
+            with open(flips_path, 'w', newline='') as flips_file:
+                flips = csv.writer(flips_file)
+                flips.writerow(['loan_id', 'old_combined_credit_score', 'new_combined_credit_score', 'old_approved', 'new_approved'])
+
+                for batch in self.iter_batches():
+                    scores = self.origination.score_columns(batch)
+                    changed, flipped = self.diff(batch, scores)
+
+                    written = changed
+                    if changed.any() and not dry_run:
+                        written = np.isin(batch['id'], self.write_changes(batch, scores, changed, datetime.utcnow()))
+                        db.session.commit()
+                        summary['updated'] += int(written.sum())
+                        summary['skipped_modified'] += int((changed & ~written).sum())
+                        summary['skipped_flips'] += int((flipped & ~written).sum())
+                        flipped = flipped & written
+
+                    summary['loans'] += len(batch['id'])
+                    summary['changed'] += int(changed.sum())
+                    summary['approved_before'] += int(batch['loan_approved'].sum())
+                    summary['approved_after'] += int(np.where(written, scores['loan_approved'], batch['loan_approved']).sum())
+                    summary['flipped_to_approved'] += int((flipped & scores['loan_approved']).sum())
+                    summary['flipped_to_rejected'] += int((flipped & ~scores['loan_approved']).sum())
+
+                    change = np.abs(np.nan_to_num(scores['combined_credit_score'] - batch['combined_credit_score']))
+                    total_abs_change += float(change.sum())
+                    summary['max_abs_combined_change'] = max(summary['max_abs_combined_change'], float(change.max()))
+
+                    rows = [
+                        [loan_id, old, new, bool(old_approved), bool(new_approved)]
+                        for loan_id, old, new, old_approved, new_approved in zip(
+                            batch['loan_id'][flipped],
+                            batch['combined_credit_score'][flipped].tolist(),
+                            scores['combined_credit_score'][flipped].tolist(),
+                            batch['loan_approved'][flipped],
+                            scores['loan_approved'][flipped]
+                        )
+                    ]
+                    flips.writerows(rows)
+                    preview.extend(rows[:max(0, Config.RESCORING_FLIP_PREVIEW - len(preview))])
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rescoring loans: {str(e)}")
+            raise
+
+        seconds = time.perf_counter() - start
+        summary.update({
+            'mean_abs_combined_change': total_abs_change / summary['loans'] if summary['loans'] else 0.0,
+            'seconds': seconds,
+            'loans_per_sec': summary['loans'] / seconds if seconds else None,
+            'flipped_approvals_path': flips_path,
+            'flipped_preview': [
+                dict(zip(['loan_id', 'old_combined_credit_score', 'new_combined_credit_score', 'old_approved', 'new_approved'], row))
+                for row in preview
+            ]
+        })
+        with open(os.path.join(directory, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(
+            f"Rescored {summary['loans']} loans in {seconds:.2f}s: {summary['changed']} changed, "
+            f"{summary['flipped_to_approved']} newly approved, {summary['flipped_to_rejected']} newly rejected"
+            + (" (dry run)" if dry_run else f", {summary['updated']} updated")
+        )
+        return summary
@@ -0,0 +1,126 @@
+import os
+import numpy as np
+from datetime import datetime
+import logging
+from backend.database.feature_store import FeatureStore
+from backend.models.credit_scoring import CreditScoringModel
+from backend.models.drift_monitor import baseline_path, load_baseline, extend_baseline, write_baseline
+from backend.models.evaluation import ModelEvaluator
+from backend.models.model_registry import ModelRegistry
+from backend.models.training_pipeline import IncrementalTrainer
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+class ModelRetrainingService:
+
+    def __init__(self, model_path=None, feature_store_path=None):
+        self.registry = ModelRegistry(model_path)
+        self.feature_store = FeatureStore(feature_store_path)
+
+    def load_previous_model(self):
+        """The latest registered version, or the unversioned artifacts in MODEL_PATH
+
+        Returns (version, model, metadata); version is None for the unversioned models.
+        """
+        version = self.registry.latest_version()
+        if version:
+            return version, self.registry.load_version(version), self.registry.load_metadata(version)
+
+        model = CreditScoringModel()
+        model.model_path = self.registry.model_path
+        model.load_models()
+        if not model.models:
+            raise ValueError("No trained models to extend; run scripts/train_models.py first")
+
+        return None, model, {}
+
+    def fetch_applications(self, since=None):
+        """Features and approval labels of applications dated after `since`, oldest first
+
+        Refreshes the feature store, which reads only loans changed since its
+        watermark, and selects the rows from the published snapshot.
+        """
+        self.feature_store.refresh()
+        snapshot = self.feature_store.load()
+        if snapshot.feature_names != CreditScoringModel().feature_names:
+            raise ValueError("Feature store columns do not match the credit model features")
+        return self.feature_store.applications_since(snapshot, since)
+
+    def save_drift_baseline(self, parent, version, X_train):
+        """Give the new version its parent's drift baseline plus the rows it was extended with"""
+        path = baseline_path(self.registry.version_path(parent) if parent else self.registry.model_path)
+        if not os.path.exists(path):
+            path = baseline_path(self.registry.model_path)
+        if not os.path.exists(path):
+            logger.warning(f"No drift baseline to extend for {version}")
+            return
+        write_baseline(extend_baseline(load_baseline(path), X_train), self.registry.version_path(version))
+
+    def retrain_incremental(self, promote=False, min_rows=None, holdout_fraction=None):
+        """Extend the latest models with applications since their watermark and register a new version
+
+        The newest applications are held out to compare the new version with
+        its parent. The watermark only advances past the rows trained on, so
+        held-out rows are trained on by the next run.
+        """
+        try:
+            min_rows = min_rows or Config.INCREMENTAL_MIN_ROWS
+            holdout_fraction = Config.INCREMENTAL_HOLDOUT_FRACTION if holdout_fraction is None else holdout_fraction
+
+            parent, previous, parent_metadata = self.load_previous_model()
+            since = parent_metadata.get('watermark')
+            since = datetime.fromisoformat(since) if since else None
+
+            dates, X, y = self.fetch_applications(since)
+            if len(X) < min_rows:
+                logger.info(f"Only {len(X)} new applications since {since}, need {min_rows}; not retraining")
+                return {'status': 'skipped', 'parent': parent, 'new_rows': len(X), 'watermark': parent_metadata.get('watermark')}
+
+            # Split on a date boundary so the watermark never falls inside a run of equal dates
+            cut = max(1, len(X) - int(len(X) * holdout_fraction))
+            cut = int(np.searchsorted(dates, dates[cut - 1], side='right'))
+            X_train, y_train = X[:cut], y[:cut]
+            X_holdout, y_holdout = X[cut:], y[cut:]
+            watermark = dates[cut - 1].astype(datetime)
+
+            model, training = IncrementalTrainer().run(previous, X_train, y_train)
+            version = self.registry.create_version(model, {
+                'mode': 'incremental',
+                'parent': parent,
+                'watermark': watermark.isoformat(),
+                'training_rows': len(X_train),
+                'holdout_rows': len(X_holdout),
+                'training': training
+            })
+
+            self.save_drift_baseline(parent, version, X_train)
+
+            comparison = None
+            if len(X_holdout) and len(np.unique(y_holdout)) == 2:
+                previous_report = ModelEvaluator(previous).evaluate(X_holdout, y_holdout)
+                report = ModelEvaluator(model).evaluate(X_holdout, y_holdout)
+                comparison = ModelEvaluator(model).compare(previous_report, report)
+                self.registry.update_metadata(version, evaluation=report['models'], comparison=comparison)
+            else:
+                logger.warning("Holdout lacks both outcomes, new version not compared with its parent")
+
+            if promote:
+                self.registry.activate(version)
+
+            return {
+                'status': 'created',
+                'version': version,
+                'parent': parent,
+                'new_rows': len(X),
+                'training_rows': len(X_train),
+                'holdout_rows': len(X_holdout),
+                'watermark': watermark.isoformat(),
+                'training': training,
+                'comparison': comparison,
+                'promoted': promote
+            }
+
+        except Exception as e:
+            logger.error(f"Error retraining models incrementally: {str(e)}")
+            raise
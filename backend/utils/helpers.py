@@ -2,8 +2,8 @@ import uuid
 from datetime import datetime, timedelta
 
 def generate_loan_id():
-    """Generate unique loan ID"""
-    return f"GL{str(uuid.uuid4())[:8].upper()}"
+    """Generate unique loan ID (64 random bits, so bulk loads of millions of rows don't collide)"""
+    return f"GL{uuid.uuid4().hex[:16].upper()}"
 
 def generate_document_id():
     """Generate unique document ID"""
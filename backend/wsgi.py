@@ -0,0 +1,10 @@
+import os
+from backend.app import create_app
+from backend.models.model_store import model_store
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
+
+# Imported once in the gunicorn master when preload_app is set, so the
+# models are loaded before workers fork and shared copy-on-write
+model_store.load()
+model_store.freeze()
@@ -33,6 +33,72 @@ class Config:
     
     # Model Configuration
     MODEL_PATH = os.path.join(BASE_DIR, 'data', 'models')
+    SCORING_BATCH_MAX_ROWS = int(os.getenv('SCORING_BATCH_MAX_ROWS', 10000))
+    ENSEMBLE_WORKERS = int(os.getenv('ENSEMBLE_WORKERS', 4))
+    TRAINING_CORES = int(os.getenv('TRAINING_CORES', os.cpu_count() or 1))
+    TRAINING_MAX_PARALLEL = int(os.getenv('TRAINING_MAX_PARALLEL', 4))
+    TRAINING_VALIDATION_FRACTION = float(os.getenv('TRAINING_VALIDATION_FRACTION', 0.1))
+    TRAINING_EARLY_STOPPING_ROUNDS = int(os.getenv('TRAINING_EARLY_STOPPING_ROUNDS', 10))
+    COMPILED_PARITY_TOLERANCE = float(os.getenv('COMPILED_PARITY_TOLERANCE', 1e-6))
+    INCREMENTAL_BOOST_ROUNDS = int(os.getenv('INCREMENTAL_BOOST_ROUNDS', 20))
+    INCREMENTAL_FOREST_TREES = int(os.getenv('INCREMENTAL_FOREST_TREES', 20))
+    INCREMENTAL_MIN_ROWS = int(os.getenv('INCREMENTAL_MIN_ROWS', 200))
+    INCREMENTAL_HOLDOUT_FRACTION = float(os.getenv('INCREMENTAL_HOLDOUT_FRACTION', 0.2))
+    ATTRIBUTION_CACHE_MAX_ENTRIES = int(os.getenv('ATTRIBUTION_CACHE_MAX_ENTRIES', 50000))
+    ATTRIBUTION_CACHE_TTL_SECONDS = int(os.getenv('ATTRIBUTION_CACHE_TTL_SECONDS', 3600))
+    MODEL_REGISTRY_POLL_SECONDS = int(os.getenv('MODEL_REGISTRY_POLL_SECONDS', 5))  # 0 disables hot-swap
+    SHADOW_QUEUE_SIZE = int(os.getenv('SHADOW_QUEUE_SIZE', 1000))
+    DRIFT_SKETCH_BINS = int(os.getenv('DRIFT_SKETCH_BINS', 100))
+    DRIFT_PSI_BINS = int(os.getenv('DRIFT_PSI_BINS', 10))
+    DRIFT_WINDOW_SIZE = int(os.getenv('DRIFT_WINDOW_SIZE', 10000))
+    DRIFT_PSI_WARN = float(os.getenv('DRIFT_PSI_WARN', 0.1))
+    DRIFT_PSI_ALERT = float(os.getenv('DRIFT_PSI_ALERT', 0.2))
+    DRIFT_KS_ALPHA = float(os.getenv('DRIFT_KS_ALPHA', 0.001))
+    DRIFT_STATE_PATH = os.getenv('DRIFT_STATE_PATH', os.path.join(BASE_DIR, 'data', 'drift'))
+    DRIFT_FLUSH_SECONDS = int(os.getenv('DRIFT_FLUSH_SECONDS', 10))
+    DRIFT_STATE_TTL_SECONDS = int(os.getenv('DRIFT_STATE_TTL_SECONDS', 3600))
+    EVALUATION_LATENCY_ROWS = int(os.getenv('EVALUATION_LATENCY_ROWS', 1000))
+    EVALUATION_CALIBRATION_BINS = int(os.getenv('EVALUATION_CALIBRATION_BINS', 10))
+    PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 10000))  # 0 disables the cache
+    PREDICTION_CACHE_TTL_SECONDS = int(os.getenv('PREDICTION_CACHE_TTL_SECONDS', 300))
+    ENSEMBLE_WEIGHTS = {
+        'random_forest': 1.0,
+        'xgboost': 1.0,
+        'lightgbm': 1.0,
+        'gradient_boosting': 1.0
+    }
+    
+    # Feature Store Configuration
+    FEATURE_STORE_PATH = os.path.join(BASE_DIR, 'data', 'feature_store')
+    FEATURE_STORE_BATCH_SIZE = int(os.getenv('FEATURE_STORE_BATCH_SIZE', 50000))
+    FEATURE_STORE_WATERMARK_LAG_SECONDS = int(os.getenv('FEATURE_STORE_WATERMARK_LAG_SECONDS', 300))
+    FEATURE_STORE_KEEP_SNAPSHOTS = int(os.getenv('FEATURE_STORE_KEEP_SNAPSHOTS', 2))
+    
+    # Bulk Ingest Configuration
+    BULK_INGEST_PATH = os.path.join(BASE_DIR, 'data', 'ingest')
+    BULK_INGEST_CHUNK_SIZE = int(os.getenv('BULK_INGEST_CHUNK_SIZE', 5000))
+    BULK_INGEST_ERROR_PREVIEW = int(os.getenv('BULK_INGEST_ERROR_PREVIEW', 100))
+    
+    # Rescoring Configuration
+    RESCORING_PATH = os.path.join(BASE_DIR, 'data', 'rescoring')
+    RESCORING_BATCH_SIZE = int(os.getenv('RESCORING_BATCH_SIZE', 50000))
+    RESCORING_TOLERANCE = float(os.getenv('RESCORING_TOLERANCE', 1e-6))
+    RESCORING_FLIP_PREVIEW = int(os.getenv('RESCORING_FLIP_PREVIEW', 100))
+    
+    # Ledger Configuration
+    LEDGER_BATCH_WINDOW_MS = int(os.getenv('LEDGER_BATCH_WINDOW_MS', 10))
+    LEDGER_BATCH_MAX_SIZE = int(os.getenv('LEDGER_BATCH_MAX_SIZE', 100))
+    LEDGER_SEALING_STRATEGY = os.getenv('LEDGER_SEALING_STRATEGY', 'fixed')  # none, fixed or background
+    LEDGER_POW_DIFFICULTY = int(os.getenv('LEDGER_POW_DIFFICULTY', 1))
+    LEDGER_POW_MAX_NONCE = int(os.getenv('LEDGER_POW_MAX_NONCE', 1000000))
+    LEDGER_HASH_VERSION = int(os.getenv('LEDGER_HASH_VERSION', 2))
+    LEDGER_APPEND_RETRIES = int(os.getenv('LEDGER_APPEND_RETRIES', 5))
+    LEDGER_PENDING_MIN_AGE_SECONDS = int(os.getenv('LEDGER_PENDING_MIN_AGE_SECONDS', 60))
+    LEDGER_ADVISORY_LOCK_KEY = int(os.getenv('LEDGER_ADVISORY_LOCK_KEY', 0x45434F4C))
+    LEDGER_VALIDATION_BATCH_SIZE = int(os.getenv('LEDGER_VALIDATION_BATCH_SIZE', 5000))
+    LEDGER_CHECKPOINT_KEY = os.getenv('LEDGER_CHECKPOINT_KEY', SECRET_KEY)
+    LEDGER_VERIFY_WORKERS = int(os.getenv('LEDGER_VERIFY_WORKERS', os.cpu_count() or 1))
+    LEDGER_VERIFY_CHUNK_SIZE = int(os.getenv('LEDGER_VERIFY_CHUNK_SIZE', 50000))
     
     # Business Logic Configuration
     COVENANT_THRESHOLDS = {
@@ -0,0 +1,8 @@
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', 5000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Import backend.wsgi in the master so models load once before fork
+preload_app = True
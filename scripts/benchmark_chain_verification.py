@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, select
+from backend.database.models import BlockchainLedger
+from backend.database.ledger import LedgerService
+from backend.database.chain_verifier import verify_chunk, verify_chain_parallel
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def generate_synthetic_chain(database_url, n_blocks, insert_batch=50000):
+    """Write a valid synthetic chain of n_blocks to the database"""
+    logger.info(f"Generating synthetic chain with {n_blocks} blocks...")
+
+    engine = create_engine(database_url)
+    table = BlockchainLedger.__table__
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+
+    previous_hash = '0' * 64
+    start_time = datetime(2024, 1, 1)
+    rows = []
+
+    with engine.begin() as connection:
+        for block_number in range(1, n_blocks + 1):
+            timestamp = start_time + timedelta(seconds=block_number)
+            transaction_id = f"TRADE{block_number:08X}"
+            merkle_root = LedgerService.calculate_merkle_root([{'type': 'TRADE_EXECUTED', 'id': transaction_id}])
+            block_hash = LedgerService.calculate_block_hash(
+                block_number, timestamp, 'TRADE_EXECUTED', transaction_id,
+                previous_hash, merkle_root, 0
+            )
+
+            rows.append({
+                'block_number': block_number,
+                'timestamp': timestamp,
+                'transaction_type': 'TRADE_EXECUTED',
+                'transaction_id': transaction_id,
+                'previous_hash': previous_hash,
+                'block_hash': block_hash,
+                'merkle_root': merkle_root,
+                'nonce': 0,
+                'transaction_count': 1
+            })
+            previous_hash = block_hash
+
+            if len(rows) >= insert_batch:
+                connection.execute(table.insert(), rows)
+                rows = []
+
+        if rows:
+            connection.execute(table.insert(), rows)
+
+    return engine
+
+def corrupt_blocks(engine, n_corrupt, n_blocks):
+    """Tamper with random blocks so every one of them should be reported"""
+    table = BlockchainLedger.__table__
+    corrupted = sorted(random.Random(42).sample(range(2, n_blocks + 1), n_corrupt))
+
+    with engine.begin() as connection:
+        for block_number in corrupted:
+            connection.execute(
+                table.update().where(table.c.block_number == block_number).values(nonce=-1)
+            )
+
+    return corrupted
+
+def run_benchmark(n_blocks, workers, chunk_size, n_corrupt, database_path=None):
+    database_path = database_path or os.path.join(tempfile.gettempdir(), 'ecoledger_chain_benchmark.db')
+    database_url = f"sqlite:///{database_path}"
+
+    engine = generate_synthetic_chain(database_url, n_blocks)
+    corrupted = corrupt_blocks(engine, n_corrupt, n_blocks) if n_corrupt else []
+
+    with engine.connect() as connection:
+        first_block, last_block = connection.execute(
+            select(func.min(BlockchainLedger.__table__.c.block_number),
+                   func.max(BlockchainLedger.__table__.c.block_number))
+        ).one()
+
+    # Single-core baseline: one pass over the whole range, as validate_chain does
+    start = time.perf_counter()
+    sequential = verify_chunk(database_url, first_block, last_block)
+    sequential_seconds = time.perf_counter() - start
+
+    parallel = verify_chain_parallel(database_url, first_block, last_block, workers, chunk_size)
+
+    sequential_invalid = {item['block_number'] for item in sequential['invalid_blocks']}
+    parallel_invalid = {item['block_number'] for item in parallel['invalid_blocks']}
+
+    logger.info("\nChain verification benchmark")
+    logger.info(f"Blocks: {n_blocks}, workers: {parallel['workers']}, chunks: {parallel['chunks']}")
+    logger.info(f"Sequential: {sequential_seconds:.2f}s ({n_blocks / sequential_seconds:,.0f} blocks/sec)")
+    logger.info(f"Parallel:   {parallel['elapsed_seconds']:.2f}s ({n_blocks / parallel['elapsed_seconds']:,.0f} blocks/sec)")
+    logger.info(f"Speedup: {sequential_seconds / parallel['elapsed_seconds']:.2f}x")
+    logger.info(f"Corrupted blocks: {len(corrupted)}, reported invalid blocks: {len(parallel_invalid)}")
+
+    if not set(corrupted) <= parallel_invalid or parallel_invalid != sequential_invalid:
+        raise RuntimeError("Parallel verification disagrees with the sequential baseline")
+
+    return {
+        'sequential_seconds': sequential_seconds,
+        'parallel_seconds': parallel['elapsed_seconds'],
+        'invalid_blocks': parallel['invalid_blocks']
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark parallel ledger verification')
+    parser.add_argument('--blocks', type=int, default=2000000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--corrupt', type=int, default=10)
+    parser.add_argument('--database', default=None)
+    args = parser.parse_args()
+
+    run_benchmark(args.blocks, args.workers, args.chunk_size, args.corrupt, args.database)
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from backend.database.ledger import LedgerService
+from backend.database.merkle import build_merkle_tree
+from backend.database.chain_verifier import verify_block_range
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Block = namedtuple('Block', [
+    'block_number', 'timestamp', 'transaction_type', 'transaction_id',
+    'previous_hash', 'block_hash', 'merkle_root', 'nonce', 'hash_version'
+])
+
+def generate_transactions(n_transactions):
+    return [
+        {
+            'type': 'TRADE_EXECUTED',
+            'id': f"TRADE{i:08X}",
+            'portfolio_id': f"PORT{i % 997:08X}",
+            'seller_id': f"SELLER{i % 101}",
+            'buyer_id': f"BUYER{i % 89}",
+            'amount': 100000.0 + i
+        }
+        for i in range(n_transactions)
+    ]
+
+def generate_chain(n_blocks, hash_version):
+    """Build an in-memory chain sealed with the given hashing version"""
+    blocks = []
+    previous_hash = '0' * 64
+    start_time = datetime(2024, 1, 1)
+
+    for block_number in range(1, n_blocks + 1):
+        timestamp = start_time + timedelta(seconds=block_number, microseconds=block_number % 1000)
+        transaction_id = f"TRADE{block_number:08X}"
+        merkle_root = LedgerService.calculate_merkle_root(
+            [{'type': 'TRADE_EXECUTED', 'id': transaction_id}], hash_version
+        )
+        block_hash = LedgerService.calculate_block_hash(
+            block_number, timestamp, 'TRADE_EXECUTED', transaction_id,
+            previous_hash, merkle_root, 0, hash_version
+        )
+        blocks.append(Block(
+            block_number, timestamp, 'TRADE_EXECUTED', transaction_id,
+            previous_hash, block_hash, merkle_root, 0, hash_version
+        ))
+        previous_hash = block_hash
+
+    return blocks
+
+def time_best_of(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmark(n_leaves, n_blocks, repeats):
+    leaf_hashes = [LedgerService.calculate_leaf_hash(t) for t in generate_transactions(n_leaves)]
+
+    logger.info(f"\nMerkle construction over {n_leaves} leaves (best of {repeats})")
+    merkle_times = {}
+    for version in (1, 2):
+        merkle_times[version], _ = time_best_of(lambda: build_merkle_tree(leaf_hashes, version), repeats)
+        logger.info(f"  v{version}: {merkle_times[version] * 1000:.1f} ms ({n_leaves / merkle_times[version]:,.0f} leaves/sec)")
+    logger.info(f"  v2 speedup: {merkle_times[1] / merkle_times[2]:.2f}x")
+
+    logger.info(f"\nChain validation over {n_blocks} blocks (best of {repeats})")
+    validation_times = {}
+    for version in (1, 2):
+        blocks = generate_chain(n_blocks, version)
+        validation_times[version], report = time_best_of(lambda: verify_block_range(blocks), repeats)
+        if report['invalid_blocks']:
+            raise RuntimeError(f"Synthetic v{version} chain failed validation")
+        logger.info(f"  v{version}: {validation_times[version]:.2f} s ({n_blocks / validation_times[version]:,.0f} blocks/sec)")
+    logger.info(f"  v2 speedup: {validation_times[1] / validation_times[2]:.2f}x")
+
+    return {'merkle_seconds': merkle_times, 'validation_seconds': validation_times}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare v1 and v2 ledger hashing throughput')
+    parser.add_argument('--leaves', type=int, default=100000)
+    parser.add_argument('--blocks', type=int, default=200000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    run_benchmark(args.leaves, args.blocks, args.repeats)
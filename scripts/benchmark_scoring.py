@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from backend.models.credit_scoring import CreditScoringModel
+from scripts.train_models import generate_training_data
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_or_train(n_train):
+    """Use the saved models when present, otherwise train a fresh set"""
+    model = CreditScoringModel()
+    model.load_models()
+
+    if not all(name in model.models for name in CreditScoringModel.MODEL_NAMES):
+        logger.info(f"Saved models not found, training on {n_train} rows...")
+        df = generate_training_data(n_train)
+        model.train_models(df[model.feature_names].values, df['approved'].values)
+
+    return model
+
+def score_rows_legacy(model, X, model_name):
+    """The original single-row path: predict and predict_proba per row"""
+    estimator = model.models[model_name]
+    for row in X:
+        estimator.predict([row])
+        estimator.predict_proba([row])
+
+def score_rows(model, X, model_name):
+    for row in X:
+        model.predict(row, model_name)
+
+def run_benchmark(n_rows, n_single_rows, n_train):
+    model = load_or_train(n_train)
+    X = generate_training_data(n_rows)[model.feature_names].values
+    X_single = X[:n_single_rows]
+
+    results = {}
+    for model_name in CreditScoringModel.MODEL_NAMES:
+        start = time.perf_counter()
+        score_rows_legacy(model, X_single, model_name)
+        legacy_rate = len(X_single) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        score_rows(model, X_single, model_name)
+        single_rate = len(X_single) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model.predict_batch(X, model_name)
+        batch_rate = len(X) / (time.perf_counter() - start)
+
+        results[model_name] = {
+            'legacy_rows_per_sec': legacy_rate,
+            'single_rows_per_sec': single_rate,
+            'batch_rows_per_sec': batch_rate
+        }
+        logger.info(
+            f"{model_name}: legacy {legacy_rate:,.0f} rows/sec, "
+            f"single {single_rate:,.0f} rows/sec, "
+            f"batch {batch_rate:,.0f} rows/sec ({batch_rate / legacy_rate:,.0f}x)"
+        )
+
+    # Four sequential batch calls against the concurrent ensemble
+    start = time.perf_counter()
+    for model_name in CreditScoringModel.MODEL_NAMES:
+        model.predict_batch(X, model_name)
+    sequential_seconds = time.perf_counter() - start
+
+    model.predict_ensemble(X[:10])
+    start = time.perf_counter()
+    model.predict_ensemble(X)
+    ensemble_seconds = time.perf_counter() - start
+
+    results['ensemble'] = {
+        'sequential_seconds': sequential_seconds,
+        'ensemble_seconds': ensemble_seconds
+    }
+    logger.info(
+        f"ensemble of {len(CreditScoringModel.MODEL_NAMES)} models on {len(X)} rows: sequential {sequential_seconds:.2f}s, "
+        f"concurrent {ensemble_seconds:.2f}s on {os.cpu_count()} cores"
+    )
+
+    results['cache'] = benchmark_cache(model, X)
+    return results
+
+def benchmark_cache(model, X, n_requests=5000, pool_size=1000, batch_size=1, model_name='xgboost'):
+    """/loans/score traffic that resubmits applications from a fixed pool, with and without the cache"""
+    rng = np.random.default_rng(7)
+    pool = X[:pool_size]
+    requests = [pool[rng.integers(0, len(pool), batch_size)] for _ in range(n_requests)]
+
+    start = time.perf_counter()
+    for features in requests:
+        model.predict_batch(features, model_name)
+    uncached_rate = n_requests * batch_size / (time.perf_counter() - start)
+
+    model.invalidate_predictions()
+    before = model.prediction_cache.stats()
+    start = time.perf_counter()
+    for features in requests:
+        model.predict_batch(features, model_name, cached=True)
+    cached_rate = n_requests * batch_size / (time.perf_counter() - start)
+    after = model.prediction_cache.stats()
+
+    hits = after['hits'] - before['hits']
+    lookups = hits + after['misses'] - before['misses']
+    result = {
+        'requests': n_requests,
+        'pool_size': len(pool),
+        'hit_rate': hits / lookups if lookups else 0.0,
+        'uncached_rows_per_sec': uncached_rate,
+        'cached_rows_per_sec': cached_rate
+    }
+    logger.info(
+        f"prediction cache, {n_requests} requests of {batch_size} from {len(pool)} applications: "
+        f"hit rate {result['hit_rate']:.1%}, {uncached_rate:,.0f} rows/sec uncached, "
+        f"{cached_rate:,.0f} rows/sec cached ({cached_rate / uncached_rate:,.1f}x)"
+    )
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare single-row and batch credit scoring throughput')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--single-rows', type=int, default=500)
+    parser.add_argument('--train-rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.single_rows, args.train_rows)
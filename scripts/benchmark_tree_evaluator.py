@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from backend.models.credit_scoring import CreditScoringModel
+from backend.models.tree_compiler import compile_model
+from scripts.train_models import generate_training_data
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_or_train(n_train):
+    model = CreditScoringModel()
+    model.load_models()
+
+    if not all(name in model.models for name in CreditScoringModel.MODEL_NAMES):
+        logger.info(f"Saved models not found, training on {n_train} rows...")
+        df = generate_training_data(n_train)
+        model.train_models(df[model.feature_names].values, df['approved'].values)
+
+    return model
+
+def generate_rows(feature_names, n_rows, seed=7):
+    """Training-like rows, jittered so they do not repeat the training set"""
+    rng = np.random.default_rng(seed)
+    X = generate_training_data(n_rows)[feature_names].values
+    return X * rng.uniform(0.8, 1.2, X.shape)
+
+def check_parity(estimator, compiled, X, tolerance):
+    """Compare compiled probabilities and labels with the native model"""
+    native = estimator.predict_proba(X)[:, 1]
+    ours = compiled.predict_proba(X)[:, 1]
+    max_difference = float(np.abs(native - ours).max())
+    label_mismatches = int((estimator.predict(X) != estimator.classes_[(ours > 0.5).astype(int)]).sum())
+
+    return {
+        'max_difference': max_difference,
+        'label_mismatches': label_mismatches,
+        'passed': max_difference <= tolerance and label_mismatches == 0
+    }
+
+def latency_percentiles(score_row, X):
+    latencies = []
+    for row in X:
+        start = time.perf_counter()
+        score_row(row)
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1e6
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def run_benchmark(n_parity_rows, n_latency_rows, n_batch_rows, n_train, tolerance):
+    model = load_or_train(n_train)
+    X = generate_rows(model.feature_names, max(n_parity_rows, n_batch_rows))
+
+    results = {}
+    for name in CreditScoringModel.MODEL_NAMES:
+        estimator = model.models[name]
+        compiled = compile_model(estimator)
+
+        parity = check_parity(estimator, compiled, X[:n_parity_rows], tolerance)
+
+        # NaN routes through each model's default branch
+        X_missing = X[:n_parity_rows].copy()
+        X_missing[::3, 2] = np.nan
+        if name in ('xgboost', 'lightgbm'):
+            missing = check_parity(estimator, compiled, X_missing, tolerance)
+            parity['passed'] = parity['passed'] and missing['passed']
+
+        rows = X[:n_latency_rows]
+        native_p50, native_p99 = latency_percentiles(lambda row: estimator.predict_proba(row.reshape(1, -1)), rows)
+        compiled_p50, compiled_p99 = latency_percentiles(compiled.predict_proba, rows)
+
+        start = time.perf_counter()
+        estimator.predict_proba(X[:n_batch_rows])
+        native_rate = n_batch_rows / (time.perf_counter() - start)
+        start = time.perf_counter()
+        compiled.predict_proba(X[:n_batch_rows])
+        compiled_rate = n_batch_rows / (time.perf_counter() - start)
+
+        results[name] = {'parity': parity}
+        logger.info(
+            f"{name}: {compiled.n_trees} trees, {compiled.n_nodes} nodes, depth {compiled.depth}; "
+            f"parity {'ok' if parity['passed'] else 'FAILED'} "
+            f"(max diff {parity['max_difference']:.2e}, {parity['label_mismatches']} label mismatches)"
+        )
+        logger.info(
+            f"  single row p50/p99: native {native_p50:.0f}/{native_p99:.0f} us, "
+            f"compiled {compiled_p50:.0f}/{compiled_p99:.0f} us"
+        )
+        logger.info(f"  batch: native {native_rate:,.0f} rows/sec, compiled {compiled_rate:,.0f} rows/sec")
+
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check compiled tree evaluator parity and latency against the native models')
+    parser.add_argument('--parity-rows', type=int, default=20000)
+    parser.add_argument('--latency-rows', type=int, default=1000)
+    parser.add_argument('--batch-rows', type=int, default=20000)
+    parser.add_argument('--train-rows', type=int, default=5000)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.parity_rows, args.latency_rows, args.batch_rows, args.train_rows, args.tolerance)
+    if not all(result['parity']['passed'] for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from backend.app import create_app
+from backend.database.ledger_segments import LedgerSegmentWriter, LedgerSegmentReader
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def export_segments(output_dir, start_block=None, end_block=None, segment_size=100000, verify=False):
+    """Export the ledger to binary segments, continuing from the last export by default"""
+    logger.info(f"Exporting ledger segments to {output_dir}...")
+
+    app = create_app('production')
+
+    with app.app_context():
+        writer = LedgerSegmentWriter(output_dir, segment_size)
+        written = writer.export(start_block, end_block)
+
+    logger.info(f"Wrote {len(written)} segments")
+    for path in written:
+        logger.info(f"  - {path}")
+
+    if verify:
+        report = LedgerSegmentReader(output_dir).verify()
+        logger.info(
+            f"Verified {report['blocks_verified']} exported blocks: "
+            f"{'valid' if report['is_valid'] else 'INVALID'}"
+        )
+        for item in report['invalid_blocks']:
+            logger.info(f"  - block {item['block_number']}: {item['reason']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the ledger as binary segment files')
+    parser.add_argument('--output', default=os.path.join('data', 'ledger_segments'))
+    parser.add_argument('--start', type=int, default=None)
+    parser.add_argument('--end', type=int, default=None)
+    parser.add_argument('--segment-size', type=int, default=100000)
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+
+    export_segments(args.output, args.start, args.end, args.segment_size, args.verify)
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from backend.app import create_app
+from backend.services.bulk_ingest import BulkIngestService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def ingest_loans(path, data_format=None, job_id=None, chunk_size=None):
+    """Ingest a CSV or NDJSON file of loan applications, resuming job_id if given"""
+    data_format = data_format or ('ndjson' if path.lower().endswith(('.ndjson', '.jsonl')) else 'csv')
+    app = create_app('production')
+    
+    with app.app_context():
+        with open(path, newline='', encoding='utf-8') as f:
+            result = BulkIngestService(chunk_size=chunk_size).ingest(f, data_format, job_id)
+        
+        logger.info(
+            f"Job {result['job_id']} {result['status']}: {result['inserted']} inserted "
+            f"({result['approved']} approved), {result['rejected']} rejected"
+        )
+        if result['rejected']:
+            logger.info(f"Row errors: {result.get('errors_path')}")
+        return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk ingest loan applications from CSV or NDJSON')
+    parser.add_argument('path', help='CSV file with a header row, or NDJSON with one application per line')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+    parser.add_argument('--job-id', help='Resume this job after the last committed chunk')
+    parser.add_argument('--chunk-size', type=int, help='Rows per transaction (defaults to BULK_INGEST_CHUNK_SIZE)')
+    args = parser.parse_args()
+    
+    ingest_loans(args.path, args.format, args.job_id, args.chunk_size)
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from backend.app import create_app
+from backend.database.ledger import LedgerService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def seal_pending(args):
+    """Seal transactions the background sealer recorded but never mined"""
+    return LedgerService.seal_pending_transactions(args.limit, args.min_age_seconds)
+
+def verify(args):
+    """Verify the whole chain across a spawned process pool and checkpoint it if valid"""
+    report = LedgerService.verify_chain_parallel(args.workers, args.chunk_size)
+    for item in report['invalid_blocks']:
+        logger.warning(f"Block {item['block_number']}: {item['reason']}")
+    return report
+
+def rebuild_summaries(args):
+    """Recompute counterparty summaries from every sealed transaction, legacy blocks included"""
+    return {'counterparties': LedgerService.rebuild_counterparty_summaries(args.batch_size)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ledger maintenance jobs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    pending = subparsers.add_parser('seal-pending', help='Seal pending transactions left by a stopped writer')
+    pending.add_argument('--limit', type=int, help='Seal at most this many (defaults to all)')
+    pending.add_argument('--min-age-seconds', type=int,
+                         help='Only take transactions pending at least this long (defaults to LEDGER_PENDING_MIN_AGE_SECONDS)')
+    pending.set_defaults(handler=seal_pending)
+    verify_parser = subparsers.add_parser('verify', help='Verify every block in parallel and list each invalid one')
+    verify_parser.add_argument('--workers', type=int, help='Worker processes (defaults to LEDGER_VERIFY_WORKERS)')
+    verify_parser.add_argument('--chunk-size', type=int, help='Blocks per worker task (defaults to LEDGER_VERIFY_CHUNK_SIZE)')
+    verify_parser.set_defaults(handler=verify)
+    summaries = subparsers.add_parser('rebuild-summaries', help='Recompute counterparty summaries from the whole chain')
+    summaries.add_argument('--batch-size', type=int, help='Rows per read (defaults to LEDGER_VALIDATION_BATCH_SIZE)')
+    summaries.set_defaults(handler=rebuild_summaries)
+    args = parser.parse_args()
+
+    app = create_app('production')
+    with app.app_context():
+        print(json.dumps(args.handler(args), indent=2, default=str))
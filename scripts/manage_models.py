@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from backend.models.model_registry import ModelRegistry
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List, activate and shadow registered model versions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='Show every version and which is active or in shadow')
+    activate = subparsers.add_parser('activate', help='Make a version live; workers swap it in without a restart')
+    activate.add_argument('version')
+    shadow = subparsers.add_parser('shadow', help='Score sampled traffic with a candidate version')
+    shadow.add_argument('version')
+    shadow.add_argument('--sample-rate', type=float, default=0.1)
+    subparsers.add_parser('clear-shadow', help='Stop shadow scoring')
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == 'activate':
+        registry.activate(args.version)
+    elif args.command == 'shadow':
+        registry.set_shadow(args.version, args.sample_rate)
+    elif args.command == 'clear-shadow':
+        registry.clear_shadow()
+
+    print(json.dumps(registry.describe(), indent=2))
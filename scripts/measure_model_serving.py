@@ -0,0 +1,122 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import signal
+import tempfile
+import time
+from backend.models.credit_scoring import CreditScoringModel
+from backend.models.model_store import ModelStore
+from scripts.train_models import generate_training_data
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def ensure_models(model_path, n_train):
+    """Train and save a model set when model_path has none"""
+    model = CreditScoringModel()
+    model.model_path = model_path
+    model.load_models()
+
+    if not all(name in model.models for name in CreditScoringModel.MODEL_NAMES):
+        logger.info(f"Training models into {model_path}...")
+        df = generate_training_data(n_train)
+        model.train_models(df[model.feature_names].values, df['approved'].values)
+        model.save_models()
+
+def read_memory_kb(pid):
+    """Rss, Pss and private (unique) memory of a process from smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+def worker(store, row, ready_fd, fork_time):
+    """Score one row with every model, report readiness, then idle"""
+    model = store.get()
+    for name in CreditScoringModel.MODEL_NAMES:
+        model.predict(row, name)
+
+    os.write(ready_fd, f"{time.perf_counter() - fork_time:.6f}\n".encode())
+    while True:
+        signal.pause()
+
+def run_mode(model_path, n_workers, preload):
+    store = ModelStore(model_path)
+    row = generate_training_data(10)[CreditScoringModel().feature_names].values[0]
+
+    if preload:
+        store.load()
+        store.freeze()
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(n_workers):
+        fork_time = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                worker(store, row, write_fd, fork_time)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    os.close(write_fd)
+
+    ready_seconds = []
+    with os.fdopen(read_fd) as ready:
+        for _ in range(n_workers):
+            ready_seconds.append(float(ready.readline()))
+
+    memory = [read_memory_kb(pid) for pid in pids]
+
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    return {
+        'master_load_seconds': store.load_seconds if preload else 0.0,
+        'worker_ready_seconds': max(ready_seconds),
+        'rss_mb': sum(m['rss'] for m in memory) / 1024 / n_workers,
+        'pss_mb': sum(m['pss'] for m in memory) / 1024 / n_workers,
+        'uss_mb': sum(m['uss'] for m in memory) / 1024 / n_workers,
+        'total_pss_mb': sum(m['pss'] for m in memory) / 1024
+    }
+
+def run_measurement(model_path, n_workers, n_train):
+    ensure_models(model_path, n_train)
+
+    results = {}
+    for label, preload in (('per-worker load', False), ('preloaded', True)):
+        results[label] = result = run_mode(model_path, n_workers, preload)
+        logger.info(
+            f"{label}: master load {result['master_load_seconds']:.2f}s, "
+            f"slowest worker ready {result['worker_ready_seconds']:.2f}s, per worker "
+            f"RSS {result['rss_mb']:.1f} MB, PSS {result['pss_mb']:.1f} MB, "
+            f"private {result['uss_mb']:.1f} MB (total PSS {result['total_pss_mb']:.1f} MB)"
+        )
+
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure worker startup time and memory with and without model preloading')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--model-path', default=None, help='Defaults to a temporary directory with freshly trained models')
+    parser.add_argument('--train-rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.model_path:
+        run_measurement(args.model_path, args.workers, args.train_rows)
+    else:
+        with tempfile.TemporaryDirectory() as model_path:
+            run_measurement(model_path, args.workers, args.train_rows)
@@ -0,0 +1,18 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.database.migrations import run_migrations
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database():
+    """Upgrade an existing database in place, keeping its data"""
+    app = create_app('production')
+    run_migrations(app)
+
+if __name__ == '__main__':
+    migrate_database()
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from backend.app import create_app
+from backend.database.feature_store import FeatureStore
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def refresh_feature_store(full=False, directory=None):
+    """Materialize loan features changed since the last watermark"""
+    app = create_app('production')
+    
+    with app.app_context():
+        start = time.perf_counter()
+        result = FeatureStore(directory).refresh(full=full)
+        logger.info(
+            f"{result['snapshot']}: {result['rows']} loans ({result['updated']} updated, "
+            f"{result['inserted']} inserted) in {time.perf_counter() - start:.2f}s"
+        )
+        return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refresh the columnar loan feature store')
+    parser.add_argument('--full', action='store_true', help='Rebuild from every loan instead of the watermark')
+    parser.add_argument('--directory', help='Feature store directory (defaults to FEATURE_STORE_PATH)')
+    args = parser.parse_args()
+    
+    refresh_feature_store(args.full, args.directory)
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from backend.app import create_app
+from backend.services.loan_rescoring import LoanRescoringService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def rescore_loans(dry_run=False, batch_size=None):
+    """Recompute scores and approvals of every loan with the current weights and thresholds"""
+    app = create_app('production')
+    
+    with app.app_context():
+        summary = LoanRescoringService(batch_size).rescore(dry_run=dry_run)
+        
+        logger.info(
+            f"Approvals {summary['approved_before']} -> {summary['approved_after']} "
+            f"(+{summary['flipped_to_approved']} / -{summary['flipped_to_rejected']}), "
+            f"mean combined score change {summary['mean_abs_combined_change']:.4f}"
+        )
+        if summary['skipped_modified']:
+            logger.warning(
+                f"{summary['skipped_modified']} loans changed while rescoring and were left as they are, "
+                f"{summary['skipped_flips']} of them with a flipped approval"
+            )
+        logger.info(f"Flipped approvals: {summary['flipped_approvals_path']}")
+        return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rescore every loan in the book')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--batch-size', type=int, help='Loans per batch (defaults to RESCORING_BATCH_SIZE)')
+    args = parser.parse_args()
+    
+    rescore_loans(args.dry_run, args.batch_size)
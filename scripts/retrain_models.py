@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from backend.app import create_app
+from backend.services.model_retraining import ModelRetrainingService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def retrain_models(promote=False, min_rows=None):
+    """Extend the latest models with applications received since their watermark"""
+    app = create_app('production')
+    
+    with app.app_context():
+        result = ModelRetrainingService().retrain_incremental(promote=promote, min_rows=min_rows)
+        if result['status'] != 'created':
+            logger.info(f"No new version: {result['new_rows']} new applications since {result['watermark']}")
+            return result
+        
+        logger.info(
+            f"Version {result['version']} from {result['parent'] or 'unversioned models'}: "
+            f"{result['training_rows']} rows trained, {result['holdout_rows']} held out, watermark {result['watermark']}"
+        )
+        for model_name, deltas in (result['comparison'] or {}).items():
+            logger.info(
+                f"{model_name}: AUC {deltas['auc']['previous']:.4f} -> {deltas['auc']['current']:.4f}, "
+                f"log-loss {deltas['log_loss']['previous']:.4f} -> {deltas['log_loss']['current']:.4f}"
+            )
+        return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incrementally retrain the credit models from new applications')
+    parser.add_argument('--promote', action='store_true', help='Also activate the new version; running workers swap it in without a restart')
+    parser.add_argument('--min-rows', type=int, help='Skip retraining below this many new applications')
+    args = parser.parse_args()
+    
+    retrain_models(args.promote, args.min_rows)
@@ -0,0 +1,174 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import multiprocessing
+import tempfile
+import threading
+import time
+from datetime import datetime
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def legacy_append(transaction_type, transaction_id, **kwargs):
+    """The pre-sequencer append path: a tip query and a commit per transaction"""
+    from backend.database.models import db, BlockchainLedger
+    from backend.database.ledger import LedgerService
+
+    try:
+        previous_block = BlockchainLedger.query.order_by(
+            BlockchainLedger.block_number.desc()
+        ).first()
+
+        previous_hash = previous_block.block_hash if previous_block else '0' * 64
+        block_number = (previous_block.block_number + 1) if previous_block else 1
+
+        transaction_data = {'type': transaction_type, 'id': transaction_id, **kwargs}
+        merkle_root = LedgerService.calculate_merkle_root([transaction_data])
+
+        nonce = 0
+        timestamp = datetime.utcnow()
+
+        while True:
+            block_content = f"{block_number}{timestamp.isoformat()}{transaction_type}{transaction_id}{previous_hash}{merkle_root}{nonce}"
+            block_hash = hashlib.sha256(block_content.encode()).hexdigest()
+            if block_hash.startswith('0'):
+                break
+            nonce += 1
+
+        db.session.add(BlockchainLedger(
+            block_number=block_number,
+            timestamp=timestamp,
+            transaction_type=transaction_type,
+            transaction_id=transaction_id,
+            amount=kwargs.get('amount'),
+            previous_hash=previous_hash,
+            block_hash=block_hash,
+            merkle_root=merkle_root,
+            nonce=nonce
+        ))
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+def run_worker(mode, worker_id, n_threads, n_appends, results):
+    """Process entry point: append from several threads and report successes and failures"""
+    from backend.app import create_app
+    from backend.database.ledger import LedgerService
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app = create_app('production')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    append = legacy_append if mode == 'legacy' else LedgerService.add_transaction
+    counts = {'ok': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+
+    def append_many(thread_id):
+        with app.app_context():
+            for i in range(n_appends):
+                try:
+                    append('TRADE_EXECUTED', f"T{worker_id}-{thread_id}-{i}", amount=float(i))
+                    outcome = 'ok'
+                except Exception:
+                    outcome = 'failed'
+                with counts_lock:
+                    counts[outcome] += 1
+
+    threads = [threading.Thread(target=append_many, args=(t,)) for t in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results.put(counts)
+
+def run_mode(mode, n_processes, n_threads, n_appends, database_path):
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    os.environ['DATABASE_URL'] = f"sqlite:///{database_path}?timeout=60"
+
+    from backend.app import create_app
+    from backend.database.models import db, BlockchainLedger, LedgerTransaction
+    from backend.database.ledger import LedgerService
+
+    app = create_app('production')
+    logging.getLogger().setLevel(logging.INFO)
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+
+    # Spawned children import the app with this DATABASE_URL
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_worker, args=(mode, p, n_threads, n_appends, results))
+        for p in range(n_processes)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    counts = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    ok = sum(c['ok'] for c in counts)
+    failed = sum(c['failed'] for c in counts)
+
+    with app.app_context():
+        is_valid, message = LedgerService.validate_chain('full')
+        blocks = BlockchainLedger.query.count()
+        sealed = LedgerTransaction.query.filter_by(status='sealed').count() if mode != 'legacy' else blocks
+
+    return {
+        'mode': mode,
+        'attempted': n_processes * n_threads * n_appends,
+        'succeeded': ok,
+        'failed': failed,
+        'blocks': blocks,
+        'transactions_recorded': sealed,
+        'chain_valid': is_valid,
+        'validation_message': message,
+        'elapsed_seconds': elapsed,
+        'appends_per_second': ok / elapsed if elapsed else 0
+    }
+
+def run_stress_test(n_processes, n_threads, n_appends, database_path=None):
+    database_path = database_path or os.path.join(tempfile.gettempdir(), 'ecoledger_append_stress.db')
+    reports = [
+        run_mode(mode, n_processes, n_threads, n_appends, database_path)
+        for mode in ('legacy', 'sequenced')
+    ]
+
+    logger.info("\nLedger append stress test")
+    logger.info(f"{n_processes} processes x {n_threads} threads x {n_appends} appends")
+    for report in reports:
+        logger.info(
+            f"{report['mode']:>9}: {report['succeeded']}/{report['attempted']} appended, "
+            f"{report['failed']} failed, {report['blocks']} blocks, "
+            f"{report['appends_per_second']:,.0f} appends/sec, chain valid: {report['chain_valid']}"
+        )
+
+    sequenced = reports[1]
+    if not sequenced['chain_valid'] or sequenced['transactions_recorded'] != sequenced['attempted']:
+        raise RuntimeError(f"Sequenced appends lost transactions or broke the chain: {sequenced}")
+
+    return reports
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stress test concurrent ledger appends')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--appends', type=int, default=25)
+    parser.add_argument('--database', default=None)
+    args = parser.parse_args()
+
+    run_stress_test(args.processes, args.threads, args.appends, args.database)
@@ -2,66 +2,30 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
+import resource
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from backend.models.credit_scoring import CreditScoringModel
+from backend.models.training_pipeline import TrainingPipeline, StreamingTrainer
+from backend.models.training_data import (
+    FEATURE_NAMES, LABEL_NAME, TrainingShardReader, generate_columns, holdout_columns
+)
+from backend.models.evaluation import ModelEvaluator
+from backend.models.drift_monitor import save_baseline
 from backend.services.data_fetcher import DataFetcher
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_training_data(n_samples=5000):
+def generate_training_data(n_samples=5000, seed=42):
     """Generate training data for models"""
     logger.info(f"Generating {n_samples} training samples...")
     
-    np.random.seed(42)
-    
-    # Generate features
-    data = {
-        'loan_amount': np.random.uniform(50000, 5000000, n_samples),
-        'loan_term_months': np.random.choice([12, 24, 36, 48, 60, 84, 120], n_samples),
-        'debt_to_income_ratio': np.random.uniform(0.2, 0.8, n_samples),
-        'credit_score': np.random.randint(550, 850, n_samples),
-        'annual_revenue': np.random.uniform(100000, 10000000, n_samples),
-        'years_in_business': np.random.randint(1, 30, n_samples),
-        'existing_debt': np.random.uniform(10000, 2000000, n_samples),
-        'carbon_reduction_target_pct': np.random.uniform(10, 60, n_samples),
-        'renewable_energy_pct': np.random.uniform(10, 90, n_samples),
-        'environmental_certifications': np.random.randint(0, 5, n_samples),
-        'social_impact_score': np.random.uniform(40, 100, n_samples),
-        'governance_score': np.random.uniform(50, 100, n_samples)
-    }
-    
-    df = pd.DataFrame(data)
-    
-    # Generate target variable
-    df['financial_score'] = (
-        ((850 - df['credit_score']) / 300) * -25 +
-        (df['debt_to_income_ratio'] * -30) +
-        ((df['annual_revenue'] / df['loan_amount']) * 10).clip(0, 25) +
-        50
-    ).clip(0, 100)
-    
-    df['esg_score'] = (
-        (df['carbon_reduction_target_pct'] / 60 * 25) +
-        (df['renewable_energy_pct'] / 100 * 25) +
-        (df['environmental_certifications'] / 5 * 10) +
-        (df['social_impact_score'] / 100 * 20) +
-        (df['governance_score'] / 100 * 20)
-    ).clip(0, 100)
-    
-    df['combined_score'] = df['financial_score'] * 0.6 + df['esg_score'] * 0.4
-    
-    df['approved'] = (
-        (df['combined_score'] > 60) &
-        (df['credit_score'] > 620) &
-        (df['debt_to_income_ratio'] < 0.65) &
-        (df['esg_score'] > 40)
-    ).astype(int)
-    
-    return df
+    # Same sampler and approval rule as the streamed shards
+    return pd.DataFrame(generate_columns(n_samples, np.random.default_rng(seed)))
 
 def train_models():
     """Train all ML models"""
@@ -71,16 +35,8 @@ def train_models():
     df = generate_training_data()
     
     # Prepare features and target
-    feature_cols = [
-        'loan_amount', 'loan_term_months', 'debt_to_income_ratio',
-        'credit_score', 'annual_revenue', 'years_in_business',
-        'existing_debt', 'carbon_reduction_target_pct',
-        'renewable_energy_pct', 'environmental_certifications',
-        'social_impact_score', 'governance_score'
-    ]
-    
-    X = df[feature_cols].values
-    y = df['approved'].values
+    X = df[FEATURE_NAMES].values
+    y = df[LABEL_NAME].values
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -90,21 +46,74 @@ def train_models():
     logger.info(f"Training set size: {len(X_train)}")
     logger.info(f"Test set size: {len(X_test)}")
     
-    # Train models
+    # Train models concurrently, checkpointing each one to MODEL_PATH
     model = CreditScoringModel()
-    model.train_models(X_train, y_train)
+    report = TrainingPipeline(model).run(X_train, y_train)
+    for model_name, entry in report.items():
+        logger.info(f"{model_name}: {entry['status']} in {entry['seconds']:.2f}s (best iteration {entry['best_iteration']})")
     
-    # Evaluate models
-    logger.info("\nEvaluating models on test set...")
-    for model_name in ['random_forest', 'xgboost', 'lightgbm', 'gradient_boosting']:
-        predictions = model.predict(X_test[0], model_name)
-        logger.info(f"{model_name}: {predictions}")
+    # Reference distribution for the drift monitor
+    save_baseline(X_train, model.model_path)
     
-    # Save models
-    logger.info("\nSaving models...")
-    model.save_models()
+    # Evaluate models on the full test split
+    evaluate_models(model, X_test, y_test)
     
     logger.info("Model training completed successfully")
 
+def evaluate_models(model, X_test, y_test):
+    """Score the test split with every model and write a versioned evaluation report"""
+    logger.info(f"Evaluating models on {len(X_test)} test rows...")
+    
+    evaluator = ModelEvaluator(model)
+    report = evaluator.evaluate(X_test, y_test)
+    for model_name, metrics in report['models'].items():
+        if 'error' in metrics:
+            logger.error(f"{model_name}: evaluation failed: {metrics['error']}")
+            continue
+        logger.info(
+            f"{model_name}: AUC {metrics['auc']:.4f}, log-loss {metrics['log_loss']:.4f}, "
+            f"ECE {metrics['calibration']['expected_calibration_error']:.4f}, "
+            f"{metrics['rows_per_sec']:,.0f} rows/sec, "
+            f"p50/p99 {metrics['latency']['p50_us']:.0f}/{metrics['latency']['p99_us']:.0f} us"
+        )
+    
+    evaluator.write_report(report)
+    for model_name, deltas in report.get('comparison', {}).items():
+        regressed = [metric for metric, delta in deltas.items() if delta['regressed']]
+        if regressed:
+            logger.warning(f"{model_name} regressed since v{report['previous_version']}: {', '.join(regressed)}")
+    
+    return report
+
+def train_models_from_shards(directory, test_rows=100000):
+    """Train all ML models by streaming columnar shards from disk"""
+    reader = TrainingShardReader(directory)
+    logger.info(f"Streaming {reader.n_rows} rows from {reader.n_shards} shards in {directory}")
+    
+    model = CreditScoringModel()
+    report = StreamingTrainer(model).run(reader)
+    for model_name, entry in report.items():
+        logger.info(f"{model_name}: {entry['status']} in {entry['seconds']:.2f}s")
+    
+    # The first shard is an unbiased sample of the training distribution
+    X_sample, _ = reader.read_shard(0, model.feature_names)
+    save_baseline(X_sample, model.model_path)
+    del X_sample
+    
+    holdout = holdout_columns(test_rows, reader.manifest['seed'])
+    X_test = np.column_stack([holdout[name] for name in model.feature_names])
+    evaluate_models(model, X_test, holdout['approved'])
+    
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    logger.info(f"Model training completed successfully (peak RSS {peak_rss_mb:.0f} MB)")
+
 if __name__ == '__main__':
-    train_models()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the credit scoring models')
+    parser.add_argument('--shards', help='Stream training data from shards written by generate_training_shards.py')
+    parser.add_argument('--test-rows', type=int, default=100000, help='Holdout rows to evaluate shard-trained models on')
+    args = parser.parse_args()
+    
+    if args.shards:
+        train_models_from_shards(args.shards, args.test_rows)
+    else:
+        train_models()
\ No newline at end of file
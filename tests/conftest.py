@@ -0,0 +1,24 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from config.settings import Config
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application bound to an empty SQLite database in a temporary directory"""
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'ecoledger.db'}")
+
+    from backend.app import create_app
+    from backend.database.models import db
+    from backend.models.drift_monitor import drift_monitor
+
+    monkeypatch.setattr(drift_monitor, 'state_path', str(tmp_path / 'drift'))
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,64 @@
+import io
+import csv
+import itertools
+import pytest
+from backend.database.models import db, LoanApplication
+from backend.services import bulk_ingest
+from backend.services.bulk_ingest import BulkIngestService
+from backend.utils.helpers import generate_loan_id
+
+FIELDS = ['loan_amount', 'loan_term_months', 'project_type', 'credit_score', 'annual_revenue',
+          'existing_debt', 'years_in_business', 'debt_to_income_ratio', 'renewable_energy_pct']
+
+def csv_stream(n_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for i in range(n_rows):
+        writer.writerow([50000 + i % 1000, 60, 'Solar Energy', 600 + i % 200, 1000000,
+                         200000, 1 + i % 20, 0.2 + (i % 50) / 100, i % 100])
+    buffer.seek(0)
+    return buffer
+
+@pytest.fixture
+def service(app, tmp_path):
+    return BulkIngestService(directory=str(tmp_path / 'ingest'))
+
+def test_ingests_100k_rows_with_unique_ids(service):
+    report = service.ingest(csv_stream(100000), 'csv', job_id='large')
+
+    assert report['status'] == 'completed'
+    assert report['inserted'] == 100000
+    assert report['rejected'] == 0
+    assert LoanApplication.query.count() == 100000
+    assert db.session.query(db.func.count(db.distinct(LoanApplication.loan_id))).scalar() == 100000
+
+def test_retries_colliding_loan_ids(service, monkeypatch):
+    taken = generate_loan_id()
+    db.session.execute(LoanApplication.__table__.insert(), [{
+        'loan_id': taken, 'country': 'Unknown', 'loan_amount': 10000, 'loan_term_months': 12, 'project_type': 'Solar Energy'
+    }])
+    db.session.commit()
+
+    # The first id of the chunk is taken and the second repeats within it
+    ids = itertools.chain([taken, 'GLREPEATED', 'GLREPEATED'], iter(generate_loan_id, None))
+    monkeypatch.setattr(bulk_ingest, 'generate_loan_id', lambda: next(ids))
+
+    report = service.ingest(csv_stream(10), 'csv', job_id='collide')
+
+    assert report['status'] == 'completed'
+    assert report['inserted'] == 10
+    assert LoanApplication.query.count() == 11
+    assert LoanApplication.query.filter_by(loan_id='GLREPEATED').count() == 1
+
+def test_other_integrity_errors_fail_the_job(service, monkeypatch):
+    def insert_without_project_type(records):
+        for record in records:
+            record['project_type'] = None
+        db.session.execute(LoanApplication.__table__.insert(), records)
+    monkeypatch.setattr(service, '_insert', insert_without_project_type)
+
+    with pytest.raises(Exception):
+        service.ingest(csv_stream(3), 'csv', job_id='broken')
+    assert service.load_progress('broken')['status'] == 'failed'
+    assert LoanApplication.query.count() == 0
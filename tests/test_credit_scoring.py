@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from backend.models.credit_scoring import CreditScoringModel
+from backend.models.training_data import FEATURE_NAMES, LABEL_NAME, generate_columns
+
+@pytest.fixture(scope='module')
+def model():
+    columns = generate_columns(2000, np.random.default_rng(0))
+    X = np.column_stack([columns[name] for name in FEATURE_NAMES])
+    model = CreditScoringModel()
+    model.models['xgboost'] = model.build_estimator('xgboost').fit(X, columns[LABEL_NAME])
+    model.compile_models()
+    return model
+
+@pytest.fixture
+def X():
+    columns = generate_columns(50, np.random.default_rng(1))
+    return np.column_stack([columns[name] for name in FEATURE_NAMES])
+
+def test_cached_batches_match_uncached_and_hit_the_cache(model, X):
+    model.invalidate_predictions()
+    uncached = model.predict_batch(X, 'xgboost')
+    first = model.predict_batch(X, 'xgboost', cached=True)
+    hits = model.prediction_cache.hits
+    second = model.predict_batch(X[::-1], 'xgboost', cached=True)
+
+    assert model.prediction_cache.hits - hits == len(X)
+    assert np.array_equal(first['probability_approved'], uncached['probability_approved'])
+    assert np.array_equal(second['probability_approved'][::-1], uncached['probability_approved'])
+    assert np.array_equal(second['predictions'][::-1], uncached['predictions'])
+
+def test_single_and_batch_paths_share_the_cache(model, X):
+    model.invalidate_predictions()
+    model.predict(X[0], 'xgboost')
+    hits = model.prediction_cache.hits
+    model.predict_batch(X[:1], 'xgboost', cached=True)
+    assert model.prediction_cache.hits == hits + 1
+
+def test_explain_empty_batch(model):
+    assert model.explain_batch([], 'xgboost') == []
+    assert model.explain_batch(np.empty((0, len(FEATURE_NAMES))), 'xgboost', loan_ids=[]) == []
+
+def test_explain_fully_cached_batch(model, X):
+    model.invalidate_predictions()
+    loan_ids = [f'GL{row}' for row in range(len(X))]
+    fresh = model.explain_batch(X, 'xgboost', loan_ids)
+    assert model.explain_batch(X, 'xgboost', loan_ids) == fresh
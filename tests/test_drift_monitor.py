@@ -0,0 +1,54 @@
+import threading
+import time
+import numpy as np
+import pytest
+from backend.models.drift_monitor import DriftMonitor, save_baseline
+from backend.models.training_data import FEATURE_NAMES, generate_columns
+
+def application(columns, row):
+    return {name: float(columns[name][row]) for name in FEATURE_NAMES}
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+@pytest.fixture
+def columns():
+    return generate_columns(200, np.random.default_rng(0))
+
+@pytest.fixture
+def monitor(tmp_path, columns):
+    save_baseline(np.column_stack([columns[name] for name in FEATURE_NAMES]), str(tmp_path))
+    return DriftMonitor(str(tmp_path), window_size=1000, state_path=str(tmp_path / 'drift'), flush_seconds=3600)
+
+def test_background_thread_loads_baseline_and_publishes(monitor, columns, monkeypatch):
+    flush = monitor.flush
+    flushed_by = []
+    monkeypatch.setattr(monitor, 'flush', lambda: flushed_by.append(threading.current_thread().name) or flush())
+
+    monitor.update(application(columns, 0))
+    wait_for(lambda: monitor.baseline is not None and flushed_by)
+    for row in range(1, 100):
+        monitor.update(application(columns, row))
+
+    assert flushed_by == ['drift-monitor']
+    report = monitor.report()
+    assert report['workers'] == 1
+    assert report['rows'] + report['unmonitored'] == 100
+
+def test_update_does_not_touch_the_disk(monitor, columns, monkeypatch):
+    monitor.load()
+    monitor._ensure_started()
+    wait_for(lambda: monitor.load_worker_states())
+
+    def no_disk(*args, **kwargs):
+        if threading.current_thread() is threading.main_thread():
+            raise AssertionError('disk access on the request path')
+    monkeypatch.setattr('os.path.getmtime', no_disk)
+    monkeypatch.setattr('os.replace', no_disk)
+    for row in range(100):
+        monitor.update(application(columns, row))
+
+    assert monitor.observed == 100 and monitor.failed == 0
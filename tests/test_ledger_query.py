@@ -0,0 +1,16 @@
+import pytest
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.mark.parametrize('limit', ['0', '-5', '1001', 'ten'])
+def test_rejects_limits_out_of_range(client, limit):
+    response = client.get(f'/api/ledger/query?limit={limit}')
+    assert response.status_code == 400
+
+def test_accepts_limits_in_range(client):
+    for limit in ('1', '1000'):
+        response = client.get(f'/api/ledger/query?limit={limit}')
+        assert response.status_code == 200
+        assert response.get_json() == {'blocks': [], 'next_cursor': None, 'limit': int(limit)}
@@ -0,0 +1,36 @@
+import csv
+from datetime import datetime
+from sqlalchemy import update
+from backend.database.models import db, LoanApplication
+from backend.services.bulk_ingest import BulkIngestService
+from backend.services.loan_rescoring import LoanRescoringService
+from tests.test_bulk_ingest import csv_stream
+
+def test_counts_only_flips_that_were_written(app, tmp_path):
+    BulkIngestService(directory=str(tmp_path / 'ingest')).ingest(csv_stream(200), 'csv', job_id='book')
+    table = LoanApplication.__table__
+    db.session.execute(update(table).values(loan_approved=~table.c.loan_approved))
+    db.session.commit()
+    approved_stored = LoanApplication.query.filter_by(loan_approved=True).count()
+
+    service = LoanRescoringService(batch_size=50, directory=str(tmp_path / 'rescoring'))
+    score_columns = service.origination.score_columns
+
+    def score_and_modify(batch):
+        # Another writer touches the first five loans of each batch after it was read
+        db.session.execute(
+            update(table).where(table.c.id.in_(batch['id'][:5].tolist())).values(updated_at=datetime(2020, 1, 1))
+        )
+        return score_columns(batch)
+    service.origination.score_columns = score_and_modify
+
+    summary = service.rescore()
+
+    assert summary['loans'] == summary['changed'] == 200
+    assert summary['updated'] == 180
+    assert summary['skipped_modified'] == summary['skipped_flips'] == 20
+    assert summary['flipped_to_approved'] + summary['flipped_to_rejected'] == 180
+    assert summary['approved_after'] == LoanApplication.query.filter_by(loan_approved=True).count()
+    assert summary['approved_before'] == approved_stored
+    with open(summary['flipped_approvals_path']) as f:
+        assert len(list(csv.reader(f))) == 1 + 180
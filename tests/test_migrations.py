@@ -0,0 +1,18 @@
+from sqlalchemy import text
+from backend.database.migrations import run_migrations
+from backend.database.models import db
+
+def ledger_indexes():
+    return {index['name'] for index in db.inspect(db.engine).get_indexes('blockchain_ledger')}
+
+def test_drops_counterparty_indexes_on_blockchain_ledger(app):
+    db.session.execute(text("CREATE INDEX idx_ledger_seller ON blockchain_ledger (seller_id, block_number)"))
+    db.session.execute(text("CREATE INDEX idx_ledger_buyer ON blockchain_ledger (buyer_id, block_number)"))
+    db.session.commit()
+
+    run_migrations(app)
+    assert not ledger_indexes() & {'idx_ledger_seller', 'idx_ledger_buyer'}
+    assert 'idx_ledger_timestamp' in ledger_indexes()
+
+    run_migrations(app)
+    assert not ledger_indexes() & {'idx_ledger_seller', 'idx_ledger_buyer'}
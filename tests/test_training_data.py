@@ -0,0 +1,25 @@
+import numpy as np
+from backend.models.training_data import TrainingShardReader, generate_training_shards
+
+def read_all(directory):
+    reader = TrainingShardReader(directory)
+    shards = list(reader.iter_shards())
+    return np.vstack([X for X, _ in shards]), np.concatenate([y for _, y in shards])
+
+def test_rerun_with_other_arguments_replaces_shards(tmp_path):
+    generate_training_shards(str(tmp_path / 'reused'), 1000, rows_per_shard=100, seed=1)
+    generate_training_shards(str(tmp_path / 'reused'), 900, rows_per_shard=200, seed=2)
+    generate_training_shards(str(tmp_path / 'fresh'), 900, rows_per_shard=200, seed=2)
+
+    X_reused, y_reused = read_all(str(tmp_path / 'reused'))
+    X_fresh, y_fresh = read_all(str(tmp_path / 'fresh'))
+    assert np.array_equal(X_reused, X_fresh)
+    assert np.array_equal(y_reused, y_fresh)
+    assert sorted(p.name for p in (tmp_path / 'reused').iterdir() if p.is_dir()) == \
+        [f'shard_{index:05d}' for index in range(5)]
+
+def test_rerun_with_same_arguments_keeps_shards(tmp_path):
+    generate_training_shards(str(tmp_path), 500, rows_per_shard=200, seed=3)
+    first = (tmp_path / 'shard_00000' / 'approved.npy').stat().st_mtime_ns
+    generate_training_shards(str(tmp_path), 500, rows_per_shard=200, seed=3)
+    assert (tmp_path / 'shard_00000' / 'approved.npy').stat().st_mtime_ns == first